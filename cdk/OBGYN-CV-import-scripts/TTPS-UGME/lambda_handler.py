@@ -187,10 +187,11 @@ def storeData(df, connection, cursor, errors, rows_processed, rows_added_to_db,
                     """
                     INSERT INTO user_cv_data (user_id, data_section_id, data_details, editable)
                     VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (user_id, data_section_id, content_hash) DO NOTHING
                     """,
                     (user_id, data_section_id, data_details_JSON, True)
                 )
-                rows_added_to_db += 1
+                rows_added_to_db += cursor.rowcount
             except Exception as e:
                 errors.append(f"Error inserting row {i}: {str(e)}")
         else:
@@ -6,6 +6,7 @@ import numpy as np
 import psycopg2
 import psycopg2.extras as extras
 import boto3
+from nameMatching import ID_COLUMNS, matchNewRecords, nameKey
 from datetime import datetime
 from awsglue.utils import getResolvedOptions
 
@@ -106,16 +107,22 @@ def storeData():
     
     # The difference between the two sets is the data that are unique and can be inserted into the database
     listOfValuesToInsert = list(set(cleanData) - set(tableData))
+    # name keys come last, first_name and last_name are the first two values of every row
+    listOfValuesToInsert = [row + (nameKey(row[0]), nameKey(row[1])) for row in listOfValuesToInsert]
     
     # Inserting to db
     if df_id['Agency'].iloc[0] == 'Rise':
-        query = f"INSERT INTO {target_table} (first_name, last_name, keywords, agency, sponsor, department, program, title, amount, dates, record_id) VALUES %s"
+        query = f"INSERT INTO {target_table} (first_name, last_name, keywords, agency, sponsor, department, program, title, amount, dates, record_id, first_name_key, last_name_key) VALUES %s"
     else:
-        query = f"INSERT INTO {target_table} (first_name, last_name, keywords, agency, department, program, title, amount, dates) VALUES %s"
-    extras.execute_values(cursor, query, listOfValuesToInsert)
+        query = f"INSERT INTO {target_table} (first_name, last_name, keywords, agency, department, program, title, amount, dates, first_name_key, last_name_key) VALUES %s"
+    insertedIds = extras.execute_values(cursor, query + f" RETURNING {ID_COLUMNS[target_table]}", listOfValuesToInsert, fetch=True)
+
+    # Match only the new rows against the users, everything older has been matched already
+    matchCount = matchNewRecords(cursor, target_table, [row[0] for row in insertedIds])
 
     connection.commit()
     print(f"Inserted {len(listOfValuesToInsert)} more rows into {target_table}!")
+    print(f"Stored {matchCount} new user matches")
 
     # # For testing purposes
     # query = "SELECT * FROM public.grant_data LIMIT 1"
@@ -13,6 +13,7 @@ import ast
 import re
 import psycopg2
 from psycopg2 import extras
+from nameMatching import matchNewRecords, nameKey
 from datetime import datetime
 from awsglue.utils import getResolvedOptions
 
@@ -127,10 +128,16 @@ def storePatentData():
 
 
     listOfValuesToInsert = list(df_insert.itertuples(index=False, name=None))
+    # name keys are only added to the inserted rows, df_insert is also saved to S3 as is
+    listOfValuesToInsert = [row + (nameKey(row[1]), nameKey(row[2])) for row in listOfValuesToInsert]
     print(f"inserting {str(len(listOfValuesToInsert))} new entries!")
     # inserting to db
-    query = f"INSERT INTO patents ({schema}) VALUES %s"
-    extras.execute_values(cursor, query, listOfValuesToInsert)
+    query = f"INSERT INTO patents ({schema}, first_name_key, last_name_key) VALUES %s RETURNING patent_id"
+    insertedIds = extras.execute_values(cursor, query, listOfValuesToInsert, fetch=True)
+
+    # Match only the new rows against the users, everything older has been matched already
+    matchCount = matchNewRecords(cursor, 'patents', [row[0] for row in insertedIds])
+    print(f"Stored {matchCount} new user matches")
 
     connection.commit()
     
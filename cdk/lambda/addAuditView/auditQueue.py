@@ -0,0 +1,57 @@
+'''
+Queues used by addAuditView in buffered mode. Audit events are put on the queue and written to
+audit_view in batches by the flushAuditView Lambda.
+
+AUDIT_QUEUE_URL selects the SQS queue, getAuditQueue raises when it is not set so that events are never
+dropped. Tests and local runs install an in-process LocalAuditQueue with useLocalAuditQueue instead:
+drain() hands the pending events over in the same event shape SQS delivers to flushAuditView.
+'''
+import json
+import os
+import queue
+import uuid
+import boto3
+
+class SqsAuditQueue:
+
+    def __init__(self, queue_url, client=None):
+        self.queue_url = queue_url
+        self.client = client or boto3.client('sqs')
+
+    def put(self, record):
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(record, default=str))
+
+class LocalAuditQueue:
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, record):
+        self._queue.put(json.dumps(record, default=str))
+
+    def drain(self, max_messages=500):
+        records = []
+        while len(records) < max_messages:
+            try:
+                body = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            records.append({'messageId': str(uuid.uuid4()), 'body': body})
+        return {'Records': records}
+
+_audit_queue = {'queue': None}
+
+def getAuditQueue():
+    if _audit_queue['queue'] is None:
+        queue_url = os.environ.get('AUDIT_QUEUE_URL')
+        if not queue_url:
+            raise Exception("AUDIT_QUEUE_URL is not set, audit events cannot be queued")
+        _audit_queue['queue'] = SqsAuditQueue(queue_url)
+    return _audit_queue['queue']
+
+def useLocalAuditQueue():
+    """
+    Tests only: queue events in process instead of SQS, returns the queue to drain
+    """
+    _audit_queue['queue'] = LocalAuditQueue()
+    return _audit_queue['queue']
@@ -1,10 +1,26 @@
 import boto3
 import psycopg2
 import os
+from datetime import datetime
 from databaseConnect import get_connection
+from auditQueue import getAuditQueue
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+# 'direct' inserts the record before returning, 'queue' hands it to flushAuditView through the audit queue
+AUDIT_INGESTION_MODE = os.environ.get('AUDIT_INGESTION_MODE', 'direct')
+if AUDIT_INGESTION_MODE == 'queue' and not os.environ.get('AUDIT_QUEUE_URL'):
+    # Queued events would have nowhere to go, keep inserting them directly
+    print("AUDIT_QUEUE_URL is not set, falling back to direct inserts")
+    AUDIT_INGESTION_MODE = 'direct'
+
+def enqueueAuditView(record):
+    """
+    Buffered mode: the record is written later in a batch, so it has no log_view_id yet
+    """
+    record = dict(record, ts=datetime.utcnow().isoformat(sep=' '))
+    getAuditQueue().put(record)
+    return dict(record, log_view_id=None)
 
 def addAuditView(arguments, identity=None):
 
@@ -34,6 +50,22 @@ def addAuditView(arguments, identity=None):
     # if logged_user_id is None or logged_user_first_name is None or logged_user_last_name is None:
     #     raise Exception("logged_user_id, logged_user_first_name, and logged_user_last_name are required.")
 
+    if AUDIT_INGESTION_MODE == 'queue':
+        return enqueueAuditView({
+            'logged_user_id': logged_user_id,
+            'logged_user_first_name': logged_user_first_name,
+            'logged_user_last_name': logged_user_last_name,
+            'ip': ip,
+            'browser_version': browser_version,
+            'page': page,
+            'session_id': session_id,
+            'assistant': assistant,
+            'profile_record': profile_record,
+            'logged_user_role': logged_user_role,
+            'logged_user_email': logged_user_email,
+            'logged_user_action': logged_user_action
+        })
+
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
     cursor = connection.cursor()
 
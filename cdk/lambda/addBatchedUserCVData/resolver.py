@@ -1,73 +1,296 @@
 import boto3
 import json
 import psycopg2
+import psycopg2.extras as extras
 import os
+import re
 import time
+from datetime import datetime
 from databaseConnect import get_connection
+from cvUpdates import recordCVUpdate
 
 sm_client = boto3.client('secretsmanager')
 dynamodb = boto3.client('dynamodb')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
 
+# The whole batch is sent as one VALUES list. Entries are matched to existing rows through the unique
+# (user_id, data_section_id, content_hash) index: new entries are inserted, archived duplicates are
+# unarchived and live duplicates are left alone. Duplicates inside the batch are only written once.
+BATCH_UPSERT_QUERY = """
+    WITH input (ord, user_id, data_section_id, data_details, editable) AS (
+        VALUES %s
+    ),
+    hashed AS (
+        SELECT input.*,
+               encode(sha256(convert_to(data_details::jsonb::text, 'UTF8')), 'hex') AS content_hash,
+               row_number() OVER (
+                   PARTITION BY encode(sha256(convert_to(data_details::jsonb::text, 'UTF8')), 'hex') ORDER BY ord
+               ) AS batch_rank
+        FROM input
+    ),
+    upserted AS (
+        INSERT INTO user_cv_data (user_id, data_section_id, data_details, editable)
+        SELECT user_id, data_section_id, data_details::json, editable
+        FROM hashed WHERE batch_rank = 1
+        ORDER BY ord
+        ON CONFLICT (user_id, data_section_id, content_hash)
+        DO UPDATE SET archive = false, archive_timestamp = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE user_cv_data.archive = true
+        RETURNING user_cv_data_id, content_hash, (xmax = 0) AS inserted
+    )
+    SELECT hashed.ord,
+           upserted.user_cv_data_id,
+           CASE
+               WHEN hashed.batch_rank > 1 OR upserted.user_cv_data_id IS NULL THEN 'ALREADY_EXISTS'
+               WHEN upserted.inserted THEN 'INSERTED'
+               ELSE 'UNARCHIVED'
+           END AS status
+    FROM hashed
+    LEFT JOIN upserted ON upserted.content_hash = hashed.content_hash AND hashed.batch_rank = 1
+    ORDER BY hashed.ord
+"""
+
+def upsertBatch(cursor, user_id, data_section_id, editable, data_details_list):
+    """
+    Writes every entry in a single statement and returns one status dict per entry, in input order
+    """
+    if len(data_details_list) == 0:
+        return []
+    values = [
+        (i, user_id, data_section_id, json.dumps(data_details), editable)
+        for i, data_details in enumerate(data_details_list)
+    ]
+    rows = extras.execute_values(
+        cursor,
+        BATCH_UPSERT_QUERY,
+        values,
+        template="(%s::int, %s::varchar, %s::varchar, %s::text, %s::boolean)",
+        page_size=len(values),
+        fetch=True
+    )
+    return [{'index': row[0], 'user_cv_data_id': row[1], 'status': row[2]} for row in rows]
+
+def publicationKey(publication):
+    """
+    Stable identity of a publication across syncs: Scopus publication id, then DOI, then normalized title
+    """
+    if not isinstance(publication, dict):
+        return None
+    publication_id = str(publication.get('publication_id') or '').strip()
+    if publication_id:
+        return 'id:' + publication_id
+    doi = str(publication.get('doi') or '').strip().lower()
+    doi = re.sub(r'^(https?://)?(dx\.)?doi\.org/', '', doi)
+    if doi:
+        return 'doi:' + doi
+    title = re.sub(r'[^a-z0-9]+', ' ', str(publication.get('title') or '').lower()).strip()
+    if title:
+        return 'title:' + title
+    return None
+
+def canonical(data_details):
+    return json.dumps(data_details, sort_keys=True)
+
+UPDATE_PUBLICATIONS_QUERY = (
+    "UPDATE user_cv_data AS u SET data_details = v.data_details::json, archive = false, archive_timestamp = NULL, "
+    "updated_at = CURRENT_TIMESTAMP "
+    "FROM (VALUES %s) AS v (user_cv_data_id, data_details) WHERE u.user_cv_data_id = v.user_cv_data_id"
+)
+
+def updatePublications(cursor, user_id, data_section_id, updates, entries):
+    """
+    Writes the changed publications, updates being (entry index, user_cv_data_id, data_details json).
+    If a new content is already stored in another row of the section, the unique content hash index
+    rejects the statement. The rows are then written one at a time: an entry whose content already exists
+    points to that row instead (unarchiving it if needed) and its own row is archived.
+    Returns the ids of the rows archived and unarchived this way.
+    """
+    archived = []
+    unarchived = []
+    cursor.execute("SAVEPOINT sync_publications")
+    try:
+        extras.execute_values(
+            cursor,
+            UPDATE_PUBLICATIONS_QUERY,
+            [(user_cv_data_id, data_details) for i, user_cv_data_id, data_details in updates],
+            page_size=len(updates)
+        )
+        cursor.execute("RELEASE SAVEPOINT sync_publications")
+        return archived, unarchived
+    except psycopg2.IntegrityError:
+        cursor.execute("ROLLBACK TO SAVEPOINT sync_publications")
+
+    for i, user_cv_data_id, data_details in updates:
+        cursor.execute("SAVEPOINT sync_publication")
+        try:
+            extras.execute_values(cursor, UPDATE_PUBLICATIONS_QUERY, [(user_cv_data_id, data_details)])
+            cursor.execute("RELEASE SAVEPOINT sync_publication")
+            continue
+        except psycopg2.IntegrityError:
+            cursor.execute("ROLLBACK TO SAVEPOINT sync_publication")
+
+        cursor.execute(
+            "SELECT user_cv_data_id, archive FROM user_cv_data WHERE user_id = %s AND data_section_id = %s "
+            "AND content_hash = encode(sha256(convert_to(%s::jsonb::text, 'UTF8')), 'hex')",
+            (user_id, data_section_id, data_details)
+        )
+        owner = cursor.fetchone()
+        if owner is None:
+            raise Exception(f"Could not update entry {user_cv_data_id}")
+        owner_id, owner_archived = owner
+        if owner_archived:
+            cursor.execute(
+                "UPDATE user_cv_data SET archive = false, archive_timestamp = NULL, updated_at = CURRENT_TIMESTAMP "
+                "WHERE user_cv_data_id = %s",
+                (owner_id,)
+            )
+            unarchived.append(owner_id)
+        entries[i] = {'index': i, 'user_cv_data_id': owner_id, 'status': 'UNARCHIVED' if owner_archived else 'ALREADY_EXISTS'}
+        # The entry's own row keeps its old content, it is archived unless another entry now points to it
+        # (two publications that swapped contents)
+        if not any(entry is not None and entry['user_cv_data_id'] == user_cv_data_id for entry in entries):
+            cursor.execute(
+                "UPDATE user_cv_data SET archive = true, archive_timestamp = %s, updated_at = CURRENT_TIMESTAMP "
+                "WHERE user_cv_data_id = %s AND archive = false RETURNING user_cv_data_id",
+                (datetime.now(), user_cv_data_id)
+            )
+            archived += [row[0] for row in cursor.fetchall()]
+    return archived, unarchived
+
+def syncPublications(cursor, user_id, data_section_id, editable, publications):
+    """
+    Brings the user's publications in line with the given list while touching as few rows as possible:
+    new publications are inserted, changed ones updated, archived ones that reappear are unarchived
+    and publications missing from the list are archived. Publications without any identity
+    (no id, DOI or title) can only be matched by content.
+    """
+    cursor.execute(
+        "SELECT user_cv_data_id, data_details, archive FROM user_cv_data "
+        "WHERE user_id = %s AND data_section_id = %s ORDER BY archive, user_cv_data_id FOR UPDATE",
+        (user_id, data_section_id)
+    )
+    existing = {}
+    unmatched = set()
+    for user_cv_data_id, data_details, archive in cursor.fetchall():
+        key = publicationKey(data_details)
+        if key is None or key in existing:
+            # Duplicate identities and keyless rows are only kept if they match by content below
+            unmatched.add((user_cv_data_id, archive, canonical(data_details)))
+            continue
+        existing[key] = (user_cv_data_id, data_details, archive)
+
+    entries = [None] * len(publications)
+    updates = []
+    new_publications = []
+    new_indexes = []
+    seen_keys = set()
+    for i, publication in enumerate(publications):
+        key = publicationKey(publication)
+        if key is not None and key in seen_keys:
+            entries[i] = {'index': i, 'user_cv_data_id': None, 'status': 'ALREADY_EXISTS'}
+            continue
+        if key is None or key not in existing:
+            new_publications.append(publication)
+            new_indexes.append(i)
+            continue
+        seen_keys.add(key)
+        user_cv_data_id, data_details, archive = existing.pop(key)
+        if archive:
+            status = 'UNARCHIVED'
+        elif canonical(data_details) != canonical(publication):
+            status = 'UPDATED'
+        else:
+            status = 'UNCHANGED'
+        entries[i] = {'index': i, 'user_cv_data_id': user_cv_data_id, 'status': status}
+        if status != 'UNCHANGED':
+            updates.append((i, user_cv_data_id, json.dumps(publication)))
+
+    # Keyless publications that already exist with identical content are kept as they are
+    new_contents = set(canonical(publication) for publication in new_publications)
+    to_archive = [user_cv_data_id for user_cv_data_id, data_details, archive in existing.values() if not archive]
+    to_archive += [user_cv_data_id for user_cv_data_id, archive, content in unmatched
+                   if not archive and content not in new_contents]
+
+    if to_archive:
+        cursor.execute(
+            "UPDATE user_cv_data SET archive = true, archive_timestamp = %s, updated_at = CURRENT_TIMESTAMP WHERE user_cv_data_id IN %s",
+            (datetime.now(), tuple(to_archive))
+        )
+    archived_ids = set(to_archive)
+    if updates:
+        archived, unarchived = updatePublications(cursor, user_id, data_section_id, updates, entries)
+        archived_ids = (archived_ids | set(archived)) - set(unarchived)
+    for entry in upsertBatch(cursor, user_id, data_section_id, editable, new_publications):
+        i = new_indexes[entry['index']]
+        entries[i] = {'index': i, 'user_cv_data_id': entry['user_cv_data_id'], 'status': entry['status']}
+
+    # The upsert unarchives rows whose content matches a new publication, those are not archived in the end
+    if archived_ids:
+        cursor.execute(
+            "SELECT count(*) FROM user_cv_data WHERE user_cv_data_id IN %s AND archive = true",
+            (tuple(archived_ids),)
+        )
+        return entries, cursor.fetchone()[0]
+    return entries, 0
+
 def addBatchedUserCVData(arguments):
     """
     arguments: {
-        'publications': [list of data_details dicts],
+        'data_details_list': [list of data_details dicts],
         'user_id': str,
         'data_section_id': str,
+        'data_section_title': str,
         'editable': bool,
+        'sync_mode': 'diff' (default) or 'replace', only used for Publications
     }
+    Publications are synced: the list is the complete set of the user's publications.
+    Returns the number of entries per outcome, plus the status of each entry
     """
     publications = arguments.get('data_details_list', [])
     user_id = arguments['user_id']
     data_section_id = arguments['data_section_id']
     editable = arguments['editable']
     data_section_title = arguments.get('data_section_title', "")
+    sync_mode = arguments.get('sync_mode') or 'diff'
 
     if not isinstance(publications, list):
-        return "No publications provided"
+        return {'message': "No publications provided", 'inserted_count': 0, 'existing_count': 0,
+                'unarchived_count': 0, 'updated_count': 0, 'archived_count': 0, 'entries': []}
 
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
     print("Connected to Database")
     cursor = connection.cursor()
-    inserted_count = 0
 
-    if (data_section_title == 'Publications'):
-        # 1. Delete all existing publications for this user and section
-        cursor.execute(
-            "DELETE FROM user_cv_data WHERE user_id = %s AND data_section_id = %s",
-            (user_id, data_section_id)
-        )
-        for pub in publications:
-            data_details_json = json.dumps(pub)
-            cursor.execute(
-                "INSERT INTO user_cv_data (user_id, data_section_id, data_details, editable) VALUES (%s, %s, %s, %s)",
-                (user_id, data_section_id, data_details_json, editable)
-            )
-            inserted_count += 1
+    archived_count = 0
+    if (data_section_title == 'Publications' and sync_mode == 'diff'):
+        entries, archived_count = syncPublications(cursor, user_id, data_section_id, editable, publications)
     else:
-        for pub in publications:
-            data_details_json = json.dumps(pub)
+        if (data_section_title == 'Publications'):
+            # Delete all existing publications for this user and section, they are replaced by the batch
             cursor.execute(
-                "SELECT COUNT(*) FROM user_cv_data WHERE data_details::jsonb = %s AND user_id = %s AND data_section_id = %s",
-                (data_details_json, user_id, data_section_id)
+                "DELETE FROM user_cv_data WHERE user_id = %s AND data_section_id = %s",
+                (user_id, data_section_id)
             )
-            existing_count = cursor.fetchone()[0]
-            if existing_count == 0:
-                cursor.execute(
-                    "INSERT INTO user_cv_data (user_id, data_section_id, data_details, editable) VALUES (%s, %s, %s, %s)",
-                    (user_id, data_section_id, data_details_json, editable)
-                )
-                inserted_count += 1
-
-    if inserted_count > 0:
-        connection.commit()
+        entries = upsertBatch(cursor, user_id, data_section_id, editable, publications)
+    connection.commit()
 
     cursor.close()
     connection.close()
 
-    return f"Successfully added {inserted_count} entry(s)"
+    if archived_count > 0 or any(entry['status'] not in ('ALREADY_EXISTS', 'UNCHANGED') for entry in entries):
+        recordCVUpdate(user_id)
+
+    inserted_count = sum(1 for entry in entries if entry['status'] == 'INSERTED')
+    return {
+        'message': f"Successfully added {inserted_count} entry(s)",
+        'inserted_count': inserted_count,
+        'existing_count': sum(1 for entry in entries if entry['status'] in ('ALREADY_EXISTS', 'UNCHANGED')),
+        'unarchived_count': sum(1 for entry in entries if entry['status'] == 'UNARCHIVED'),
+        'updated_count': sum(1 for entry in entries if entry['status'] == 'UPDATED'),
+        'archived_count': archived_count,
+        'entries': entries
+    }
 
 def lambda_handler(event, context):
     arguments = event['arguments']
-    return addBatchedUserCVData(arguments=arguments)
\ No newline at end of file
+    return addBatchedUserCVData(arguments=arguments)
@@ -4,6 +4,7 @@ import psycopg2
 import os
 import time
 from databaseConnect import get_connection
+from cvUpdates import recordCVUpdate
 
 sm_client = boto3.client('secretsmanager')
 dynamodb = boto3.client('dynamodb')
@@ -14,32 +15,31 @@ def addUserCVData(arguments):
     print("Connected to Database")
     cursor = connection.cursor()
 
-    # Check if an entry with the same data_details, user_id, and data_section_id exists
+    # Insert the entry, or unarchive an identical archived one. Duplicates are detected through the
+    # unique (user_id, data_section_id, content_hash) index, content_hash being set by a trigger
     data_details_json = json.dumps(arguments['data_details'])
-    cursor.execute("SELECT user_cv_data_id, archive FROM user_cv_data WHERE data_details::jsonb = %s AND user_id = %s AND data_section_id = %s", (data_details_json, arguments['user_id'], arguments['data_section_id']))
-    existing = cursor.fetchone()
+    cursor.execute("""
+        INSERT INTO user_cv_data (user_id, data_section_id, data_details, editable, archive, archive_timestamp)
+        VALUES (%s, %s, %s, %s, false, NULL)
+        ON CONFLICT (user_id, data_section_id, content_hash)
+        DO UPDATE SET archive = false, archive_timestamp = NULL, data_details = EXCLUDED.data_details,
+                      updated_at = CURRENT_TIMESTAMP
+        WHERE user_cv_data.archive = true
+        RETURNING (xmax = 0) AS inserted
+    """, (arguments['user_id'], arguments['data_section_id'], data_details_json, arguments['editable'],))
+    result = cursor.fetchone()
+    connection.commit()
+    cursor.close()
+    connection.close()
+    if result is not None:
+        recordCVUpdate(arguments['user_id'])
 
-    if existing is None:
-        # Insert the new entry
-        cursor.execute("INSERT INTO user_cv_data (user_id, data_section_id, data_details, editable, archive, archive_timestamp) VALUES (%s, %s, %s, %s, false, NULL)", (arguments['user_id'], arguments['data_section_id'], data_details_json, arguments['editable'],))
-        connection.commit()
-        cursor.close()
-        connection.close()
+    if result is None:
+        # Entry already exists and is not archived, nothing was changed
+        return "ALREADY_EXISTS"
+    if result[0]:
         return "SUCCESS"
-    else:
-        user_cv_data_id, is_archived = existing
-        if is_archived:
-            # Unarchive and update data_details
-            cursor.execute("UPDATE user_cv_data SET archive = false, archive_timestamp = NULL, data_details = %s WHERE user_cv_data_id = %s", (data_details_json, user_cv_data_id))
-            connection.commit()
-            cursor.close()
-            connection.close()
-            return "UNARCHIVED"
-        else:
-            # Entry already exists and is not archived, do nothing or return a message
-            cursor.close()
-            connection.close()
-            return "ALREADY_EXISTS"
+    return "UNARCHIVED"
 
 def lambda_handler(event, context):
     arguments = event['arguments']
@@ -0,0 +1,193 @@
+import boto3
+import html
+import http.client
+import json
+import os
+import re
+import signal
+import traceback
+import uuid
+from gotenbergCommon import GOTENBERG_HTML_PATH, MULTIPART_CONTENT_TYPE, multipart_stream, notify_generation_complete
+
+GOTENBERG_HOST = os.environ.get('GOTENBERG_HOST')
+GOTENBERG_MERGE_PATH = "/forms/pdfengines/merge"
+BUCKET_NAME = os.environ.get('BUCKET_NAME')
+# PDFs sent to Gotenberg in one merge request, larger packets are merged in several levels
+MERGE_CHUNK_SIZE = int(os.environ.get('MERGE_CHUNK_SIZE', '25'))
+# Seconds before the Lambda deadline at which building is abandoned, so the failure is still notified
+TIMEOUT_BUFFER_SECONDS = 30
+# Only generated CVs can be put in a packet
+ALLOWED_KEY = re.compile(r'^(pdf/[^/]+|batch/[^/]+/pdf/[^/]+)\.pdf$')
+# Page objects of a PDF, Chromium does not put them in compressed object streams
+PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+s3_client = boto3.client("s3")
+lambda_client = boto3.client("lambda")
+
+def count_pages(pdf_bytes):
+    return len(PAGE_PATTERN.findall(pdf_bytes))
+
+def post_to_gotenberg(path, body, output_path):
+    """Sends the body with chunked transfer encoding and streams the resulting PDF to output_path"""
+    conn = http.client.HTTPConnection(GOTENBERG_HOST, 80, timeout=600)
+    try:
+        conn.request("POST", path, body=body, headers={
+            "Content-Type": MULTIPART_CONTENT_TYPE
+        }, encode_chunked=True)
+        response = conn.getresponse()
+        if response.status != 200:
+            print("Gotenberg error body:", response.read().decode("utf-8", errors="ignore"))
+            raise Exception(f"Gotenberg request to {path} failed: {response.status}")
+        with open(output_path, "wb") as output:
+            while True:
+                chunk = response.read(1024 * 1024)
+                if not chunk:
+                    break
+                output.write(chunk)
+    finally:
+        conn.close()
+
+def merge_keys(keys, output_key, page_counts=None):
+    """
+    Merges the PDFs at keys, in order, into output_key. Gotenberg merges files in alphabetical order of
+    their names, so they are sent as 00000.pdf, 00001.pdf, ... When page_counts is given the number of
+    pages of each file is appended to it.
+    """
+    if len(keys) == 1:
+        if page_counts is not None:
+            page_counts.append(count_pages(s3_client.get_object(Bucket=BUCKET_NAME, Key=keys[0])['Body'].read()))
+        s3_client.copy_object(Bucket=BUCKET_NAME, Key=output_key, CopySource={"Bucket": BUCKET_NAME, "Key": keys[0]})
+        return
+
+    def load(key):
+        # Only runs when the file is sent, so one PDF is held in memory at a time
+        pdf_bytes = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)['Body'].read()
+        if page_counts is not None:
+            page_counts.append(count_pages(pdf_bytes))
+        yield pdf_bytes
+
+    output_path = "/tmp/merged.pdf"
+    post_to_gotenberg(
+        GOTENBERG_MERGE_PATH,
+        multipart_stream([(f"{index:05d}.pdf", "application/pdf", load(key)) for index, key in enumerate(keys)]),
+        output_path
+    )
+    s3_client.upload_file(output_path, BUCKET_NAME, output_key, ExtraArgs={"ContentType": "application/pdf"})
+    os.remove(output_path)
+
+def render_index(title, entries, output_key):
+    """Renders the packet's index page listing every CV with the page it starts on, returns its page count"""
+    rows = "".join(
+        f"<tr><td>{html.escape(name)}</td><td class='page'>{page}</td></tr>" for name, page in entries
+    )
+    index_html = (
+        "<html><head><meta charset='utf-8'><style>"
+        "body { font-family: Arial, sans-serif; font-size: 11pt; } table { width: 100%; border-collapse: collapse; }"
+        "td { padding: 4px 0; border-bottom: 1px solid #ddd; } td.page { text-align: right; }"
+        f"</style></head><body><h1>{html.escape(title)}</h1><table>{rows}</table></body></html>"
+    ).encode("utf-8")
+
+    output_path = "/tmp/index.pdf"
+    post_to_gotenberg(GOTENBERG_HTML_PATH, multipart_stream([("index.html", "text/html", [index_html])]), output_path)
+    with open(output_path, "rb") as index_file:
+        pages = count_pages(index_file.read())
+    s3_client.upload_file(output_path, BUCKET_NAME, output_key, ExtraArgs={"ContentType": "application/pdf"})
+    os.remove(output_path)
+    return pages
+
+def build_packet(packet_id, pdf_keys, titles, title):
+    """
+    Merges the CVs in chunks of MERGE_CHUNK_SIZE, then merges the chunks (again in chunks while there are
+    too many) behind an index page into packets/<packet_id>/packet.pdf
+    """
+    prefix = f"packets/{packet_id}"
+    page_counts = []
+    parts = []
+    for start in range(0, len(pdf_keys), MERGE_CHUNK_SIZE):
+        part_key = f"{prefix}/parts/0-{len(parts):05d}.pdf"
+        merge_keys(pdf_keys[start:start + MERGE_CHUNK_SIZE], part_key, page_counts)
+        parts.append(part_key)
+    intermediate = list(parts)
+
+    level = 1
+    while len(parts) > MERGE_CHUNK_SIZE - 1:
+        merged = []
+        for start in range(0, len(parts), MERGE_CHUNK_SIZE):
+            part_key = f"{prefix}/parts/{level}-{len(merged):05d}.pdf"
+            merge_keys(parts[start:start + MERGE_CHUNK_SIZE], part_key)
+            merged.append(part_key)
+        intermediate += merged
+        parts = merged
+        level += 1
+
+    # Page numbers depend on the length of the index itself, which is rendered again if it is longer than a page
+    index_key = f"{prefix}/parts/index.pdf"
+    index_pages = 1
+    while True:
+        entries = []
+        page = index_pages + 1
+        for name, pages in zip(titles, page_counts):
+            entries.append((name, page))
+            page += pages
+        rendered_pages = render_index(title, entries, index_key)
+        if rendered_pages <= index_pages:
+            break
+        index_pages = rendered_pages
+    intermediate.append(index_key)
+
+    packet_key = f"{prefix}/packet.pdf"
+    merge_keys([index_key] + parts, packet_key)
+    s3_client.put_object_tagging(
+        Bucket=BUCKET_NAME,
+        Key=packet_key,
+        Tagging={"TagSet": [{"Key": "isPacketComplete", "Value": "true"}]}
+    )
+    s3_client.delete_objects(Bucket=BUCKET_NAME, Delete={"Objects": [{"Key": key} for key in intermediate], "Quiet": True})
+    print(f"Packet {packet_key}: {len(pdf_keys)} CVs, {sum(page_counts) + index_pages} pages")
+    return packet_key
+
+def timeout_handler(signum, frame):
+    raise TimeoutError("Lambda function timed out")
+
+def createCVPacket(arguments, context):
+    """Validates the request and starts building the packet in an asynchronous invocation"""
+    pdf_keys = arguments['pdf_keys']
+    if len(pdf_keys) == 0:
+        raise Exception("No CVs to merge")
+    invalid = [key for key in pdf_keys if not ALLOWED_KEY.match(key)]
+    if invalid:
+        raise Exception(f"Not generated CVs: {', '.join(invalid[:5])}")
+    titles = arguments.get('titles') or []
+    titles = [titles[i] if i < len(titles) and titles[i] else pdf_keys[i].split('/')[-1][:-4] for i in range(len(pdf_keys))]
+    packet_id = str(uuid.uuid4())
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps({
+            'packet_id': packet_id,
+            'pdf_keys': pdf_keys,
+            'titles': titles,
+            'title': arguments.get('title') or 'CV Packet',
+        })
+    )
+    return {'packet_id': packet_id, 'key': f"packets/{packet_id}/packet.pdf"}
+
+def lambda_handler(event, context):
+    if 'fieldName' in event:
+        return createCVPacket(event['arguments'], context)
+
+    packet_key = f"packets/{event['packet_id']}/packet.pdf"
+    try:
+        # A packet too large to build in one invocation fails before Lambda stops it, instead of never notifying
+        signal.signal(signal.SIGALRM, timeout_handler)
+        signal.alarm(int(context.get_remaining_time_in_millis() / 1000.0 - TIMEOUT_BUFFER_SECONDS))
+        build_packet(event['packet_id'], event['pdf_keys'], event['titles'], event['title'])
+        return {"status": "SUCCESS", "key": packet_key}
+    except Exception as e:
+        print("==== Exception Occurred ====")
+        traceback.print_exc()
+        return {"status": "ERROR", "message": str(e)}
+    finally:
+        signal.alarm(0)
+        # The packet key is only tagged complete on success
+        notify_generation_complete(packet_key)
@@ -3,6 +3,7 @@ import psycopg2
 import json
 import os
 from databaseConnect import get_connection
+from migrations import runMigrations
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
@@ -104,7 +105,11 @@ def lambda_handler(event, context):
     columns.append(createColumn('data_details', 'JSON', '', False))
     columns.append(createColumn('archive', 'boolean', 'DEFAULT false', False))
     columns.append(createColumn('archive_timestamp', 'timestamp', '', False))
-    columns.append(createColumn('editable', 'boolean', '', True))
+    columns.append(createColumn('editable', 'boolean', '', False))
+    columns.append(createColumn('content_hash', 'varchar', '', False)) # Maintained by trigger, see migrations.py
+    columns.append(createColumn('created_at', 'timestamp', 'DEFAULT CURRENT_TIMESTAMP', False))
+    columns.append(createColumn('updated_at', 'timestamp', 'DEFAULT CURRENT_TIMESTAMP', False))
+    columns.append(createColumn('updated_xid', 'xid8', '', True)) # Maintained by trigger, see migrations.py
     query = createQuery('user_cv_data', columns)
     cursor.execute(query)
 
@@ -161,7 +166,9 @@ def lambda_handler(event, context):
     columns.append(createColumn('program', 'varchar', '', False))
     columns.append(createColumn('title', 'varchar', '', False))
     columns.append(createColumn('amount', 'int', '', False))
-    columns.append(createColumn('dates', 'varchar', '', True))
+    columns.append(createColumn('dates', 'varchar', '', False))
+    columns.append(createColumn('first_name_key', 'varchar', '', False)) # Normalized first token, filled by the ETL
+    columns.append(createColumn('last_name_key', 'varchar', '', True))
     query = createQuery('grants', columns)
     cursor.execute(query)
 
@@ -178,7 +185,9 @@ def lambda_handler(event, context):
     columns.append(createColumn('amount', 'int', '', False))
     columns.append(createColumn('dates', 'varchar', '', False))
     columns.append(createColumn('sponsor', 'varchar', '', False)) # New column for rise sponsor
-    columns.append(createColumn('record_id', 'varchar', 'NOT NULL', True)) # New column for rise record_id
+    columns.append(createColumn('record_id', 'varchar', 'NOT NULL', False)) # New column for rise record_id
+    columns.append(createColumn('first_name_key', 'varchar', '', False)) # Normalized first token, filled by the ETL
+    columns.append(createColumn('last_name_key', 'varchar', '', True))
     query = createQuery('rise_data', columns)
     cursor.execute(query)
 
@@ -188,7 +197,9 @@ def lambda_handler(event, context):
     columns.append(createColumn('title', 'varchar', '', False))
     columns.append(createColumn('template_structure', 'varchar', '', False))
     columns.append(createColumn('start_year', 'varchar', '', False))
-    columns.append(createColumn('end_year', 'varchar', '', True))
+    columns.append(createColumn('end_year', 'varchar', '', False))
+    columns.append(createColumn('version', 'integer', 'NOT NULL DEFAULT 1', False)) # Incremented on every update
+    columns.append(createColumn('updated_at', 'timestamptz', '', True)) # Set on every update
     query = createQuery('templates', columns)
     cursor.execute(query)
 
@@ -203,7 +214,9 @@ def lambda_handler(event, context):
     columns.append(createColumn('family_number', 'varchar', '', False))
     columns.append(createColumn('country_code', 'varchar', '', False))
     columns.append(createColumn('kind_code', 'varchar', '', False))
-    columns.append(createColumn('classification', 'varchar', '', True))
+    columns.append(createColumn('classification', 'varchar', '', False))
+    columns.append(createColumn('first_name_key', 'varchar', '', False)) # Normalized first token, filled by the ETL
+    columns.append(createColumn('last_name_key', 'varchar', '', True))
     query = createQuery('patents', columns)
     cursor.execute(query)
     
@@ -262,9 +275,13 @@ def lambda_handler(event, context):
     
     cursor.close()
     connection.commit()
-    connection.close()
     print("Tables Created")
 
+    # Apply versioned schema changes (indexes etc.) on top of the base tables
+    applied = runMigrations(connection)
+    print(f"Applied migrations: {applied}")
+    connection.close()
+
     return {
         'statusCode': 200,
         'body': json.dumps('Tables Created')
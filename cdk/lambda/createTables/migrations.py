@@ -0,0 +1,435 @@
+'''
+Versioned schema migrations, applied in order after the base tables are created.
+
+Each migration runs at most once per database; applied versions are recorded in schema_migrations.
+Migrations marked transactional=False (e.g. CREATE INDEX CONCURRENTLY) are run in autocommit mode
+and must therefore be idempotent, since a failure half way through cannot be rolled back.
+New migrations are appended to the end of MIGRATIONS with the next version number.
+'''
+import re
+
+MIGRATIONS = [
+    {
+        'version': 1,
+        'description': 'Partial indexes for the hot user_cv_data reads',
+        'transactional': False,
+        'statements': [
+            # getUserCVData, addUserCVData
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_cv_data_user_section_active_idx '
+            'ON user_cv_data (user_id, data_section_id) WHERE archive = false',
+            # getAllSectionCVData, getDepartmentCVData, getFacultyWideCVData
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_cv_data_section_active_idx '
+            'ON user_cv_data (data_section_id) WHERE archive = false',
+            # getArchivedUserCVData
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_cv_data_user_archived_idx '
+            'ON user_cv_data (user_id) WHERE archive = true',
+            # deleteArchivedData
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_cv_data_archive_timestamp_idx '
+            'ON user_cv_data (archive_timestamp) WHERE archive = true',
+        ],
+    },
+    {
+        'version': 2,
+        'description': 'Content hash column and unique index for user_cv_data deduplication',
+        'transactional': True,
+        'statements': [
+            'ALTER TABLE user_cv_data ADD COLUMN IF NOT EXISTS content_hash varchar',
+            # jsonb::text is a canonical rendering (sorted keys, normalized whitespace), so equal JSON
+            # documents always hash the same regardless of which writer inserted them
+            '''
+            CREATE OR REPLACE FUNCTION user_cv_data_set_content_hash() RETURNS trigger AS $$
+            BEGIN
+                NEW.content_hash := encode(sha256(convert_to(NEW.data_details::jsonb::text, 'UTF8')), 'hex');
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS user_cv_data_content_hash_trigger ON user_cv_data',
+            'CREATE TRIGGER user_cv_data_content_hash_trigger BEFORE INSERT OR UPDATE OF data_details ON user_cv_data '
+            'FOR EACH ROW EXECUTE FUNCTION user_cv_data_set_content_hash()',
+            '''
+            UPDATE user_cv_data
+            SET content_hash = encode(sha256(convert_to(data_details::jsonb::text, 'UTF8')), 'hex')
+            WHERE content_hash IS NULL AND data_details IS NOT NULL
+            ''',
+            # Keep one row per duplicate group, preferring the non-archived copy
+            '''
+            DELETE FROM user_cv_data d
+            USING (
+                SELECT user_cv_data_id, row_number() OVER (
+                    PARTITION BY user_id, data_section_id, content_hash ORDER BY archive, user_cv_data_id
+                ) AS duplicate_rank
+                FROM user_cv_data
+                WHERE content_hash IS NOT NULL
+            ) ranked
+            WHERE d.user_cv_data_id = ranked.user_cv_data_id AND ranked.duplicate_rank > 1
+            ''',
+            'CREATE UNIQUE INDEX IF NOT EXISTS user_cv_data_content_hash_idx '
+            'ON user_cv_data (user_id, data_section_id, content_hash)',
+        ],
+    },
+    {
+        'version': 3,
+        'description': 'Modification timestamps and delete tombstones for user_cv_data delta sync',
+        'transactional': True,
+        'statements': [
+            # Existing rows get the migration time, which makes every client do one full resync
+            'ALTER TABLE user_cv_data ADD COLUMN IF NOT EXISTS created_at timestamp DEFAULT CURRENT_TIMESTAMP',
+            'ALTER TABLE user_cv_data ADD COLUMN IF NOT EXISTS updated_at timestamp DEFAULT CURRENT_TIMESTAMP',
+            # getUserCVDataChanges
+            'CREATE INDEX IF NOT EXISTS user_cv_data_user_updated_idx ON user_cv_data (user_id, updated_at)',
+            '''
+            CREATE TABLE IF NOT EXISTS user_cv_data_tombstones (
+                user_cv_data_id varchar PRIMARY KEY,
+                user_id varchar,
+                data_section_id varchar,
+                deleted_at timestamp DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            'CREATE INDEX IF NOT EXISTS user_cv_data_tombstones_user_deleted_idx '
+            'ON user_cv_data_tombstones (user_id, deleted_at)',
+            # Hard deletes happen in several places (deleteUserCVSectionData, deleteSectionCVData, the
+            # replace mode of addBatchedUserCVData, deleteArchivedData), so they are recorded by a trigger
+            '''
+            CREATE OR REPLACE FUNCTION user_cv_data_record_tombstones() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO user_cv_data_tombstones (user_cv_data_id, user_id, data_section_id, deleted_at)
+                SELECT user_cv_data_id, user_id, data_section_id, CURRENT_TIMESTAMP FROM deleted_rows
+                ON CONFLICT (user_cv_data_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS user_cv_data_tombstone_trigger ON user_cv_data',
+            'CREATE TRIGGER user_cv_data_tombstone_trigger AFTER DELETE ON user_cv_data '
+            'REFERENCING OLD TABLE AS deleted_rows FOR EACH STATEMENT EXECUTE FUNCTION user_cv_data_record_tombstones()',
+        ],
+    },
+    {
+        'version': 4,
+        'description': 'Indexes for the department and faculty scoped user_cv_data reads',
+        'transactional': False,
+        'statements': [
+            # getDepartmentCVData, getFacultyWideCVData
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS users_primary_department_idx ON users (primary_department)',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS users_primary_faculty_idx ON users (primary_faculty)',
+            # Keyset pagination on user_cv_data_id within a section
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS user_cv_data_section_id_active_idx '
+            'ON user_cv_data (data_section_id, user_cv_data_id) WHERE archive = false',
+        ],
+    },
+    {
+        'version': 5,
+        'description': 'Keyset pagination and trigram search indexes for audit_view',
+        'transactional': False,
+        'statements': [
+            # getAuditView pages on (ts, log_view_id), optionally filtered by user or action
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_view_ts_idx ON audit_view (ts, log_view_id)',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_view_user_ts_idx '
+            'ON audit_view (logged_user_id, ts, log_view_id)',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_view_action_ts_idx '
+            'ON audit_view (logged_user_action, ts, log_view_id)',
+            # The name and email filters are ILIKE '%...%', which only trigram indexes can serve
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_view_email_trgm_idx '
+            'ON audit_view USING gin (logged_user_email gin_trgm_ops)',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_view_first_name_trgm_idx '
+            'ON audit_view USING gin (logged_user_first_name gin_trgm_ops)',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_view_last_name_trgm_idx '
+            'ON audit_view USING gin (logged_user_last_name gin_trgm_ops)',
+        ],
+    },
+    {
+        'version': 6,
+        'description': 'Monthly range partitioning of audit_view on ts',
+        'transactional': True,
+        'statements': [
+            # Creates the partition holding the given month, used here and by maintainAuditViewPartitions
+            '''
+            CREATE OR REPLACE FUNCTION create_audit_view_partition(month date) RETURNS text AS $$
+            DECLARE
+                month_start date := date_trunc('month', month)::date;
+                partition_name text := 'audit_view_' || to_char(month_start, '"y"YYYY"m"MM');
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_view FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, (month_start + interval '1 month')::date
+                );
+                RETURN partition_name;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'ALTER TABLE audit_view RENAME TO audit_view_unpartitioned',
+            'CREATE TABLE audit_view (LIKE audit_view_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (ts)',
+            'ALTER TABLE audit_view ALTER COLUMN ts SET DEFAULT CURRENT_TIMESTAMP',
+            'ALTER TABLE audit_view ALTER COLUMN ts SET NOT NULL',
+            # The primary key of a partitioned table has to include the partition key
+            'ALTER TABLE audit_view ADD PRIMARY KEY (log_view_id, ts)',
+            # Rows outside every monthly partition (e.g. far future timestamps) still have somewhere to go
+            'CREATE TABLE audit_view_default PARTITION OF audit_view DEFAULT',
+            '''
+            DO $$
+            DECLARE
+                month date;
+            BEGIN
+                FOR month IN
+                    SELECT generate_series(
+                        date_trunc('month', coalesce((SELECT min(ts) FROM audit_view_unpartitioned), CURRENT_TIMESTAMP)),
+                        date_trunc('month', CURRENT_TIMESTAMP + interval '3 months'),
+                        interval '1 month'
+                    )::date
+                LOOP
+                    PERFORM create_audit_view_partition(month);
+                END LOOP;
+            END;
+            $$
+            ''',
+            # ts was nullable before, such rows are kept in the default partition
+            "UPDATE audit_view_unpartitioned SET ts = 'epoch' WHERE ts IS NULL",
+            'INSERT INTO audit_view SELECT * FROM audit_view_unpartitioned',
+            'ALTER SEQUENCE audit_view_log_view_id_seq OWNED BY audit_view.log_view_id',
+            'DROP TABLE audit_view_unpartitioned',
+            # The migration 5 indexes went away with the old table, recreate them on the partitioned one
+            'CREATE INDEX IF NOT EXISTS audit_view_ts_idx ON audit_view (ts, log_view_id)',
+            'CREATE INDEX IF NOT EXISTS audit_view_user_ts_idx ON audit_view (logged_user_id, ts, log_view_id)',
+            'CREATE INDEX IF NOT EXISTS audit_view_action_ts_idx ON audit_view (logged_user_action, ts, log_view_id)',
+            'CREATE INDEX IF NOT EXISTS audit_view_email_trgm_idx '
+            'ON audit_view USING gin (logged_user_email gin_trgm_ops)',
+            'CREATE INDEX IF NOT EXISTS audit_view_first_name_trgm_idx '
+            'ON audit_view USING gin (logged_user_first_name gin_trgm_ops)',
+            'CREATE INDEX IF NOT EXISTS audit_view_last_name_trgm_idx '
+            'ON audit_view USING gin (logged_user_last_name gin_trgm_ops)',
+        ],
+    },
+    {
+        'version': 7,
+        'description': 'Normalized name key columns for grant, RISE and patent matching',
+        'transactional': True,
+        'statements': [
+            # The ETL jobs fill these with the first token of the name, passed through unidecode and lowercased.
+            # unaccent folds Latin accents the same way, which is close enough for the rows loaded before
+            'CREATE EXTENSION IF NOT EXISTS unaccent',
+            'ALTER TABLE grants ADD COLUMN IF NOT EXISTS first_name_key varchar',
+            'ALTER TABLE grants ADD COLUMN IF NOT EXISTS last_name_key varchar',
+            'ALTER TABLE rise_data ADD COLUMN IF NOT EXISTS first_name_key varchar',
+            'ALTER TABLE rise_data ADD COLUMN IF NOT EXISTS last_name_key varchar',
+            'ALTER TABLE patents ADD COLUMN IF NOT EXISTS first_name_key varchar',
+            'ALTER TABLE patents ADD COLUMN IF NOT EXISTS last_name_key varchar',
+            *[
+                f'''
+                UPDATE {table} SET
+                    first_name_key = nullif(lower(unaccent((regexp_split_to_array(btrim(first_name), '\\s+'))[1])), ''),
+                    last_name_key = nullif(lower(unaccent((regexp_split_to_array(btrim(last_name), '\\s+'))[1])), '')
+                WHERE first_name_key IS NULL AND last_name_key IS NULL
+                '''
+                for table in ('grants', 'rise_data', 'patents')
+            ],
+        ],
+    },
+    {
+        'version': 9,
+        'description': 'Phonetic surname blocking indexes for fuzzy grant, RISE and patent matching',
+        'transactional': False,
+        'statements': [
+            # nameMatching blocks candidates on the soundex code of the first and last part of hyphenated surnames
+            'CREATE EXTENSION IF NOT EXISTS fuzzystrmatch',
+            *[
+                statement
+                for table in ('grants', 'rise_data', 'patents')
+                for statement in (
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_surname_first_soundex_idx "
+                    f"ON {table} (soundex(split_part(last_name_key, '-', 1)))",
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_surname_last_soundex_idx "
+                    f"ON {table} (soundex(regexp_replace(last_name_key, '^.*-', '')))",
+                )
+            ],
+        ],
+    },
+    {
+        'version': 10,
+        'description': 'Precomputed matches between users and grant, RISE and patent records',
+        'transactional': True,
+        'statements': [
+            # source is the matched table, record_id its primary key
+            '''
+            CREATE TABLE IF NOT EXISTS external_record_matches (
+                user_id varchar NOT NULL,
+                source varchar NOT NULL,
+                record_id varchar NOT NULL,
+                confidence real NOT NULL,
+                matched_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, source, record_id)
+            )
+            ''',
+            # The name and department a user's matches were last computed for, and when they last viewed them
+            '''
+            CREATE TABLE IF NOT EXISTS external_match_state (
+                user_id varchar NOT NULL,
+                source varchar NOT NULL,
+                first_name varchar,
+                last_name varchar,
+                primary_department varchar,
+                refreshed_at timestamp,
+                visited_at timestamp,
+                PRIMARY KEY (user_id, source)
+            )
+            ''',
+        ],
+    },
+    {
+        'version': 11,
+        'description': 'Template version, incremented by updateTemplate and compared by cvIsUpToDate',
+        'transactional': True,
+        'statements': [
+            'ALTER TABLE templates ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1',
+        ],
+    },
+    {
+        'version': 12,
+        'description': 'Registry of the CV PDFs in the CV bucket',
+        'transactional': True,
+        'statements': [
+            # Written by registerGeneratedCV on S3 events, checked against the bucket by reconcileGeneratedCVs
+            '''
+            CREATE TABLE IF NOT EXISTS generated_cvs (
+                user_id varchar NOT NULL,
+                template_id varchar NOT NULL,
+                cognito_user_id varchar NOT NULL,
+                generated_at timestamp NOT NULL,
+                PRIMARY KEY (user_id, template_id)
+            )
+            ''',
+        ],
+    },
+    {
+        'version': 13,
+        'description': 'Index for the secondary department filter of getNumberOfGeneratedCVs',
+        'transactional': False,
+        'statements': [
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS users_secondary_department_idx ON users (secondary_department)',
+        ],
+    },
+    {
+        'version': 14,
+        'description': 'Transaction ids of user_cv_data writes and deletes for the getUserCVDataChanges watermark',
+        'transactional': True,
+        'statements': [
+            # Rows written before this migration keep NULL, clients holding a timestamp watermark resync once
+            'ALTER TABLE user_cv_data ADD COLUMN IF NOT EXISTS updated_xid xid8',
+            '''
+            CREATE OR REPLACE FUNCTION user_cv_data_set_updated_xid() RETURNS trigger AS $$
+            BEGIN
+                NEW.updated_xid := pg_current_xact_id();
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'DROP TRIGGER IF EXISTS user_cv_data_updated_xid_trigger ON user_cv_data',
+            'CREATE TRIGGER user_cv_data_updated_xid_trigger BEFORE INSERT OR UPDATE ON user_cv_data '
+            'FOR EACH ROW EXECUTE FUNCTION user_cv_data_set_updated_xid()',
+            'CREATE INDEX IF NOT EXISTS user_cv_data_user_updated_xid_idx ON user_cv_data (user_id, updated_xid)',
+            'ALTER TABLE user_cv_data_tombstones ADD COLUMN IF NOT EXISTS deleted_xid xid8',
+            '''
+            CREATE OR REPLACE FUNCTION user_cv_data_record_tombstones() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO user_cv_data_tombstones (user_cv_data_id, user_id, data_section_id, deleted_at, deleted_xid)
+                SELECT user_cv_data_id, user_id, data_section_id, CURRENT_TIMESTAMP, pg_current_xact_id() FROM deleted_rows
+                ON CONFLICT (user_cv_data_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at, deleted_xid = EXCLUDED.deleted_xid;
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            ''',
+            'CREATE INDEX IF NOT EXISTS user_cv_data_tombstones_user_deleted_xid_idx '
+            'ON user_cv_data_tombstones (user_id, deleted_xid)',
+        ],
+    },
+    {
+        'version': 15,
+        'description': 'Template update time, set by updateTemplate and compared by cvIsUpToDate',
+        'transactional': True,
+        'statements': [
+            # With a time zone so its epoch compares with the LastModified time of the generated PDF
+            'ALTER TABLE templates ADD COLUMN IF NOT EXISTS updated_at timestamptz',
+        ],
+    },
+    {
+        'version': 16,
+        'description': 'Drop the unused grant, RISE and patent name key indexes',
+        'transactional': False,
+        'statements': [
+            # Created by migration 8, which was removed. The matches are blocked on the soundex indexes of
+            # migration 9, so nothing reads these and they only slow down the ETL inserts.
+            'DROP INDEX CONCURRENTLY IF EXISTS grants_name_key_idx',
+            'DROP INDEX CONCURRENTLY IF EXISTS rise_data_name_key_idx',
+            'DROP INDEX CONCURRENTLY IF EXISTS patents_name_key_idx',
+        ],
+    },
+]
+
+def createMigrationsTable(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version int PRIMARY KEY,
+            description varchar,
+            applied_at timestamp DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def getAppliedVersions(cursor):
+    cursor.execute('SELECT version FROM schema_migrations')
+    return set(row[0] for row in cursor.fetchall())
+
+def dropInvalidIndexes(cursor, statements):
+    '''
+    An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind that IF NOT EXISTS would skip,
+    so drop any such leftovers before the statements are retried
+    '''
+    index_names = []
+    for statement in statements:
+        match = re.search(r'IF NOT EXISTS (\w+)', statement)
+        if match:
+            index_names.append(match.group(1))
+    if not index_names:
+        return
+    cursor.execute('''
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relname IN %s
+    ''', (tuple(index_names),))
+    for (index_name,) in cursor.fetchall():
+        print(f"Dropping invalid index {index_name}")
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}')
+
+def runMigrations(connection):
+    '''
+    Applies every migration whose version is not yet recorded in schema_migrations.
+    Returns the list of versions applied by this call.
+    '''
+    cursor = connection.cursor()
+    createMigrationsTable(cursor)
+    connection.commit()
+
+    applied = getAppliedVersions(cursor)
+    newly_applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m['version']):
+        if migration['version'] in applied:
+            continue
+        print(f"Applying migration {migration['version']}: {migration['description']}")
+        if migration.get('transactional', True):
+            for statement in migration['statements']:
+                cursor.execute(statement)
+        else:
+            connection.commit()
+            connection.autocommit = True
+            try:
+                dropInvalidIndexes(cursor, migration['statements'])
+                for statement in migration['statements']:
+                    cursor.execute(statement)
+            finally:
+                connection.autocommit = False
+        cursor.execute('INSERT INTO schema_migrations (version, description) VALUES (%s, %s)',
+                       (migration['version'], migration['description']))
+        connection.commit()
+        newly_applied.append(migration['version'])
+
+    cursor.close()
+    return newly_applied
@@ -0,0 +1,90 @@
+import boto3
+import json
+import os
+import time
+import uuid
+
+TABLE_NAME = os.environ.get('TABLE_NAME')
+BATCH_FUNCTION_NAME = os.environ.get('BATCH_FUNCTION_NAME')
+# Job records and their files are kept for this long
+JOB_RETENTION_DAYS = 30
+
+dynamodb = boto3.client("dynamodb")
+lambda_client = boto3.client("lambda")
+
+def to_job(item):
+    return {
+        'job_id': item['job_id']['S'],
+        'department': item['department']['S'],
+        'template_id': item['template_id']['S'],
+        'status': item['status']['S'],
+        'total': int(item['total']['N']),
+        'completed': int(item.get('completed', {}).get('N', '0')),
+        'failed': int(item.get('failed', {}).get('N', '0')),
+        'failed_user_ids': [user_id['S'] for user_id in item.get('failed_user_ids', {}).get('L', [])],
+        'created_at': int(item['created_at']['N']),
+        'updated_at': int(item['updated_at']['N']),
+    }
+
+def createCVBatchJob(arguments):
+    """
+    Creates a PENDING job for the users. Their HTML is then uploaded to batch/<job_id>/html/<user_id>.html
+    and the job started with startCVBatchJob.
+    """
+    user_ids = list(dict.fromkeys(user_id for user_id in arguments['user_ids'] if user_id))
+    if len(user_ids) == 0:
+        raise Exception("No users to generate CVs for")
+    now = int(time.time())
+    item = {
+        'job_id': {'S': str(uuid.uuid4())},
+        'department': {'S': arguments['department']},
+        'template_id': {'S': arguments['template_id']},
+        'user_ids': {'L': [{'S': user_id} for user_id in user_ids]},
+        'status': {'S': 'PENDING'},
+        'total': {'N': str(len(user_ids))},
+        'completed': {'N': '0'},
+        'failed': {'N': '0'},
+        'created_at': {'N': str(now)},
+        'updated_at': {'N': str(now)},
+        'expires_at': {'N': str(now + JOB_RETENTION_DAYS * 24 * 3600)},
+    }
+    dynamodb.put_item(TableName=TABLE_NAME, Item=item)
+    return to_job(item)
+
+def startCVBatchJob(arguments):
+    """Starts rendering a PENDING job, a job is only ever started once"""
+    try:
+        response = dynamodb.update_item(
+            TableName=TABLE_NAME,
+            Key={'job_id': {'S': arguments['job_id']}},
+            UpdateExpression='SET #status = :running, updated_at = :now',
+            ConditionExpression='#status = :pending',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':running': {'S': 'RUNNING'},
+                ':pending': {'S': 'PENDING'},
+                ':now': {'N': str(int(time.time()))},
+            },
+            ReturnValues='ALL_NEW'
+        )
+    except dynamodb.exceptions.ConditionalCheckFailedException:
+        raise Exception("Job does not exist or was already started")
+    lambda_client.invoke(
+        FunctionName=BATCH_FUNCTION_NAME,
+        InvocationType='Event',
+        Payload=json.dumps({'job_id': arguments['job_id']})
+    )
+    return to_job(response['Attributes'])
+
+def getCVBatchJob(arguments):
+    item = dynamodb.get_item(TableName=TABLE_NAME, Key={'job_id': {'S': arguments['job_id']}}).get('Item')
+    return to_job(item) if item is not None else None
+
+def lambda_handler(event, context):
+    field_name = event['fieldName']
+    arguments = event['arguments']
+    if field_name == 'createCVBatchJob':
+        return createCVBatchJob(arguments)
+    if field_name == 'startCVBatchJob':
+        return startCVBatchJob(arguments)
+    return getCVBatchJob(arguments)
@@ -2,9 +2,12 @@ import boto3
 import psycopg2
 import os
 from datetime import datetime
+from databaseConnect import get_connection
+from cvUpdates import ALL_TEMPLATES
 
 dynamodb = boto3.client('dynamodb')
 s3 = boto3.client('s3')
+DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
 
 def get_last_modified_timestamp(bucket_name, object_key):
     try:
@@ -13,29 +16,40 @@ def get_last_modified_timestamp(bucket_name, object_key):
     except Exception as e:
         print(f"Error getting last modified timestamp: {e}")
         return None
-        
-def get_last_update_time(user_id, template_id=None):
-    toMatch = user_id
-    if template_id is not None:
-        toMatch += f"/{template_id}"
-    response = dynamodb.scan(TableName=os.environ['TABLE_NAME'], FilterExpression='contains(#keyName, :substr)', ExpressionAttributeNames={'#keyName': 'logEntryId'}, ExpressionAttributeValues={':substr': {'S': toMatch}})
-    items = response.get('Items')
-    all_items = []
-    for item in items:
-        all_items.append(item)
-    while 'LastEvaluatedKey' in response:
-        response = dynamodb.scan(TableName=os.environ['TABLE_NAME'], FilterExpression='contains(#keyName, :substr)', ExpressionAttributeNames={'#keyName': 'logEntryId'}, ExpressionAttributeValues={':substr': {'S': toMatch}}, ExclusiveStartKey=response['LastEvaluatedKey'])
-        items = response.get('Items')
-        for item in items:
-            all_items.append(item)
+
+def get_template_update_time(template_id):
+    """
+    Time the template was last changed by updateTemplate, None when it never was since updated_at exists
+    """
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    cursor.execute('SELECT extract(epoch FROM updated_at) FROM templates WHERE template_id = %s', (template_id,))
+    result = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return float(result[0]) if result is not None and result[0] is not None else None
+
+def get_last_update_time(user_id, template_id):
+    """
+    Latest change to the user's data affecting their CV for the template, from two keyed reads
+    """
+    table_name = os.environ['TABLE_NAME']
+    keys = [
+        {'user_id': {'S': user_id}, 'template_id': {'S': ALL_TEMPLATES}},
+        {'user_id': {'S': user_id}, 'template_id': {'S': template_id}},
+    ]
     timestamps = []
-    for item in items:
-        if item['logEntryId']['S'].endswith(toMatch):
-            timestamps.append(int(item['timestamp']['N']))
+    request = {table_name: {'Keys': keys, 'ProjectionExpression': '#ts', 'ExpressionAttributeNames': {'#ts': 'timestamp'}}}
+    while request:
+        response = dynamodb.batch_get_item(RequestItems=request)
+        for item in response['Responses'].get(table_name, []):
+            timestamps.append(float(item['timestamp']['N']))
+        request = response.get('UnprocessedKeys')
     if len(timestamps) == 0:
         return None
     return max(timestamps)
-  
+
 def lambda_handler(event, context):
     template_id = event['arguments']['template_id']
     cognito_user_id = event['arguments']['cognito_user_id']
@@ -43,31 +57,16 @@ def lambda_handler(event, context):
     # First get the timestamp of when the last PDF was generated
     last_modified_timestamp = get_last_modified_timestamp(os.environ['BUCKET_NAME'], f"{cognito_user_id}/{user_id}/{template_id}/resume.pdf")
     if last_modified_timestamp is None:
+        # The PDF has not been generated yet
         return False
-    # Then get the timestamp of last update from DynamoDB
-    # First check the key cognito_user_id (for changes to the CV headers)
-    dynamodb_item_user = get_last_update_time(user_id)
-    if dynamodb_item_user is None:
-        # If last_modified_timestamp is None, then the PDF has not been generated yet, so we can generate it
-        if last_modified_timestamp is None:
-            return False
-    else:        
-        dynamodb_timestamp = dynamodb_item_user
-        if dynamodb_timestamp > last_modified_timestamp:
-            return False
-    
-    dynamodb_item_template = get_last_update_time(user_id, template_id)
-    if dynamodb_item_template is None:
-        # If last_modified_timestamp is None, then the PDF has not been generated yet, so we can generate it
-        if last_modified_timestamp is None:
-            return False
-        else:
-            # In this case, the PDF has been generated for the first time, there is no dynamoDB log yet, so there have been no updates
-            return True
-    dynamodb_timestamp = dynamodb_item_template
-    print(f"Comparing: {dynamodb_timestamp} and {last_modified_timestamp}")
-    # Compare the two timestamps
-    if dynamodb_timestamp <= last_modified_timestamp:
-        return True
-    else:
+    # The template was updated after the PDF was generated
+    template_update_timestamp = get_template_update_time(template_id)
+    if template_update_timestamp is not None and template_update_timestamp > last_modified_timestamp:
         return False
+    # Then get the timestamp of the last change to the user's data or this CV from DynamoDB
+    last_update_timestamp = get_last_update_time(user_id, template_id)
+    if last_update_timestamp is None:
+        # Nothing was changed since the table was created
+        return True
+    print(f"Comparing: {last_update_timestamp} and {last_modified_timestamp}")
+    return last_update_timestamp <= last_modified_timestamp
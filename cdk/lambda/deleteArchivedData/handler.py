@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+# Must match getUserCVDataChanges, clients that last synced before this need a full resync
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', '90'))
 
 def deleteArchivedData():
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
@@ -22,6 +24,12 @@ def deleteArchivedData():
     WHERE archive = true AND archive_timestamp < %s
     """
     cursor.execute(delete_query, (one_month_ago,))
+
+    # The delete above leaves tombstones behind, drop the ones no client can still ask for
+    cursor.execute(
+        "DELETE FROM user_cv_data_tombstones WHERE deleted_at < %s",
+        (datetime.now() - timedelta(days=TOMBSTONE_RETENTION_DAYS),)
+    )
     
     cursor.close()
     connection.commit()
@@ -3,6 +3,7 @@ import json
 import psycopg2
 import os
 from databaseConnect import get_connection
+from cvUpdates import recordCVUpdate
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
@@ -11,11 +12,13 @@ def deleteUserCVSectionData(arguments):
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
     print("Connected to Database")
     cursor = connection.cursor()
+    # Deleted ids are recorded in user_cv_data_tombstones by trigger, for getUserCVDataChanges
     cursor.execute("DELETE FROM user_cv_data WHERE user_id = %s AND data_section_id = %s"
                    , (arguments['user_id'], arguments['data_section_id']))
     cursor.close()
     connection.commit()
     connection.close()
+    recordCVUpdate(arguments['user_id'])
     return "SUCCESS"
 
 def lambda_handler(event, context):
@@ -0,0 +1,72 @@
+import boto3
+import json
+import psycopg2
+import psycopg2.extras as extras
+import os
+from databaseConnect import get_connection
+
+sm_client = boto3.client('secretsmanager')
+DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+
+AUDIT_VIEW_COLUMNS = [
+    'ts', 'logged_user_id', 'logged_user_first_name', 'logged_user_last_name', 'ip',
+    'browser_version', 'page', 'session_id', 'assistant',
+    'profile_record', 'logged_user_role', 'logged_user_email', 'logged_user_action'
+]
+
+def parseAuditRecord(body):
+    """
+    Returns the audit record queued by addAuditView, which always writes every column, ts included.
+    Raises ValueError for anything else.
+    """
+    record = json.loads(body)
+    if not isinstance(record, dict):
+        raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+    missing = [column for column in AUDIT_VIEW_COLUMNS if column not in record]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if record['ts'] is None:
+        raise ValueError("ts is null")
+    return record
+
+def insertAuditRecords(cursor, records):
+    """
+    Writes all records with a single multi-row INSERT
+    """
+    values = [tuple(record.get(column) for column in AUDIT_VIEW_COLUMNS) for record in records]
+    extras.execute_values(
+        cursor,
+        f"INSERT INTO audit_view ({', '.join(AUDIT_VIEW_COLUMNS)}) VALUES %s",
+        values,
+        page_size=len(values)
+    )
+
+def flushAuditView(event):
+    """
+    Consumes a batch of audit events queued by addAuditView. Messages that are not a complete audit
+    record are reported as failed so SQS moves them to the dead letter queue instead of retrying the whole batch.
+    If the insert itself fails the batch is retried as a whole.
+    """
+    records = []
+    failures = []
+    for message in event.get('Records', []):
+        try:
+            records.append(parseAuditRecord(message['body']))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping malformed audit event {message.get('messageId')}: {e}")
+            failures.append({'itemIdentifier': message.get('messageId')})
+
+    if records:
+        connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+        print("Connected to Database")
+        cursor = connection.cursor()
+        insertAuditRecords(cursor, records)
+        connection.commit()
+        cursor.close()
+        connection.close()
+    print(f"Flushed {len(records)} audit event(s)")
+
+    return {'batchItemFailures': failures}
+
+def lambda_handler(event, context):
+    return flushAuditView(event)
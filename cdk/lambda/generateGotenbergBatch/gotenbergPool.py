@@ -0,0 +1,98 @@
+'''
+Renders many HTML documents with Gotenberg from a fixed number of worker threads. Each worker keeps a
+single HTTP/1.1 connection to Gotenberg open for all of its renders instead of connecting once per document.
+Makes no AWS calls, so scripts/load_test_batch_generation.py can run it without AWS.
+'''
+import http.client
+import queue
+import threading
+from gotenbergCommon import GOTENBERG_HTML_PATH, MULTIPART_CONTENT_TYPE, multipart_stream
+
+class GotenbergError(Exception):
+    pass
+
+class GotenbergClient:
+    """Keep-alive connection to Gotenberg, reopened when the server or the load balancer closes it"""
+
+    def __init__(self, host, port=80, timeout=60):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection = None
+        self.connections_opened = 0
+
+    def convert(self, html_content):
+        # The HTML is already in memory, so the body is sent in one piece with a Content-Length
+        body = b"".join(multipart_stream([("index.html", "text/html", [html_content])]))
+        headers = {"Content-Type": MULTIPART_CONTENT_TYPE}
+        # An idle connection may have been closed on the other side, the render is retried once on a new one
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self.connections_opened += 1
+            try:
+                self.connection.request("POST", GOTENBERG_HTML_PATH, body=body, headers=headers)
+                response = self.connection.getresponse()
+                pdf_bytes = response.read()
+            except (http.client.HTTPException, OSError):
+                self.close()
+                if attempt == 1:
+                    raise
+                continue
+            if response.will_close:
+                self.close()
+            if response.status != 200:
+                raise GotenbergError(f"Gotenberg conversion failed: {response.status} "
+                                     f"{pdf_bytes.decode('utf-8', errors='ignore')[:500]}")
+            return pdf_bytes
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+def render_all(items, handle, host, max_workers, port=80, should_continue=None):
+    """
+    Calls handle(client, item) for every item from max_workers threads, each with its own GotenbergClient.
+    Workers stop taking items once should_continue() returns False.
+    Returns (succeeded items, [(item, error message)], items that were not started, connections opened).
+    """
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+    succeeded = []
+    failed = []
+    connections = []
+    lock = threading.Lock()
+
+    def work():
+        client = GotenbergClient(host, port)
+        try:
+            while should_continue is None or should_continue():
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    handle(client, item)
+                    with lock:
+                        succeeded.append(item)
+                except Exception as e:
+                    print(f"Rendering {item} failed: {e}")
+                    with lock:
+                        failed.append((item, str(e)))
+        finally:
+            client.close()
+            with lock:
+                connections.append(client.connections_opened)
+
+    workers = [threading.Thread(target=work) for _ in range(max(1, min(max_workers, pending.qsize())))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    remaining = []
+    while not pending.empty():
+        remaining.append(pending.get_nowait())
+    return succeeded, failed, remaining, sum(connections)
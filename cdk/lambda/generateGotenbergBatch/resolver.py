@@ -0,0 +1,143 @@
+import boto3
+import hashlib
+import json
+import os
+import time
+import traceback
+from gotenbergCommon import PDF_CACHE_PREFIX, is_pdf_cached, notify_generation_complete
+from gotenbergPool import render_all
+
+GOTENBERG_HOST = os.environ.get('GOTENBERG_HOST')
+BUCKET_NAME = os.environ.get('BUCKET_NAME')
+TABLE_NAME = os.environ.get('TABLE_NAME')
+# Renders in flight at once, across all Gotenberg tasks behind the load balancer
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '4'))
+# Stop taking new renders when less time than this is left, the rest continues in a new invocation
+TIME_BUFFER_SECONDS = 90
+
+s3_client = boto3.client("s3")
+dynamodb = boto3.client("dynamodb")
+lambda_client = boto3.client("lambda")
+
+def list_user_ids(prefix, suffix):
+    """user_ids of the batch/<job_id>/<folder>/<user_id><suffix> objects under prefix"""
+    user_ids = set()
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        for item in page.get('Contents', []):
+            name = item['Key'][len(prefix):]
+            if name.endswith(suffix) and '/' not in name:
+                user_ids.add(name[:-len(suffix)])
+    return user_ids
+
+def update_job(job_id, expression, values, names=None):
+    arguments = {
+        'TableName': TABLE_NAME,
+        'Key': {'job_id': {'S': job_id}},
+        'UpdateExpression': expression,
+        'ExpressionAttributeValues': values,
+    }
+    if names:
+        arguments['ExpressionAttributeNames'] = names
+    dynamodb.update_item(**arguments)
+
+def render_user(client, job_id, user_id):
+    """Renders one user's uploaded HTML to batch/<job_id>/pdf/<user_id>.pdf, reusing cached renders"""
+    html_obj = s3_client.get_object(Bucket=BUCKET_NAME, Key=f"batch/{job_id}/html/{user_id}.html")
+    html_content = html_obj['Body'].read()
+    pdf_key = f"batch/{job_id}/pdf/{user_id}.pdf"
+
+    cache_key = PDF_CACHE_PREFIX + hashlib.sha256(html_content).hexdigest()
+    if is_pdf_cached(s3_client, BUCKET_NAME, cache_key):
+        s3_client.copy_object(
+            Bucket=BUCKET_NAME,
+            Key=pdf_key,
+            CopySource={"Bucket": BUCKET_NAME, "Key": cache_key},
+            ContentType="application/pdf",
+            MetadataDirective="REPLACE",
+            TaggingDirective="REPLACE"
+        )
+    else:
+        pdf_bytes = client.convert(html_content)
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=cache_key, Body=pdf_bytes, ContentType="application/pdf")
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=pdf_key, Body=pdf_bytes, ContentType="application/pdf")
+
+    update_job(job_id, 'ADD completed :one SET updated_at = :now', {
+        ':one': {'N': '1'},
+        ':now': {'N': str(int(time.time()))},
+    })
+
+def generateGotenbergBatch(job_id, context):
+    """
+    Renders every HTML uploaded for the batch job that has no PDF yet. When the invocation runs out of time
+    the remaining users continue in a new asynchronous invocation, the completion notification for
+    batch/<job_id> is only sent once all users are done.
+    """
+    job = dynamodb.get_item(TableName=TABLE_NAME, Key={'job_id': {'S': job_id}}, ConsistentRead=True).get('Item')
+    if job is None:
+        print(f"Batch job {job_id} not found")
+        return {"status": "ERROR", "message": "Job not found"}
+
+    expected = set(item['S'] for item in job['user_ids']['L'])
+    already_failed = set(item['S'] for item in job.get('failed_user_ids', {}).get('L', []))
+    uploaded = list_user_ids(f"batch/{job_id}/html/", ".html") & expected
+    rendered = list_user_ids(f"batch/{job_id}/pdf/", ".pdf")
+    # Users whose HTML never arrived fail once, on the first invocation
+    missing = sorted(expected - uploaded - already_failed)
+    to_render = sorted(uploaded - rendered - already_failed)
+    print(f"Batch job {job_id}: {len(to_render)} to render, {len(rendered)} already rendered, {len(missing)} without HTML")
+
+    deadline = time.time() + context.get_remaining_time_in_millis() / 1000.0 - TIME_BUFFER_SECONDS
+    start = time.time()
+    succeeded, failed, remaining, connections = render_all(
+        to_render,
+        lambda client, user_id: render_user(client, job_id, user_id),
+        GOTENBERG_HOST,
+        MAX_WORKERS,
+        should_continue=lambda: time.time() < deadline
+    )
+    elapsed = time.time() - start
+    print(f"Rendered {len(succeeded)} and failed {len(failed)} in {elapsed:.1f}s "
+          f"over {connections} connections with {MAX_WORKERS} workers")
+
+    failed_user_ids = missing + [user_id for user_id, error in failed]
+    if failed_user_ids:
+        update_job(job_id, 'ADD failed :count SET failed_user_ids = list_append(if_not_exists(failed_user_ids, :empty), :ids), updated_at = :now', {
+            ':count': {'N': str(len(failed_user_ids))},
+            ':empty': {'L': []},
+            ':ids': {'L': [{'S': user_id} for user_id in failed_user_ids]},
+            ':now': {'N': str(int(time.time()))},
+        })
+
+    if remaining:
+        print(f"{len(remaining)} renders left, continuing in a new invocation")
+        lambda_client.invoke(
+            FunctionName=context.function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'job_id': job_id})
+        )
+        return {"status": "RUNNING", "remaining": len(remaining)}
+
+    has_errors = len(already_failed) + len(failed_user_ids) > 0
+    status = 'COMPLETE_WITH_ERRORS' if has_errors else 'COMPLETE'
+    update_job(job_id, 'SET #status = :status, updated_at = :now', {
+        ':status': {'S': status},
+        ':now': {'N': str(int(time.time()))},
+    }, names={'#status': 'status'})
+    notify_generation_complete(f"batch/{job_id}")
+    return {"status": status}
+
+def lambda_handler(event, context):
+    job_id = event['job_id']
+    try:
+        return generateGotenbergBatch(job_id, context)
+    except Exception as e:
+        print("==== Exception Occurred ====")
+        traceback.print_exc()
+        update_job(job_id, 'SET #status = :status, #error = :error, updated_at = :now', {
+            ':status': {'S': 'ERROR'},
+            ':error': {'S': str(e)[:1000]},
+            ':now': {'N': str(int(time.time()))},
+        }, names={'#status': 'status', '#error': 'error'})
+        notify_generation_complete(f"batch/{job_id}")
+        return {"status": "ERROR", "message": str(e)}
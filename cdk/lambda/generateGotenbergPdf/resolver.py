@@ -1,72 +1,58 @@
 import boto3
 import base64
+import hashlib
 import http.client
 import traceback
 import os
-import json
-import urllib.request
+import resource
 from urllib.parse import unquote_plus
-from botocore.auth import SigV4Auth
-from botocore.awsrequest import AWSRequest
 import signal
+from gotenbergCommon import (
+    GOTENBERG_HTML_PATH, MULTIPART_CONTENT_TYPE, PDF_CACHE_PREFIX,
+    multipart_stream, is_pdf_cached, notify_generation_complete
+)
 
 GOTENBERG_HOST = os.environ.get('GOTENBERG_HOST')
-GOTENBERG_PATH = "/forms/chromium/convert/html"
-FIXED_BOUNDARY = "----WebKitFormBoundary123456"
-APPSYNC_ENDPOINT = os.environ.get('APPSYNC_ENDPOINT')
+# HTML is streamed to Gotenberg and the PDF to S3 in pieces of this size, at least the 5 MiB S3 multipart minimum
+STREAM_CHUNK_SIZE = 8 * 1024 * 1024
 
 s3_client = boto3.client("s3")
 
-def notify_generation_complete(pdf_key):
-    """Call the GraphQL mutation to notify that generation is complete"""
+def log_peak_rss():
+    """Logs the peak resident memory of the Lambda process, to size the function's memory"""
+    # ru_maxrss is in kilobytes on Linux, and covers earlier invocations of a warm container
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+def stream_to_s3(stream, bucket_name, key):
+    """Uploads a readable stream to S3 as a multipart upload, holding one part in memory at a time"""
+    upload = s3_client.create_multipart_upload(Bucket=bucket_name, Key=key, ContentType="application/pdf")
+    parts = []
+    size = 0
     try:
-        mutation = """
-        mutation NotifyComplete($key: String!) {
-            notifyGotenbergGenerationComplete(key: $key) {
-                key
-            }
-        }
-        """
-        
-        payload = {
-            "query": mutation,
-            "variables": {
-                "key": pdf_key
-            }
-        }
-        
-        # Use IAM authentication instead of API key
-        session = boto3.Session()
-        credentials = session.get_credentials()
-        region = session.region_name or 'ca-central-1'
-        
-        # Create the request
-        data = json.dumps(payload)
-        request = AWSRequest(
-            method='POST',
-            url=APPSYNC_ENDPOINT,
-            data=data,
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        # Sign the request with IAM credentials
-        SigV4Auth(credentials, 'appsync', region).add_auth(request)
-        
-        # Make the request using urllib
-        req = urllib.request.Request(
-            APPSYNC_ENDPOINT, 
-            data=data.encode('utf-8'), 
-            headers=dict(request.headers), 
-            method='POST'
+        while True:
+            # HTTPResponse.read(n) can return less than n bytes, parts other than the last must be full size
+            chunk = bytearray()
+            while len(chunk) < STREAM_CHUNK_SIZE:
+                data = stream.read(STREAM_CHUNK_SIZE - len(chunk))
+                if not data:
+                    break
+                chunk += data
+            if not chunk and parts:
+                break
+            part = s3_client.upload_part(
+                Bucket=bucket_name, Key=key, UploadId=upload['UploadId'], PartNumber=len(parts) + 1, Body=bytes(chunk)
+            )
+            parts.append({'PartNumber': len(parts) + 1, 'ETag': part['ETag']})
+            size += len(chunk)
+            if len(chunk) < STREAM_CHUNK_SIZE:
+                break
+        s3_client.complete_multipart_upload(
+            Bucket=bucket_name, Key=key, UploadId=upload['UploadId'], MultipartUpload={'Parts': parts}
         )
-        
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            print(f"Notification sent successfully: {result}")
-            
-    except Exception as e:
-        print(f"Failed to send notification: {str(e)}")
-        # Don't fail the entire function if notification fails
+    except Exception:
+        s3_client.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload['UploadId'])
+        raise
+    return size
 
 def timeout_handler(signum, frame):
     raise TimeoutError("Lambda function timed out")
@@ -101,41 +87,53 @@ def lambda_handler(event, context):
             }
         )
 
-        # Read HTML file from S3
+        # Hash the HTML file without holding it in memory
         html_obj = s3_client.get_object(Bucket=bucket_name, Key=html_key)
-        html_content = html_obj['Body'].read()
-        print(f"Read HTML content, size: {len(html_content)} bytes")
-
-        # Prepare multipart/form-data body for Gotenberg
-        body = (
-            f"--{FIXED_BOUNDARY}\r\n"
-            f'Content-Disposition: form-data; name="files"; filename="index.html"\r\n'
-            f"Content-Type: text/html\r\n\r\n"
-        ).encode("utf-8") + html_content + f"\r\n--{FIXED_BOUNDARY}--\r\n".encode("utf-8")
-
-        headers = {
-            "Content-Type": f"multipart/form-data; boundary={FIXED_BOUNDARY}"
-        }
+        html_hash = hashlib.sha256()
+        for chunk in html_obj['Body'].iter_chunks(STREAM_CHUNK_SIZE):
+            html_hash.update(chunk)
+        print(f"Read HTML content, size: {html_obj['ContentLength']} bytes")
 
         # Construct PDF path using new flat format
         filename = html_key.split("/")[-1].rsplit(".", 1)[0]  # usernameTemplateID
         pdf_key = f"pdf/{filename}.pdf"
 
-        # Send request to Gotenberg
-        conn = http.client.HTTPConnection(GOTENBERG_HOST, 80, timeout=60)
-        conn.request("POST", GOTENBERG_PATH, body=body, headers=headers)
-        response = conn.getresponse()
-        pdf_bytes = response.read()
-
-        if response.status != 200:
-            print("Gotenberg error body:", pdf_bytes.decode("utf-8", errors="ignore"))
-            raise Exception(f"Gotenberg conversion failed: {response.status}")
-
-        print(f"Saving PDF to s3://{bucket_name}/{pdf_key}")
-
-        # Upload PDF back to S3
-        s3_client.put_object(Bucket=bucket_name, Key=pdf_key, Body=pdf_bytes, ContentType="application/pdf")
-        print("PDF uploaded successfully!")
+        # Identical HTML always renders to the same PDF, so a previous render is reused as is
+        cache_key = PDF_CACHE_PREFIX + html_hash.hexdigest()
+        if is_pdf_cached(s3_client, bucket_name, cache_key):
+            print(f"Cache hit, copying s3://{bucket_name}/{cache_key} to {pdf_key}")
+        else:
+            # Stream the same version of the HTML into the request, a newer upload triggers its own render
+            html_obj = s3_client.get_object(Bucket=bucket_name, Key=html_key, IfMatch=html_obj['ETag'])
+
+            # Send request to Gotenberg with chunked transfer encoding
+            conn = http.client.HTTPConnection(GOTENBERG_HOST, 80, timeout=60)
+            # The HTML is read from S3 piece by piece while the request is sent
+            body = multipart_stream([("index.html", "text/html", html_obj['Body'].iter_chunks(STREAM_CHUNK_SIZE))])
+            conn.request("POST", GOTENBERG_HTML_PATH, body=body, headers={
+                "Content-Type": MULTIPART_CONTENT_TYPE
+            }, encode_chunked=True)
+            response = conn.getresponse()
+
+            if response.status != 200:
+                print("Gotenberg error body:", response.read().decode("utf-8", errors="ignore"))
+                raise Exception(f"Gotenberg conversion failed: {response.status}")
+
+            # The upload runs while Gotenberg is still sending the PDF
+            print(f"Saving PDF to s3://{bucket_name}/{cache_key}")
+            pdf_size = stream_to_s3(response, bucket_name, cache_key)
+            conn.close()
+            print(f"PDF uploaded successfully! size: {pdf_size} bytes")
+
+        # The cached PDF is copied to the key the frontend reads, server side
+        s3_client.copy_object(
+            Bucket=bucket_name,
+            Key=pdf_key,
+            CopySource={"Bucket": bucket_name, "Key": cache_key},
+            ContentType="application/pdf",
+            MetadataDirective="REPLACE",
+            TaggingDirective="REPLACE"
+        )
 
         # Add Tag to html object
         s3_client.put_object_tagging(
@@ -150,6 +148,7 @@ def lambda_handler(event, context):
 
         # Notify that generation is complete
         notify_generation_complete(pdf_key)
+        log_peak_rss()
 
         return {
             "status": "SUCCESS",
@@ -173,6 +172,7 @@ def lambda_handler(event, context):
         )
 
         notify_generation_complete(pdf_key)
+        log_peak_rss()
 
         return {
             "status": "ERROR",
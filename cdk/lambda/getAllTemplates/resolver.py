@@ -11,7 +11,7 @@ def getAllTemplates(arguments):
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
     print("Connected to Database")
     cursor = connection.cursor()
-    cursor.execute('SELECT template_id, title, template_structure, start_year, end_year FROM templates')
+    cursor.execute('SELECT template_id, title, template_structure, start_year, end_year, version FROM templates')
     results = cursor.fetchall()
     cursor.close()
     connection.close()
@@ -32,7 +32,8 @@ def getAllTemplates(arguments):
             'title': result[1],
             'template_structure': json.loads(result[2]),
             'start_year': result[3],
-            'end_year': result[4]
+            'end_year': result[4],
+            'version': result[5]
         })
     return templates
 
@@ -7,6 +7,27 @@ from databaseConnect import get_connection
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
 
+AUDIT_VIEW_COLUMNS = """log_view_id, ts, logged_user_id, logged_user_first_name, logged_user_last_name, ip,
+    browser_version, page, session_id, assistant, profile_record, logged_user_role, logged_user_email, logged_user_action"""
+
+def estimateCount(cursor, where_clause, params):
+    """
+    Row count estimated by the planner, without reading the matching rows
+    """
+    if not where_clause:
+        # audit_view is partitioned, its own reltuples is always -1
+        cursor.execute("""
+            SELECT coalesce(sum(greatest(c.reltuples, 0)), 0)::bigint
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'audit_view'::regclass
+        """)
+        return cursor.fetchone()[0]
+    cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM audit_view {where_clause}", tuple(params))
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
 def getAuditView(arguments, identity=None):
     
     logged_user_id = arguments.get('logged_user_id', None)
@@ -41,6 +62,7 @@ def getAuditView(arguments, identity=None):
     if arguments.get('action'):
         filters.append("logged_user_action = %s")
         params.append(arguments['action'])
+    # Date bounds are compared to ts directly so that only the matching monthly partitions are scanned
     if arguments.get('start_date'):
         filters.append("ts >= %s")
         params.append(arguments['start_date'])
@@ -48,19 +70,42 @@ def getAuditView(arguments, identity=None):
         filters.append("ts <= %s")
         params.append(arguments['end_date'])
 
+    # Keyset pagination: the cursor is the (ts, log_view_id) of the last record of the previous page
+    page_cursor = arguments.get('cursor')
+    keyset_filters = list(filters)
+    keyset_params = list(params)
+    if page_cursor:
+        cursor_ts, cursor_id = page_cursor.rsplit('|', 1)
+        # The plain ts bound lets the planner skip the partitions of later months
+        keyset_filters.append("ts <= %s AND (ts, log_view_id) < (%s, %s)")
+        keyset_params.extend([cursor_ts, cursor_ts, int(cursor_id)])
+
     where_clause = " AND ".join(filters)
     if where_clause:
         where_clause = "WHERE " + where_clause
 
-    # Get total count for pagination
-    count_query = f"SELECT COUNT(*) FROM audit_view {where_clause}"
-    cursor.execute(count_query, tuple(params))
-    total_count = cursor.fetchone()[0]
+    # Get total count for pagination: 'exact' counts the matching rows, 'estimated' uses the planner's
+    # row estimate (cheap, but can be off for selective filters), 'none' skips the count
+    count_mode = arguments.get('count_mode') or 'exact'
+    total_count = None
+    if count_mode == 'exact':
+        count_query = f"SELECT COUNT(*) FROM audit_view {where_clause}"
+        cursor.execute(count_query, tuple(params))
+        total_count = cursor.fetchone()[0]
+    elif count_mode == 'estimated':
+        total_count = estimateCount(cursor, where_clause, params)
 
     # Get paginated data
-    query = f"SELECT * FROM audit_view {where_clause} ORDER BY ts DESC LIMIT %s OFFSET %s"
-    params.extend([page_size, offset])
-    cursor.execute(query, tuple(params))
+    keyset_where_clause = " AND ".join(keyset_filters)
+    if keyset_where_clause:
+        keyset_where_clause = "WHERE " + keyset_where_clause
+    query = f"SELECT {AUDIT_VIEW_COLUMNS} FROM audit_view {keyset_where_clause} ORDER BY ts DESC, log_view_id DESC LIMIT %s"
+    keyset_params.append(page_size)
+    if not page_cursor and offset > 0:
+        # Page numbers are still accepted, but get slower the deeper the page
+        query += " OFFSET %s"
+        keyset_params.append(offset)
+    cursor.execute(query, tuple(keyset_params))
     results = cursor.fetchall()
     
     audit_view_records = []
@@ -86,9 +131,15 @@ def getAuditView(arguments, identity=None):
     cursor.close()
     connection.close()
 
+    next_cursor = None
+    if len(results) == page_size:
+        next_cursor = f"{results[-1][1].isoformat()}|{results[-1][0]}"
+
     return {
         "records": audit_view_records,
-        "total_count": total_count
+        "total_count": total_count,
+        "total_count_estimated": count_mode == 'estimated',
+        "next_cursor": next_cursor
     }
     
 def lambda_handler(event, context):
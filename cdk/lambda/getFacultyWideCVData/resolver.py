@@ -3,9 +3,11 @@ import json
 import psycopg2
 import os
 from databaseConnect import get_connection
+from cvDataAggregates import getCVDataAggregates
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
+PAGE_SIZE = 10000
 
 def filter_data_by_section(data_details, section_title):
     """Filter data_details based on section title"""
@@ -47,43 +49,52 @@ def getDepartmentCVData(arguments):
     
     if not data_section_id:
         raise ValueError("data_section_id is required")
-    
+
     if faculty == 'All':
-        cursor.execute(
-            'SELECT COUNT(*) FROM user_cv_data WHERE data_section_id = %s AND archive != true',
-            (data_section_id,)
-        )
-        total_count = cursor.fetchone()[0]
-        cursor.execute(
-            'SELECT data_section_id, data_details FROM user_cv_data WHERE data_section_id = %s AND archive != true LIMIT 10000',
-            (data_section_id,)
-        )
+        users_join, scope, scope_params = '', '', {}
     else:
-        cursor.execute(
-            'SELECT user_id FROM users WHERE primary_faculty = %s',
-            (faculty,)
-        )
-        user_ids = [row[0] for row in cursor.fetchall()]
-        if not user_ids:
-            # No users found for this faculty
-            total_count = 0
-            results = []
-        else:
-            user_ids_placeholder = ','.join(['%s'] * len(user_ids))
-            # Get total count
+        users_join = 'JOIN users u ON ucd.user_id = u.user_id'
+        scope, scope_params = 'AND u.primary_faculty = %(faculty)s', {'faculty': faculty}
+
+    if arguments.get('aggregate'):
+        aggregates = getCVDataAggregates(cursor, data_section_id, section_title, arguments.get('group_by'), scope, scope_params)
+        cursor.close()
+        connection.close()
+        return {
+            'data': [],
+            'aggregates': aggregates,
+            'total_count': sum(aggregate['count'] for aggregate in aggregates),
+            'returned_count': len(aggregates)
+        }
+
+    # One page, ordered by user_cv_data_id and starting after the cursor, so a page only reads its own rows
+    limit = arguments.get('limit') or PAGE_SIZE
+    after = arguments.get('after')
+    params = dict(scope_params, data_section_id=data_section_id, after=after, limit=limit)
+    cursor.execute(
+        f'''SELECT ucd.data_section_id, ucd.data_details, ucd.user_cv_data_id
+            FROM user_cv_data ucd
+            {users_join}
+            WHERE ucd.data_section_id = %(data_section_id)s AND ucd.archive != true {scope}
+              AND (%(after)s::varchar IS NULL OR ucd.user_cv_data_id > %(after)s)
+            ORDER BY ucd.user_cv_data_id
+            LIMIT %(limit)s''',
+        params
+    )
+    results = cursor.fetchall()
+    # The total is only counted for the first page, and only when it is not the last one
+    total_count = None
+    if after is None:
+        total_count = len(results)
+        if len(results) == limit:
             cursor.execute(
-                f'SELECT COUNT(*) FROM user_cv_data WHERE data_section_id = %s AND user_id IN ({user_ids_placeholder}) AND archive != true',
-                [data_section_id] + user_ids
+                f'''SELECT count(*)
+                    FROM user_cv_data ucd
+                    {users_join}
+                    WHERE ucd.data_section_id = %(data_section_id)s AND ucd.archive != true {scope}''',
+                params
             )
             total_count = cursor.fetchone()[0]
-            
-            # Get the actual data
-            cursor.execute(
-                f'SELECT data_section_id, data_details FROM user_cv_data WHERE data_section_id = %s AND user_id IN ({user_ids_placeholder}) AND archive != true',
-                [data_section_id] + user_ids
-            )
-        
-    results = cursor.fetchall()
     cursor.close()
     connection.close()
 
@@ -111,7 +122,8 @@ def getDepartmentCVData(arguments):
     return {
         'data': user_cv_data,
         'total_count': total_count,
-        'returned_count': len(user_cv_data)
+        'returned_count': len(user_cv_data),
+        'next_cursor': results[-1][2] if len(results) == limit else None
     }
 
 def lambda_handler(event, context):
@@ -0,0 +1,38 @@
+import boto3
+import json
+import psycopg2
+import os
+from databaseConnect import get_connection
+from nameMatching import MIN_CONFIDENCE
+
+sm_client = boto3.client('secretsmanager')
+DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
+
+# Matches added since the user last opened the matches of that source, all of them if they never did.
+# Matches are stored below MIN_CONFIDENCE for the agency signal, which is only applied when they are
+# read, so those are left out of the counts
+NEW_MATCH_COUNTS_QUERY = """
+    SELECT m.source, count(*)
+    FROM external_record_matches m
+    LEFT JOIN external_match_state s ON s.user_id = m.user_id AND s.source = m.source
+    WHERE m.user_id = %s AND m.matched_at > coalesce(s.visited_at, '-infinity') AND m.confidence >= %s
+    GROUP BY m.source
+"""
+
+def getNewExternalMatchCounts(arguments):
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    cursor.execute(NEW_MATCH_COUNTS_QUERY, (arguments['user_id'], MIN_CONFIDENCE))
+    counts = dict(cursor.fetchall())
+    cursor.close()
+    connection.close()
+
+    return {
+        'secure_funding': counts.get('grants', 0),
+        'rise_data': counts.get('rise_data', 0),
+        'patents': counts.get('patents', 0)
+    }
+
+def lambda_handler(event, context):
+    return getNewExternalMatchCounts(event['arguments'])
@@ -5,33 +5,27 @@ from databaseConnect import get_connection
 
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
 
-def filterKeysByDepartment(items, department):
+def getNumberOfGeneratedCVs(arguments):
+    '''
+    Returns the number of users with at least one generated CV, optionally only those in a department.
+    Counted from the generated_cvs registry instead of listing the CV bucket.
+    '''
+    department = arguments['department'] if 'department' in arguments else None
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
     print("Connected to Database")
     cursor = connection.cursor()
-    cursor.execute('SELECT user_id FROM users WHERE primary_department = %s OR secondary_department = %s', (department, department))
-    results = cursor.fetchall()
-    department_set = set()
-    for result in results:
-        department_set.add(result[0])
-    filtered_results = []
-    for item in items:
-        key = item['Key']
-        [cognition_id, user_id, template_id, file_name] = key.split('/')
-        if user_id in department_set:
-            filtered_results.append(item)
-    return filtered_results
-
-def getNumberOfGeneratedCVs(arguments):
-    client = boto3.client('s3')
-    response = client.list_objects_v2(Bucket=os.environ['BUCKET_NAME'])
-    usersWithCvs = set()
-    department = arguments['department'] if 'department' in arguments else None
-    filtered_results = response['Contents'] if department == None else filterKeysByDepartment(response['Contents'], department)
-    for item in filtered_results:
-        if item['Key'].endswith('.pdf'):
-            usersWithCvs.add(item['Key'][0:item['Key'].index('/')])
-    return len(usersWithCvs)
+    if department is None:
+        cursor.execute('SELECT count(DISTINCT user_id) FROM generated_cvs')
+    else:
+        cursor.execute('''
+            SELECT count(*) FROM users
+            WHERE (primary_department = %s OR secondary_department = %s)
+            AND EXISTS (SELECT 1 FROM generated_cvs WHERE generated_cvs.user_id = users.user_id)
+        ''', (department, department))
+    count = cursor.fetchone()[0]
+    cursor.close()
+    connection.close()
+    return count
 
 def lambda_handler(event, context):
-    return getNumberOfGeneratedCVs(event['arguments'])
\ No newline at end of file
+    return getNumberOfGeneratedCVs(event['arguments'])
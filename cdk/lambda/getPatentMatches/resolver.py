@@ -3,6 +3,7 @@ import json
 import psycopg2
 import os
 from databaseConnect import get_connection
+from nameMatching import findMatches, getUserMatches
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
@@ -15,14 +16,14 @@ def getPatentMatches(arguments):
     # Retrieve results with the same last name
     #cursor.execute('SELECT * FROM patents WHERE last_name = %s', (arguments['last_name'],))
     # cursor.execute('SELECT * FROM patents WHERE first_name = %s AND last_name = %s', (arguments['first_name'], arguments['last_name'],))
-    cursor.execute('''
-        SELECT * FROM patents 
-        WHERE split_part(first_name, ' ', 1) = %s 
-        AND split_part(last_name, ' ', 1) = %s
-    ''', (arguments['first_name'].split()[0], arguments['last_name'].split()[0]))
-    results_same_last = cursor.fetchall()
-    cursor.execute('SELECT COUNT(*) FROM patents')
-    count = cursor.fetchall()
+    if arguments.get('user_id'):
+        # Matches stored for the user, new records are matched by the storeEpoPatents Glue job
+        results_same_last = getUserMatches(cursor, 'patents', arguments['user_id'])
+    else:
+        # Fuzzy match on the name, patents carry no department or agency
+        results_same_last = [(result, confidence, None) for result, confidence in findMatches(
+            cursor, 'patents', arguments['first_name'], arguments['last_name']
+        )]
 
     # Retrieve results with the same first name
     # cursor.execute('SELECT * FROM patents WHERE first_name = %s', (arguments['first_name'],))
@@ -40,7 +41,7 @@ def getPatentMatches(arguments):
     # Combine results in the specified order
     matches = []
     if len(results_same_last) > 0:
-        for result in results_same_last:
+        for result, confidence, is_new in results_same_last:
             matches.append({
                 'patent_id': result[0],
                 'first_name': result[2],
@@ -55,7 +56,9 @@ def getPatentMatches(arguments):
                     'country_code': result[7],
                     'kind_code': result[8],
                     'classification': result[9]
-                }
+                },
+                'confidence': confidence,
+                'is_new': is_new
             })
 
     # if len(results_same_first) > 0:
@@ -3,6 +3,7 @@ import json
 import psycopg2
 import os
 from databaseConnect import get_connection
+from nameMatching import findMatches, getUserMatches
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
@@ -13,12 +14,15 @@ def getRiseDataMatches(arguments):
     cursor = connection.cursor()
     # Retrieve results with the same first name AND last name
     # cursor.execute('SELECT * FROM rise_data WHERE first_name = %s AND last_name = %s', (arguments['first_name'], arguments['last_name'],))
-    cursor.execute('''
-        SELECT * FROM rise_data 
-        WHERE split_part(first_name, ' ', 1) = %s 
-        AND split_part(last_name, ' ', 1) = %s
-    ''', (arguments['first_name'].split()[0], arguments['last_name'].split()[0]))
-    results_same_first_last = cursor.fetchall()
+    if arguments.get('user_id'):
+        # Matches stored for the user, new records are matched by the storeData Glue job
+        results_same_first_last = getUserMatches(cursor, 'rise_data', arguments['user_id'], agencies=arguments.get('agencies'))
+    else:
+        # Fuzzy match on the name, the user's department and the agencies they already have grants from
+        results_same_first_last = [(result, confidence, None) for result, confidence in findMatches(
+            cursor, 'rise_data', arguments['first_name'], arguments['last_name'],
+            department=arguments.get('department'), agencies=arguments.get('agencies')
+        )]
 
     # # Retrieve results with the same last name
     # cursor.execute('SELECT * FROM rise_data WHERE last_name = %s', (arguments['last_name'],))
@@ -34,7 +38,7 @@ def getRiseDataMatches(arguments):
     # Combine results in the specified order
     matches = []
     if len(results_same_first_last) > 0:
-        for result in results_same_first_last:
+        for result, confidence, is_new in results_same_first_last:
             matches.append({
                 'rise_data_id': result[0],
                 'first_name': result[1],
@@ -51,7 +55,9 @@ def getRiseDataMatches(arguments):
                     'dates': result[9],
                     'sponsor': result[10],
                     'record_id': result[11] if len(result) > 11 else None,
-                }
+                },
+                'confidence': confidence,
+                'is_new': is_new
             })
 
     # if len(results_same_last) > 0:
@@ -3,6 +3,7 @@ import json
 import psycopg2
 import os
 from databaseConnect import get_connection
+from nameMatching import findMatches, getUserMatches
 
 sm_client = boto3.client('secretsmanager')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
@@ -15,12 +16,15 @@ def getSecureFundingMatches(arguments):
     # Retrieve results with the same last name
     #cursor.execute('SELECT * FROM grants WHERE last_name = %s', (arguments['last_name'],))
     # cursor.execute('SELECT * FROM grants WHERE first_name = %s AND last_name = %s', (arguments['first_name'], arguments['last_name']))
-    cursor.execute('''
-        SELECT * FROM grants
-        WHERE split_part(first_name, ' ', 1) = %s 
-        AND split_part(last_name, ' ', 1) = %s
-    ''', (arguments['first_name'].split()[0], arguments['last_name'].split()[0]))
-    results_same_last = cursor.fetchall()
+    if arguments.get('user_id'):
+        # Matches stored for the user, new records are matched by the storeData Glue job
+        results_same_last = getUserMatches(cursor, 'grants', arguments['user_id'], agencies=arguments.get('agencies'))
+    else:
+        # Fuzzy match on the name, the user's department and the agencies they already have grants from
+        results_same_last = [(result, confidence, None) for result, confidence in findMatches(
+            cursor, 'grants', arguments['first_name'], arguments['last_name'],
+            department=arguments.get('department'), agencies=arguments.get('agencies')
+        )]
     
     # Retrieve results with the same first name
     # cursor.execute('SELECT * FROM grants WHERE first_name = %s', (arguments['first_name'],))
@@ -33,7 +37,7 @@ def getSecureFundingMatches(arguments):
     matches = []
 
     if len(results_same_last) > 0:
-        for result in results_same_last:
+        for result, confidence, is_new in results_same_last:
             matches.append({
                 'secure_funding_id': result[0],
                 'first_name': result[1],
@@ -48,7 +52,9 @@ def getSecureFundingMatches(arguments):
                     'title': result[7],
                     'amount': result[8],
                     'dates': result[9]
-                }
+                },
+                'confidence': confidence,
+                'is_new': is_new
             })
 
     # if len(results_same_first) > 0:
@@ -0,0 +1,108 @@
+import boto3
+import json
+import psycopg2
+import os
+from databaseConnect import get_connection
+
+sm_client = boto3.client('secretsmanager')
+DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
+
+'''
+Returns all of a user's non-archived CV entries grouped by section, together with the section metadata,
+in a single query. When template_id is given only the sections referenced by the template (by id or title)
+are included. The ETag is computed from section rows and entry ids/content hashes inside the database,
+and the bundle itself is only built when it differs from the ETag sent by the client.
+The resolvers store AWSJSON arguments with json.dumps, so template_structure and data_details usually hold
+a JSON string containing the object, which is unwrapped before it is read.
+'''
+BUNDLE_QUERY = """
+    WITH template_values AS (
+        SELECT DISTINCT v #>> '{{}}' AS value
+        FROM templates t, jsonb_path_query(
+            CASE WHEN jsonb_typeof(t.template_structure::jsonb) = 'string'
+                 THEN (t.template_structure::jsonb #>> '{{}}')::jsonb ELSE t.template_structure::jsonb END,
+            'strict $.**'
+        ) AS v
+        WHERE t.template_id = %(template_id)s AND jsonb_typeof(v) = 'string'
+    ),
+    sections AS (
+        SELECT data_section_id, title, description, data_type, attributes, attributes_type, info
+        FROM data_sections
+        WHERE archive != true
+          AND (%(template_id)s IS NULL
+               OR data_section_id IN (SELECT value FROM template_values)
+               OR title IN (SELECT value FROM template_values))
+    ),
+    entries AS (
+        SELECT d.user_cv_data_id, d.data_section_id, d.data_details, d.editable, d.content_hash
+        FROM user_cv_data d
+        JOIN sections s ON s.data_section_id = d.data_section_id
+        WHERE d.user_id = %(user_id)s AND d.archive != true
+    ),
+    bundle_etag AS (
+        SELECT md5(
+            coalesce((SELECT string_agg(md5(s::text), ',' ORDER BY s.data_section_id) FROM sections s), '') || '|' ||
+            coalesce((SELECT string_agg(e.user_cv_data_id || ':' || coalesce(e.content_hash, '') || ':' || coalesce(e.editable::text, ''),
+                                        ',' ORDER BY e.user_cv_data_id) FROM entries e), '') || '|' ||
+            %(fields_key)s
+        ) AS value
+    )
+    SELECT bundle_etag.value,
+           CASE WHEN bundle_etag.value = %(etag)s THEN NULL ELSE (
+               SELECT coalesce(json_agg(json_build_object(
+                   'data_section_id', s.data_section_id,
+                   'title', s.title,
+                   'description', s.description,
+                   'data_type', s.data_type,
+                   'attributes', s.attributes,
+                   'attributes_type', s.attributes_type,
+                   'info', s.info,
+                   'entries', coalesce((
+                       SELECT json_agg(json_build_object(
+                           'user_cv_data_id', e.user_cv_data_id,
+                           'user_id', %(user_id)s,
+                           'data_section_id', e.data_section_id,
+                           'data_details', {data_details},
+                           'editable', e.editable
+                       ) ORDER BY e.user_cv_data_id)
+                       FROM entries e WHERE e.data_section_id = s.data_section_id
+                   ), '[]'::json)
+               ) ORDER BY s.title), '[]'::json)
+               FROM sections s
+           ) END
+    FROM bundle_etag
+"""
+
+# Only keeps the requested data_details keys
+PROJECTED_DATA_DETAILS = """(
+    SELECT coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+    FROM jsonb_each(CASE WHEN jsonb_typeof(e.data_details::jsonb) = 'string'
+                         THEN (e.data_details::jsonb #>> '{}')::jsonb ELSE e.data_details::jsonb END)
+    WHERE key = ANY(%(fields)s)
+)"""
+
+def getUserCVBundle(arguments):
+    fields = arguments.get('fields') or None
+    params = {
+        'user_id': arguments['user_id'],
+        'template_id': arguments.get('template_id') or None,
+        'etag': arguments.get('etag') or '',
+        'fields': sorted(fields) if fields else None,
+        'fields_key': ','.join(sorted(fields)) if fields else '*',
+    }
+    query = BUNDLE_QUERY.format(data_details=PROJECTED_DATA_DETAILS if fields else 'e.data_details')
+
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    etag, sections = cursor.fetchone()
+    cursor.close()
+    connection.close()
+
+    if sections is None:
+        return {'etag': etag, 'not_modified': True, 'sections': None}
+    return {'etag': etag, 'not_modified': False, 'sections': sections}
+
+def lambda_handler(event, context):
+    return getUserCVBundle(event['arguments'])
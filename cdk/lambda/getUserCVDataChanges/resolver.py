@@ -0,0 +1,89 @@
+import boto3
+import json
+import psycopg2
+import os
+from datetime import datetime, timedelta
+from databaseConnect import get_connection
+
+sm_client = boto3.client('secretsmanager')
+DB_PROXY_ENDPOINT = os.environ.get('DB_PROXY_ENDPOINT')
+# Must match deleteArchivedData, tombstones older than this are gone
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', '90'))
+
+'''
+A timestamp watermark is not safe: updated_at is the start time of the writing transaction, and a
+transaction that is still running can commit rows older than any watermark handed out meanwhile.
+Rows and tombstones record the id of the transaction that wrote them instead (migration 14), and
+the watermark is the xmin of a snapshot: every transaction with a lower id has finished, so a row
+that is not visible yet will have an id at or above the watermark. The watermark also carries the
+time it was issued, to check it against the tombstone retention. It is read in its own statement
+before the changes are selected, so the changes are read with a later snapshot.
+'''
+WATERMARK_QUERY = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text, clock_timestamp()::timestamp"
+
+# since is inclusive: transactions at or above the previous watermark may have committed after it was read
+CHANGES_QUERY = """
+    SELECT
+        (SELECT coalesce(json_agg(json_build_object(
+            'user_cv_data_id', user_cv_data_id,
+            'user_id', user_id,
+            'data_section_id', data_section_id,
+            'data_details', data_details,
+            'archive', archive,
+            'editable', editable
+        ) ORDER BY updated_at, user_cv_data_id), '[]'::json)
+         FROM user_cv_data
+         WHERE user_id = %(user_id)s AND archive = false AND (%(since)s IS NULL OR updated_xid >= %(since)s::xid8)),
+        (SELECT coalesce(json_agg(tombstone ORDER BY tombstone.deleted_at, tombstone.user_cv_data_id), '[]'::json) FROM (
+            SELECT user_cv_data_id, data_section_id, updated_at AS deleted_at, true AS archived
+            FROM user_cv_data
+            WHERE user_id = %(user_id)s AND archive = true AND updated_xid >= %(since)s::xid8
+            UNION ALL
+            SELECT user_cv_data_id, data_section_id, deleted_at, false AS archived
+            FROM user_cv_data_tombstones
+            WHERE user_id = %(user_id)s AND deleted_xid >= %(since)s::xid8
+        ) tombstone)
+"""
+
+def parseWatermark(since):
+    '''
+    Returns the transaction id and issue time of a watermark, or None without a watermark or for
+    one in the timestamp format used before migration 14
+    '''
+    if not since or ':' not in since:
+        return None
+    xid, issued_at = since.split(':', 1)
+    if not xid.isdigit():
+        return None
+    return xid, datetime.fromisoformat(issued_at)
+
+def getUserCVDataChanges(arguments):
+    '''
+    Returns the user's entries written since the given watermark, and the ids of entries archived
+    or deleted since then. Without a watermark, or with one older than the tombstone retention,
+    every live entry is returned and full_resync_required is set so the client drops its copy.
+    The returned watermark is passed as since on the next call.
+    '''
+    watermark = parseWatermark(arguments.get('since'))
+    full_resync_required = watermark is None or watermark[1] < datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    since = None if full_resync_required else watermark[0]
+
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    cursor.execute(WATERMARK_QUERY)
+    xmin, issued_at = cursor.fetchone()
+    cursor.execute(CHANGES_QUERY, {'user_id': arguments['user_id'], 'since': since})
+    upserts, tombstones = cursor.fetchone()
+    cursor.close()
+    connection.close()
+
+    return {
+        'watermark': f"{xmin}:{issued_at.isoformat()}",
+        'full_resync_required': full_resync_required,
+        'upserts': upserts,
+        'tombstones': tombstones if since is not None else []
+    }
+
+def lambda_handler(event, context):
+    return getUserCVDataChanges(event['arguments'])
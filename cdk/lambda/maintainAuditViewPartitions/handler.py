@@ -0,0 +1,84 @@
+import boto3
+import gzip
+import json
+import psycopg2
+import re
+from databaseConnect import get_connection
+import os
+import tempfile
+from datetime import date
+
+sm_client = boto3.client('secretsmanager')
+s3_client = boto3.client('s3')
+DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+# Monthly partitions are created this many months ahead of the current one
+PARTITIONS_AHEAD = int(os.environ.get('AUDIT_VIEW_PARTITIONS_AHEAD', '3'))
+# Partitions whose month ended more than this many months ago are removed, 0 keeps everything
+RETENTION_MONTHS = int(os.environ.get('AUDIT_VIEW_RETENTION_MONTHS', '24'))
+# When set, expired partitions are exported to this bucket as gzipped CSV before they are dropped
+ARCHIVE_BUCKET = os.environ.get('AUDIT_VIEW_ARCHIVE_BUCKET')
+ARCHIVE_PREFIX = os.environ.get('AUDIT_VIEW_ARCHIVE_PREFIX', 'archive/audit_view/')
+
+PARTITION_NAME = re.compile(r'^audit_view_y(\d{4})m(\d{2})$')
+
+def addMonths(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def getMonthlyPartitions(cursor):
+    """
+    Returns {partition name: first day of its month} for the monthly partitions of audit_view
+    """
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'audit_view'::regclass
+    """)
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+def archivePartition(cursor, partition_name):
+    key = f"{ARCHIVE_PREFIX}{partition_name}.csv.gz"
+    with tempfile.TemporaryFile() as archive:
+        with gzip.GzipFile(fileobj=archive, mode='wb') as compressed:
+            cursor.copy_expert(f'COPY (SELECT * FROM {partition_name} ORDER BY ts, log_view_id) TO STDOUT WITH CSV HEADER', compressed)
+        archive.seek(0)
+        s3_client.upload_fileobj(archive, ARCHIVE_BUCKET, key)
+    print(f"Archived {partition_name} to s3://{ARCHIVE_BUCKET}/{key}")
+
+def maintainAuditViewPartitions():
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to database")
+    cursor = connection.cursor()
+
+    current_month = date.today().replace(day=1)
+    created = []
+    for months in range(0, PARTITIONS_AHEAD + 1):
+        cursor.execute('SELECT create_audit_view_partition(%s)', (addMonths(current_month, months),))
+        created.append(cursor.fetchone()[0])
+    connection.commit()
+
+    dropped = []
+    if RETENTION_MONTHS > 0:
+        oldest_kept_month = addMonths(current_month, -RETENTION_MONTHS)
+        for partition_name, month in sorted(getMonthlyPartitions(cursor).items(), key=lambda item: item[1]):
+            if month >= oldest_kept_month:
+                continue
+            if ARCHIVE_BUCKET:
+                archivePartition(cursor, partition_name)
+            # Detaching first keeps the lock on audit_view short, the drop then only touches the old table
+            cursor.execute(f'ALTER TABLE audit_view DETACH PARTITION {partition_name}')
+            cursor.execute(f'DROP TABLE {partition_name}')
+            connection.commit()
+            dropped.append(partition_name)
+            print(f"Dropped partition {partition_name}")
+
+    cursor.close()
+    connection.close()
+    return json.dumps({'ensured_partitions': created, 'dropped_partitions': dropped})
+
+def lambda_handler(event, context):
+    return maintainAuditViewPartitions()
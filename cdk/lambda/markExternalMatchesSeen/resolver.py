@@ -0,0 +1,33 @@
+import boto3
+import json
+import psycopg2
+import os
+from databaseConnect import get_connection
+from nameMatching import markMatchesSeen
+
+sm_client = boto3.client('secretsmanager')
+DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+
+# Sources as named by getNewExternalMatchCounts, and the table matched for each
+SOURCE_TABLES = {'secure_funding': 'grants', 'rise_data': 'rise_data', 'patents': 'patents'}
+
+def markExternalMatchesSeen(arguments):
+    sources = arguments['sources']
+    for source in sources:
+        if source not in SOURCE_TABLES:
+            raise Exception(f"Unknown source {source}, must be one of {', '.join(SOURCE_TABLES)}")
+
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    # Stores the user's matches the first time and after a name or department change, then records the visit
+    for source in sources:
+        markMatchesSeen(cursor, SOURCE_TABLES[source], arguments['user_id'])
+    cursor.close()
+    connection.commit()
+    connection.close()
+    return "SUCCESS"
+
+def lambda_handler(event, context):
+    arguments = event['arguments']
+    return markExternalMatchesSeen(arguments=arguments)
@@ -19,7 +19,7 @@ def insert_row_dynamic(row, conn, cursor, table_name):
     Insert a CSV row (dict) into specified table exactly as-is.
     Uses CSV headers as column names and inserts all values.
     Converts None/null to empty strings before saving.
-    Returns 1 when inserted.
+    Returns 1 when inserted, 0 when a duplicate user_cv_data entry was skipped.
     """
     cols = list(row.keys())
     if not cols:
@@ -29,12 +29,15 @@ def insert_row_dynamic(row, conn, cursor, table_name):
     col_list = ",".join(quoted_cols)
     placeholders = ",".join(["%s"] * len(cols))
     query = f"INSERT INTO {table_name} ({col_list}) VALUES ({placeholders})"
+    if table_name == "user_cv_data":
+        # Skip entries that already exist for the user and section
+        query += " ON CONFLICT (user_id, data_section_id, content_hash) DO NOTHING"
 
     # Convert None/null to empty strings, empty strings remain as empty strings
     values = [row[c] if row[c] not in ["", None, "None", "null"] else '' for c in cols]
     
     cursor.execute(query, tuple(values))
-    return 1
+    return cursor.rowcount
 
 
 def lambda_handler(event, context):
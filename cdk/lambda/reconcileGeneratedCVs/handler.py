@@ -0,0 +1,75 @@
+import boto3
+import psycopg2
+import psycopg2.extras as extras
+from databaseConnect import get_connection
+from cvUpdates import parseCVKey
+import os
+from datetime import datetime, timezone
+
+sm_client = boto3.client('secretsmanager')
+s3_client = boto3.client('s3')
+DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+BUCKET_NAME = os.environ['BUCKET_NAME']
+
+def listGeneratedCVs():
+    """
+    Returns {(user_id, template_id): (cognito_user_id, last modified)} for every CV PDF in the bucket
+    """
+    cvs = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BUCKET_NAME):
+        for item in page.get('Contents', []):
+            parsed = parseCVKey(item['Key'])
+            if parsed is None:
+                continue
+            cognito_user_id, user_id, template_id = parsed
+            last_modified = item['LastModified'].astimezone(timezone.utc).replace(tzinfo=None)
+            previous = cvs.get((user_id, template_id))
+            if previous is None or previous[1] < last_modified:
+                cvs[(user_id, template_id)] = (cognito_user_id, last_modified)
+    return cvs
+
+def reconcileGeneratedCVs():
+    """
+    Backfills generated_cvs from a full listing of the CV bucket and removes rows whose PDF is gone.
+    Rows written by registerGeneratedCV after the listing started are left alone.
+    """
+    started_at = datetime.utcnow()
+    cvs = listGeneratedCVs()
+    print(f"Found {len(cvs)} CVs in s3://{BUCKET_NAME}")
+
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    cursor.execute('SELECT user_id, template_id, cognito_user_id, generated_at FROM generated_cvs')
+    registered = {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+
+    missing = [
+        (user_id, template_id, cognito_user_id, generated_at)
+        for (user_id, template_id), (cognito_user_id, generated_at) in cvs.items()
+        if registered.get((user_id, template_id)) != (cognito_user_id, generated_at)
+    ]
+    stale = [key for key in registered if key not in cvs]
+
+    if missing:
+        extras.execute_values(cursor, """
+            INSERT INTO generated_cvs (user_id, template_id, cognito_user_id, generated_at) VALUES %s
+            ON CONFLICT (user_id, template_id) DO UPDATE
+            SET cognito_user_id = EXCLUDED.cognito_user_id, generated_at = EXCLUDED.generated_at
+            WHERE generated_cvs.generated_at <= EXCLUDED.generated_at
+        """, missing, page_size=1000)
+    if stale:
+        extras.execute_values(cursor, """
+            DELETE FROM generated_cvs AS g USING (VALUES %s) AS s (user_id, template_id, listed_at)
+            WHERE g.user_id = s.user_id AND g.template_id = s.template_id AND g.generated_at < s.listed_at
+        """, [(user_id, template_id, started_at) for user_id, template_id in stale], page_size=1000)
+    connection.commit()
+    cursor.close()
+    connection.close()
+
+    # Any difference means an S3 event was lost or the registry was written outside registerGeneratedCV
+    print(f"Registry had {len(registered)} rows: {len(missing)} added or updated, {len(stale)} removed")
+    return {'listed': len(cvs), 'registered': len(registered), 'added': len(missing), 'removed': len(stale)}
+
+def lambda_handler(event, context):
+    return reconcileGeneratedCVs()
@@ -0,0 +1,47 @@
+import boto3
+import psycopg2
+from databaseConnect import get_connection
+from cvUpdates import parseCVKey
+import os
+from datetime import datetime, timezone
+from urllib.parse import unquote_plus
+
+sm_client = boto3.client('secretsmanager')
+DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
+
+def registerGeneratedCV(event):
+    """
+    Keeps generated_cvs in line with the CV bucket from its EventBridge Object Created and Object Deleted events
+    """
+    key = unquote_plus(event['detail']['object']['key'])
+    parsed = parseCVKey(key)
+    if parsed is None:
+        print(f"Ignoring {key}")
+        return
+    cognito_user_id, user_id, template_id = parsed
+    # Event time in UTC, timestamps are stored without a time zone
+    event_time = datetime.fromisoformat(event['time'].replace('Z', '+00:00')).astimezone(timezone.utc).replace(tzinfo=None)
+
+    connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
+    print("Connected to Database")
+    cursor = connection.cursor()
+    if event['detail-type'] == 'Object Created':
+        # Events can arrive out of order, an older event never overwrites a newer one
+        cursor.execute("""
+            INSERT INTO generated_cvs (user_id, template_id, cognito_user_id, generated_at) VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id, template_id) DO UPDATE
+            SET cognito_user_id = EXCLUDED.cognito_user_id, generated_at = EXCLUDED.generated_at
+            WHERE generated_cvs.generated_at <= EXCLUDED.generated_at
+        """, (user_id, template_id, cognito_user_id, event_time))
+    else:
+        cursor.execute(
+            'DELETE FROM generated_cvs WHERE user_id = %s AND template_id = %s AND generated_at <= %s',
+            (user_id, template_id, event_time)
+        )
+    connection.commit()
+    cursor.close()
+    connection.close()
+    print(f"{event['detail-type']}: {key}")
+
+def lambda_handler(event, context):
+    registerGeneratedCV(event)
@@ -0,0 +1,102 @@
+import boto3
+import botocore
+import json
+import os
+import re
+import time
+
+BUCKET_NAME = os.environ.get('BUCKET_NAME')
+CONVERTER_FUNCTION_NAME = os.environ.get('CONVERTER_FUNCTION_NAME')
+# A conversion still marked running after the converter's timeout has died without tagging its result
+CONVERTER_TIMEOUT_SECONDS = int(os.environ.get('CONVERTER_TIMEOUT_SECONDS', '900'))
+# Converted DOCX keyed by the ETag of their PDF, shared with the pdf2docx converter
+DOCX_CACHE_PREFIX = "cache/docx/"
+# Only CVs generated by generateGotenbergPdf are converted
+ALLOWED_KEY = re.compile(r'^pdf/[^/]+\.pdf$')
+
+s3_client = boto3.client("s3")
+lambda_client = boto3.client("lambda")
+
+def get_docx_cache_key(etag):
+    return DOCX_CACHE_PREFIX + etag.strip('"') + ".docx"
+
+def is_docx_cached(cache_key):
+    """Check whether a DOCX was already converted from an identical PDF"""
+    try:
+        s3_client.head_object(Bucket=BUCKET_NAME, Key=cache_key)
+        return True
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+def get_docx_status(pdf_key):
+    """
+    Value of the isDocxComplete tag of the PDF, None when no DOCX was requested since it was generated,
+    and the time the running conversion was requested at, 0 when it is not known
+    """
+    tags = {tag['Key']: tag['Value'] for tag in s3_client.get_object_tagging(Bucket=BUCKET_NAME, Key=pdf_key)['TagSet']}
+    return tags.get('isDocxComplete'), int(tags.get('docxRequestedAt', 0))
+
+def tag_docx_status(pdf_key, status):
+    tags = [{'Key': 'isDocxComplete', 'Value': status}]
+    # The tag set is replaced as a whole, so the request time is written with the status
+    if status == 'false':
+        tags.append({'Key': 'docxRequestedAt', 'Value': str(int(time.time()))})
+    s3_client.put_object_tagging(
+        Bucket=BUCKET_NAME,
+        Key=pdf_key,
+        Tagging={'TagSet': tags}
+    )
+
+def requestDocx(arguments):
+    """
+    Makes the DOCX of a generated CV available at docx/<name>.docx. A DOCX converted earlier from the same
+    PDF is copied from the cache and returned as COMPLETE, otherwise the conversion is started and PENDING
+    returned, completion is then notified on the DOCX key.
+    """
+    pdf_key = arguments['pdf_key']
+    if not ALLOWED_KEY.match(pdf_key):
+        raise Exception(f"Not a generated CV: {pdf_key}")
+    docx_key = "docx/" + pdf_key[len("pdf/"):-len(".pdf")] + ".docx"
+    result = {'pdf_key': pdf_key, 'docx_key': docx_key}
+
+    try:
+        pdf = s3_client.head_object(Bucket=BUCKET_NAME, Key=pdf_key)
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            raise Exception("CV has not been generated")
+        raise
+
+    # Regenerating the PDF clears its tags, so a complete tag always belongs to the current PDF
+    status, requested_at = get_docx_status(pdf_key)
+    if status == 'true':
+        return {**result, 'status': 'COMPLETE'}
+    if status == 'false':
+        if time.time() - requested_at < CONVERTER_TIMEOUT_SECONDS:
+            print(f"Conversion of {pdf_key} already running")
+            return {**result, 'status': 'PENDING'}
+        print(f"Conversion of {pdf_key} requested at {requested_at} never finished, starting it again")
+
+    cache_key = get_docx_cache_key(pdf['ETag'])
+    if is_docx_cached(cache_key):
+        print(f"Cache hit, copying s3://{BUCKET_NAME}/{cache_key} to {docx_key}")
+        s3_client.copy_object(
+            Bucket=BUCKET_NAME,
+            Key=docx_key,
+            CopySource={"Bucket": BUCKET_NAME, "Key": cache_key}
+        )
+        tag_docx_status(pdf_key, 'true')
+        return {**result, 'status': 'COMPLETE'}
+
+    tag_docx_status(pdf_key, 'false')
+    lambda_client.invoke(
+        FunctionName=CONVERTER_FUNCTION_NAME,
+        InvocationType='Event',
+        Payload=json.dumps({'pdf_key': pdf_key, 'docx_key': docx_key})
+    )
+    print(f"Started conversion of {pdf_key}")
+    return {**result, 'status': 'PENDING'}
+
+def lambda_handler(event, context):
+    return requestDocx(event['arguments'])
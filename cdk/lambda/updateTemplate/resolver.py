@@ -2,47 +2,25 @@ import boto3
 import json
 import psycopg2
 import os
-import time
 from databaseConnect import get_connection
 
 sm_client = boto3.client('secretsmanager')
-dynamodb = boto3.client('dynamodb')
 DB_PROXY_ENDPOINT = os.environ['DB_PROXY_ENDPOINT']
 
-def updateDynamoDBKeys(template_id):
-    # First fetch all the keys that contain the template_id
-    response = dynamodb.scan(TableName=os.environ['TABLE_NAME'], FilterExpression='contains(#keyName, :substr)', ExpressionAttributeNames={'#keyName': 'logEntryId'}, ExpressionAttributeValues={':substr': {'S': template_id}})
-    items = response['Items']
-    all_items = []
-    for item in items:
-        all_items.append(item)
-    while 'LastEvaluatedKey' in response:
-        response = dynamodb.scan(TableName=os.environ['TABLE_NAME'], FilterExpression='contains(#keyName, :substr)', ExpressionAttributeNames={'#keyName': 'logEntryId'}, ExpressionAttributeValues={':substr': {'S': template_id}}, ExclusiveStartKey=response['LastEvaluatedKey'])
-        items = response.get('Items')
-        for item in items:
-            all_items.append(item)
-
-    # Then update each item with containing template_id to the current timestamp
-    for item in all_items:
-        key = item['logEntryId']['S']
-        user_logs = {
-            'logEntryId': {'S': key},
-            'timestamp': {'N': f"{int(time.time())}"}
-        }
-        dynamodb.put_item(TableName=os.environ['TABLE_NAME'], Item=user_logs)
-
 def updateTemplate(arguments):
     connection = get_connection(psycopg2, DB_PROXY_ENDPOINT)
     print("Connected to database")
     cursor = connection.cursor()
 
-    # Prepare the UPDATE query
+    # Prepare the UPDATE query. Every CV generated from the template before updated_at is stale for cvIsUpToDate
     query = """
     UPDATE templates SET 
         title = %s,
         template_structure = %s,
         start_year = %s,
-        end_year = %s
+        end_year = %s,
+        version = version + 1,
+        updated_at = CURRENT_TIMESTAMP
     WHERE template_id = %s
     """
 
@@ -61,7 +39,6 @@ def updateTemplate(arguments):
     cursor.close()
     connection.commit()
     connection.close()
-    # updateDynamoDBKeys(arguments['template_id'])
     return "SUCCESS"
 
 def lambda_handler(event, context):
@@ -5,6 +5,7 @@ from datetime import datetime
 import time
 import os
 from databaseConnect import get_connection
+from cvUpdates import recordCVUpdate
 
 sm_client = boto3.client('secretsmanager')
 dynamodb = boto3.client('dynamodb')
@@ -54,19 +55,12 @@ def updateUser(arguments):
         arguments['user_id']
     ))
 
-    # Update the key cognito_user_id/user_id to the current timestamp
-    # user_logs = {
-    #     'logEntryId': {'S': f"{arguments['cognito_user_id']}/{arguments['user_id']}"},
-    #     'timestamp': {'N': f"{int(time.time())}"}
-    # }
-    # dynamodb.put_item(
-    #     TableName=os.environ['TABLE_NAME'],
-    #     Item=user_logs
-    # )
-    print("Updated user logs")
     cursor.close()
     connection.commit()
     connection.close()
+    # The profile is printed in the header of every CV
+    recordCVUpdate(arguments['user_id'])
+    print("Updated user logs")
     return "User updated successfully"
 
 def lambda_handler(event, context):
@@ -5,6 +5,7 @@ from datetime import datetime
 import time
 import os
 from databaseConnect import get_connection
+from cvUpdates import recordCVUpdate
 
 sm_client = boto3.client('secretsmanager')
 dynamodb = boto3.client('dynamodb')
@@ -74,6 +75,7 @@ def updateUserAffiliations(arguments):
     cursor.close()
     connection.commit()
     connection.close()
+    recordCVUpdate(user_id)
     return "User affiliations updated successfully"
 
 def lambda_handler(event, context):
@@ -5,6 +5,7 @@ import time
 from datetime import datetime
 import os
 from databaseConnect import get_connection
+from cvUpdates import recordCVUpdate
 
 sm_client = boto3.client('secretsmanager')
 dynamodb = boto3.client('dynamodb')
@@ -18,43 +19,29 @@ def updateUserCVData(arguments):
     archive_timestamp = datetime.now() if archive else None
     if 'data_details' in arguments:
         data_details_json = json.dumps(arguments['data_details'])  # Convert data_details dictionary to JSON string
-        if archive is not None:
-            cursor.execute("UPDATE user_cv_data SET data_details = %s, archive = %s, archive_timestamp = %s WHERE user_cv_data_id = %s", 
-                           (data_details_json, archive, archive_timestamp, arguments['user_cv_data_id']))
-        else:
-            cursor.execute("UPDATE user_cv_data SET data_details = %s WHERE user_cv_data_id = %s", 
-                           (data_details_json, arguments['user_cv_data_id']))
+        try:
+            if archive is not None:
+                cursor.execute("UPDATE user_cv_data SET data_details = %s, archive = %s, archive_timestamp = %s, updated_at = CURRENT_TIMESTAMP WHERE user_cv_data_id = %s RETURNING user_id", 
+                               (data_details_json, archive, archive_timestamp, arguments['user_cv_data_id']))
+            else:
+                cursor.execute("UPDATE user_cv_data SET data_details = %s, updated_at = CURRENT_TIMESTAMP WHERE user_cv_data_id = %s RETURNING user_id", 
+                               (data_details_json, arguments['user_cv_data_id']))
+        except psycopg2.IntegrityError:
+            # The edited entry is now identical to another entry of the same section
+            connection.rollback()
+            cursor.close()
+            connection.close()
+            return "ALREADY_EXISTS"
     else:
         if archive is not None:
-            cursor.execute("UPDATE user_cv_data SET archive = %s, archive_timestamp = %s WHERE user_cv_data_id = %s", 
+            cursor.execute("UPDATE user_cv_data SET archive = %s, archive_timestamp = %s, updated_at = CURRENT_TIMESTAMP WHERE user_cv_data_id = %s RETURNING user_id", 
                            (archive, archive_timestamp, arguments['user_cv_data_id']))
-    # Fetch all templates which have the data_section_id
-    # cursor.execute('SELECT data_section_id FROM user_cv_data WHERE user_cv_data_id = %s', (arguments['user_cv_data_id'],))
-    # data_section_id = cursor.fetchone()
-    # data_section_id = data_section_id[0]
-    # cursor.execute('SELECT template_id, data_section_ids FROM templates')
-    # templates = cursor.fetchall()
-    # # Get all template ids which have the data_section_id
-    # filtered_template_ids = []
-    # for template in templates:
-    #     if data_section_id in template[1]:
-    #         filtered_template_ids.append(template[0])
-    # cursor.execute('SELECT user_id FROM user_cv_data WHERE user_cv_data_id = %s', (arguments['user_cv_data_id'], ))
-    # user_id = cursor.fetchone()[0]
-    # for template_id in filtered_template_ids:
-    #     # Update the key cognito_user_id/user_id/template_id to the current timestamp
-    #     user_logs = {
-    #         'logEntryId': {'S': f"{arguments['cognito_user_id']}/{user_id}/{template_id}"},
-    #         'timestamp': {'N': f"{int(time.time())}"}
-    #     }
-    #     dynamodb.put_item(
-    #         TableName=os.environ['TABLE_NAME'],
-    #         Item=user_logs
-    #     )
-    # print("Updated user logs")
+    updated = cursor.fetchone() if cursor.description is not None else None
     cursor.close()
     connection.commit()
     connection.close()
+    if updated is not None:
+        recordCVUpdate(updated[0])
     return "SUCCESS"
 
 
@@ -0,0 +1,76 @@
+"""
+Server side aggregation of the CV entries of a section, shared by the getDepartmentCVData and
+getFacultyWideCVData resolvers. The caller passes the SQL condition selecting the users in scope.
+"""
+
+# Which data_details keys hold the year, type, agency and amount of an entry, by section title
+# (same title matching as filter_data_by_section of the getDepartmentCVData and getFacultyWideCVData resolvers)
+def aggregate_sources(section_title):
+    section_title = section_title or ''
+    if 'Publication' in section_title or 'Other' in section_title:
+        return {'year': "d->>'end_date'", 'type': "d->>'publication_type'", 'agency': 'NULL', 'amount': 'NULL'}
+    elif 'Patent' in section_title:
+        return {'year': "coalesce(d->>'year', d->>'end_date')", 'type': 'NULL', 'agency': 'NULL', 'amount': 'NULL'}
+    elif 'Grant' in section_title:
+        return {'year': "d->>'dates'", 'type': "d->>'type'", 'agency': "d->>'agency'", 'amount': "d->>'amount'"}
+    return {'year': "coalesce(d->>'year', d->>'end_date', d->>'dates')", 'type': 'NULL', 'agency': 'NULL', 'amount': 'NULL'}
+
+AGGREGATE_GROUPS = {
+    'none': ('NULL', 'NULL'),
+    'department': ('u.primary_department', 'u.primary_department'),
+    'faculty': ('u.primary_faculty', 'u.primary_faculty'),
+    'user': ('ucd.user_id', "concat_ws(' ', u.first_name, u.last_name)"),
+}
+
+# The year is the last four digit number of the date string (the end of a "start - end" range),
+# amounts are summed after dropping currency symbols and thousands separators. data_details written by
+# addUserCVData is a JSON string containing the object, it is unwrapped like the raw mode's json.loads
+AGGREGATE_QUERY = """
+    WITH scoped AS (
+        SELECT {group_key} AS group_key, {group_name} AS group_name,
+               CASE WHEN jsonb_typeof(ucd.data_details::jsonb) = 'string'
+                    THEN (ucd.data_details::jsonb #>> '{{}}')::jsonb ELSE ucd.data_details::jsonb END AS d
+        FROM user_cv_data ucd
+        LEFT JOIN users u ON u.user_id = ucd.user_id
+        WHERE ucd.data_section_id = %(data_section_id)s AND ucd.archive != true {scope}
+    ),
+    extracted AS (
+        SELECT group_key, group_name,
+               (regexp_match({year}, %(year_pattern)s))[1]::int AS year,
+               nullif(trim({type}), '') AS type,
+               nullif(trim({agency}), '') AS agency,
+               substring(replace({amount}, ',', '') from %(amount_pattern)s)::numeric AS amount
+        FROM scoped
+    )
+    SELECT group_key, max(group_name), year, type, agency, count(*), sum(amount)
+    FROM extracted
+    GROUP BY group_key, year, type, agency
+    ORDER BY group_key, year, type, agency
+"""
+
+def getCVDataAggregates(cursor, data_section_id, section_title, group_by, scope, scope_params):
+    """
+    Counts the entries of a section, and sums grant amounts, per group, year, type and agency.
+    The result size depends on the number of distinct groups and years, not on the number of entries.
+    """
+    group_by = group_by or 'none'
+    if group_by not in AGGREGATE_GROUPS:
+        raise ValueError(f"group_by must be one of {', '.join(AGGREGATE_GROUPS)}")
+    group_key, group_name = AGGREGATE_GROUPS[group_by]
+    query = AGGREGATE_QUERY.format(group_key=group_key, group_name=group_name, scope=scope,
+                                   **aggregate_sources(section_title))
+    params = dict(scope_params, data_section_id=data_section_id,
+                  year_pattern=r'.*(\d{4})', amount_pattern=r'\d+(?:\.\d+)?')
+    cursor.execute(query, params)
+    aggregates = []
+    for row in cursor.fetchall():
+        aggregates.append({
+            'group_key': row[0],
+            'group_name': row[1],
+            'year': row[2],
+            'type': row[3],
+            'agency': row[4],
+            'count': row[5],
+            'amount_sum': float(row[6]) if row[6] is not None else None,
+        })
+    return aggregates
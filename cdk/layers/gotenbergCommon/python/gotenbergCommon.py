@@ -0,0 +1,93 @@
+"""
+Helpers shared by the generateGotenbergPdf, generateGotenbergBatch and buildCVPacket Lambdas: the
+multipart/form-data body sent to Gotenberg, the rendered PDF cache and the completion notification.
+boto3 and botocore are imported by the helpers that call AWS, so the multipart body and the constants
+can be used, and the batch worker pool load tested, without them installed.
+"""
+import json
+import os
+import urllib.request
+
+APPSYNC_ENDPOINT = os.environ.get('APPSYNC_ENDPOINT')
+GOTENBERG_HTML_PATH = "/forms/chromium/convert/html"
+FIXED_BOUNDARY = "----WebKitFormBoundary123456"
+MULTIPART_CONTENT_TYPE = f"multipart/form-data; boundary={FIXED_BOUNDARY}"
+# Rendered PDFs keyed by the SHA-256 of their HTML. The keys have no .pdf suffix so writing them
+# does not trigger the DOCX conversion.
+PDF_CACHE_PREFIX = "cache/pdf/"
+
+def multipart_stream(files):
+    """
+    Yields the multipart/form-data body for [(filename, content type, chunks)], chunks is an iterable of
+    bytes that is only read while its file is sent, so one file at a time is held in memory.
+    """
+    for filename, content_type, chunks in files:
+        yield (
+            f"--{FIXED_BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="files"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        for chunk in chunks:
+            yield chunk
+        yield b"\r\n"
+    yield f"--{FIXED_BOUNDARY}--\r\n".encode("utf-8")
+
+def is_pdf_cached(s3_client, bucket_name, cache_key):
+    """Check whether a PDF was already rendered from identical HTML"""
+    import botocore.exceptions
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=cache_key)
+        return True
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+def notify_generation_complete(key):
+    """Call the GraphQL mutation to notify that generation is complete"""
+    try:
+        import boto3
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
+        mutation = """
+        mutation NotifyComplete($key: String!) {
+            notifyGotenbergGenerationComplete(key: $key) {
+                key
+            }
+        }
+        """
+        payload = {
+            "query": mutation,
+            "variables": {
+                "key": key
+            }
+        }
+
+        # Use IAM authentication instead of API key
+        session = boto3.Session()
+        credentials = session.get_credentials()
+        region = session.region_name or 'ca-central-1'
+
+        data = json.dumps(payload)
+        request = AWSRequest(
+            method='POST',
+            url=APPSYNC_ENDPOINT,
+            data=data,
+            headers={'Content-Type': 'application/json'}
+        )
+        SigV4Auth(credentials, 'appsync', region).add_auth(request)
+
+        req = urllib.request.Request(
+            APPSYNC_ENDPOINT,
+            data=data.encode('utf-8'),
+            headers=dict(request.headers),
+            method='POST'
+        )
+        with urllib.request.urlopen(req) as response:
+            result = json.loads(response.read().decode('utf-8'))
+            print(f"Notification sent successfully: {result}")
+
+    except Exception as e:
+        # Don't fail the entire function if notification fails
+        print(f"Failed to send notification: {str(e)}")
@@ -0,0 +1,395 @@
+'''
+Fuzzy matching of a faculty member against the externally loaded grants, rise_data and patents tables.
+
+Candidates are blocked in the database on the soundex code of the record's surname key (its first and
+last hyphenated part, both indexed by migration 9) and on the first name initial, so only a few dozen
+rows per user reach Python. Each candidate is then scored on surname and first name similarity
+(exact, nickname and initial matches, Jaro-Winkler capped below MIN_CONFIDENCE for other spellings),
+raised when the record's department or agency
+matches the user's department or the agencies they already hold grants from. Only candidates scoring at least MIN_CONFIDENCE
+are returned, best first.
+
+Matches are stored per user in external_record_matches. The ETL jobs add matches for the records they
+insert (matchNewRecords), and markMatchesSeen computes a user's matches against the whole table once, and
+again when their name or department changes. Matches are stored down to MIN_STORED_CONFIDENCE, since the
+agencies a user holds grants from are only known when the matches are read, and getUserMatches scores
+the stored records again with them.
+'''
+import re
+from psycopg2 import extras
+from unidecode import unidecode
+from strsimpy.jaro_winkler import JaroWinkler
+
+MIN_CONFIDENCE = 0.9
+
+# Weight of the surname in the name score, the first name gets the rest
+SURNAME_WEIGHT = 0.55
+# Share of the gap between the name score and 1 that matching department/agency signals can close.
+# Signals never lower the score, records from a new agency or another department are still valid
+SIGNAL_WEIGHT = 0.3
+# Lowest score that full department and agency signals can still lift to MIN_CONFIDENCE
+MIN_STORED_CONFIDENCE = (MIN_CONFIDENCE - SIGNAL_WEIGHT) / (1 - SIGNAL_WEIGHT)
+# Below this first name similarity the names are different (Jane and John), signals are then ignored
+# so that a colleague with the same surname in the same department cannot reach MIN_CONFIDENCE
+MIN_FIRST_NAME_SIMILARITY = 0.9
+
+NICKNAME_SCORE = 0.95
+INITIAL_SCORE = 0.85
+# Score of a surname sharing one part of a hyphenated or double surname
+SURNAME_PART_SCORE = 0.95
+# Jaro-Winkler is high for different short names (Paul and Paula, Jones and Jonas), so names that are not
+# equal, nicknames or initials are capped low enough that they cannot reach MIN_CONFIDENCE by themselves.
+# A first name that is only similar never gets signals, a similar surname only does with an exact first name
+FUZZY_FIRST_NAME_CAP = 0.75
+FUZZY_SURNAME_CAP = 0.8
+
+# Primary key column of each table that can be matched
+ID_COLUMNS = {'grants': 'grant_id', 'rise_data': 'rise_data_id', 'patents': 'patent_id'}
+
+BLOCKING_QUERY = """
+    SELECT * FROM {table}
+    WHERE (soundex(split_part(last_name_key, '-', 1)) = ANY(%(codes)s)
+           OR soundex(regexp_replace(last_name_key, '^.*-', '')) = ANY(%(codes)s))
+      AND left(first_name_key, 1) = ANY(%(initials)s)
+"""
+
+SOUNDEX_QUERY = "SELECT coalesce(array_agg(DISTINCT soundex(part)), '{}') FROM unnest(%s::text[]) AS part"
+
+# Pairs every user with the given records whose surname shares a soundex code with any part of theirs.
+# The user columns come first and are prefixed so they don't clash with the record's own name columns
+NEW_RECORD_CANDIDATES_QUERY = """
+    WITH user_codes AS (
+        SELECT DISTINCT u.user_id, u.first_name, u.last_name, u.primary_department, soundex(part) AS code
+        FROM users u, regexp_split_to_table(lower(unaccent(u.last_name)), '[\\s\\-]+') AS part
+        WHERE part <> ''
+    )
+    SELECT DISTINCT ON (uc.user_id, t.{id_column})
+           uc.user_id AS match_user_id, uc.first_name AS match_first_name,
+           uc.last_name AS match_last_name, uc.primary_department AS match_department, t.*
+    FROM {table} t
+    JOIN user_codes uc ON uc.code IN (soundex(split_part(t.last_name_key, '-', 1)),
+                                      soundex(regexp_replace(t.last_name_key, '^.*-', '')))
+    WHERE t.{id_column} = ANY(%(record_ids)s)
+"""
+
+STORE_MATCHES_QUERY = """
+    INSERT INTO external_record_matches (user_id, source, record_id, confidence) VALUES %s
+    ON CONFLICT (user_id, source, record_id) DO UPDATE SET confidence = EXCLUDED.confidence
+"""
+
+# Columns of the table, then the match confidence and whether it was found after the user's last visit
+USER_MATCHES_QUERY = """
+    SELECT t.*, m.confidence, m.matched_at > coalesce(s.visited_at, '-infinity') AS is_new
+    FROM external_record_matches m
+    JOIN {table} t ON t.{id_column} = m.record_id
+    LEFT JOIN external_match_state s ON s.user_id = m.user_id AND s.source = m.source
+    WHERE m.user_id = %s AND m.source = %s
+    ORDER BY m.confidence DESC
+"""
+
+# Groups of given names that are used for the same person
+NICKNAME_GROUPS = [
+    ('alexander', 'alex', 'sandy', 'xander'),
+    ('alexandra', 'alex', 'alexa', 'sandra', 'sandy'),
+    ('andrew', 'andy', 'drew'),
+    ('anthony', 'tony'),
+    ('benjamin', 'ben', 'benny'),
+    ('catherine', 'katherine', 'kathryn', 'cathy', 'kathy', 'kate', 'katie', 'cate'),
+    ('charles', 'charlie', 'chuck', 'chas'),
+    ('christopher', 'chris', 'kit'),
+    ('christine', 'christina', 'chris', 'tina'),
+    ('daniel', 'dan', 'danny'),
+    ('david', 'dave', 'davey'),
+    ('deborah', 'debra', 'deb', 'debbie'),
+    ('donald', 'don', 'donny'),
+    ('edward', 'ed', 'eddie', 'ted', 'ned'),
+    ('elizabeth', 'liz', 'lizzie', 'beth', 'betty', 'eliza', 'libby'),
+    ('frederick', 'fred', 'freddie'),
+    ('gregory', 'greg'),
+    ('james', 'jim', 'jimmy', 'jamie'),
+    ('jennifer', 'jen', 'jenny'),
+    ('jonathan', 'jon', 'john', 'johnny', 'jack'),
+    ('joseph', 'joe', 'joey'),
+    ('joshua', 'josh'),
+    ('kenneth', 'ken', 'kenny'),
+    ('lawrence', 'laurence', 'larry', 'laurie'),
+    ('margaret', 'maggie', 'meg', 'peggy', 'marge'),
+    ('matthew', 'matt'),
+    ('michael', 'mike', 'mick', 'mickey'),
+    ('nicholas', 'nick', 'nicky'),
+    ('patricia', 'pat', 'patty', 'trish'),
+    ('patrick', 'pat', 'paddy'),
+    ('peter', 'pete'),
+    ('rebecca', 'becky', 'becca'),
+    ('richard', 'rick', 'ricky', 'rich', 'dick'),
+    ('robert', 'rob', 'robbie', 'bob', 'bobby', 'bert'),
+    ('samuel', 'sam', 'sammy'),
+    ('stephen', 'steven', 'steve'),
+    ('susan', 'sue', 'suzy'),
+    ('thomas', 'tom', 'tommy'),
+    ('timothy', 'tim', 'timmy'),
+    ('victoria', 'vicky', 'tori'),
+    ('william', 'will', 'bill', 'billy', 'willy', 'liam'),
+]
+
+NICKNAMES = {}
+for group in NICKNAME_GROUPS:
+    for name in group:
+        NICKNAMES.setdefault(name, set()).update(group)
+
+# Words that say nothing about which department a record belongs to
+DEPARTMENT_STOPWORDS = {'of', 'and', 'the', 'for', 'in', 'department', 'dept', 'school', 'faculty', 'division', 'centre', 'center'}
+
+jaro_winkler = JaroWinkler()
+
+def normalize(value):
+    '''
+    Accent-folded, lowercased value with everything but letters, spaces and hyphens removed
+    '''
+    if not isinstance(value, str):
+        return ''
+    value = unidecode(value).lower()
+    value = re.sub(r'[^a-z\s\-]', '', value)
+    return ' '.join(value.split())
+
+def nameKey(name):
+    '''
+    First token of the name, accent-folded and lowercased, stored in the first_name_key and last_name_key
+    columns by the grant and patent ETL jobs. The blocking queries look rows up by these keys.
+    '''
+    if not isinstance(name, str):
+        return None
+    tokens = name.split()
+    if len(tokens) == 0:
+        return None
+    return unidecode(tokens[0]).strip().lower()
+
+def surnameParts(last_name):
+    return [part for part in re.split(r'[\s\-]+', normalize(last_name)) if part]
+
+def givenName(first_name):
+    '''
+    First token of the normalized first name, without hyphens, '' when there is none
+    '''
+    tokens = normalize(first_name).split()
+    if len(tokens) == 0:
+        return ''
+    return tokens[0].replace('-', '')
+
+def isInitialMatch(first, record_first):
+    # Records often only carry an initial ("J. Smith"), and so do some profiles
+    return (len(first) == 1 or len(record_first) == 1) and first[0] == record_first[0]
+
+def firstNameVariants(first_name):
+    '''
+    The given name (first token) and its known nicknames or full forms
+    '''
+    first = givenName(first_name)
+    if not first:
+        return set()
+    return NICKNAMES.get(first, set()) | {first}
+
+def surnameSimilarity(last_name, record_last_name):
+    full = normalize(last_name).replace(' ', '-')
+    record_full = normalize(record_last_name).replace(' ', '-')
+    if not full or not record_full:
+        return 0.0
+    if full == record_full:
+        return 1.0
+    # One part of a hyphenated or double surname matching is strong evidence, but not as strong as all of it
+    parts = surnameParts(last_name)
+    record_parts = surnameParts(record_last_name)
+    if set(parts) & set(record_parts):
+        return SURNAME_PART_SCORE
+    score = jaro_winkler.similarity(full, record_full)
+    for part in parts:
+        for record_part in record_parts:
+            score = max(score, SURNAME_PART_SCORE * jaro_winkler.similarity(part, record_part))
+    return min(score, FUZZY_SURNAME_CAP)
+
+def firstNameSimilarity(first_name, record_first_name):
+    first = givenName(first_name)
+    record_first = givenName(record_first_name)
+    if not first or not record_first:
+        return 0.0
+    if first == record_first:
+        return 1.0
+    if record_first in firstNameVariants(first_name):
+        return NICKNAME_SCORE
+    if isInitialMatch(first, record_first):
+        return INITIAL_SCORE
+    return min(jaro_winkler.similarity(first, record_first), FUZZY_FIRST_NAME_CAP)
+
+def departmentSimilarity(department, record_department):
+    words = set(normalize(department).replace('-', ' ').split()) - DEPARTMENT_STOPWORDS
+    record_words = set(normalize(record_department).replace('-', ' ').split()) - DEPARTMENT_STOPWORDS
+    if len(words) == 0 or len(record_words) == 0:
+        return None
+    return len(words & record_words) / len(words | record_words)
+
+def scoreCandidate(candidate, first_name, last_name, department=None, agencies=None):
+    '''
+    Confidence in [0, 1] that the candidate record (a dict of column values) belongs to the person
+    '''
+    first_name_score = firstNameSimilarity(first_name, candidate.get('first_name'))
+    name_score = (SURNAME_WEIGHT * surnameSimilarity(last_name, candidate.get('last_name'))
+                  + (1 - SURNAME_WEIGHT) * first_name_score)
+    # Signals only corroborate the same first name, a matching initial or a close spelling of it
+    first, record_first = givenName(first_name), givenName(candidate.get('first_name'))
+    if first_name_score < MIN_FIRST_NAME_SIMILARITY and not (first and record_first and isInitialMatch(first, record_first)):
+        return name_score
+
+    signals = []
+    if department and candidate.get('department'):
+        similarity = departmentSimilarity(department, candidate['department'])
+        if similarity is not None:
+            signals.append(similarity)
+    if agencies and candidate.get('agency'):
+        signals.append(1.0 if normalize(candidate['agency']) in set(normalize(agency) for agency in agencies) else 0.0)
+    if len(signals) == 0:
+        return name_score
+    return name_score + (1 - name_score) * SIGNAL_WEIGHT * sum(signals) / len(signals)
+
+def findMatches(cursor, table, first_name, last_name, department=None, agencies=None, min_confidence=MIN_CONFIDENCE):
+    '''
+    Returns (row, confidence) pairs for the records of table that match the person, best first.
+    Rows are the tuples returned by SELECT * on the table.
+    '''
+    if table not in ID_COLUMNS:
+        raise ValueError(f"Unsupported table {table}")
+    parts = surnameParts(last_name)
+    initials = sorted(set(variant[0] for variant in firstNameVariants(first_name)))
+    if len(parts) == 0 or len(initials) == 0:
+        return []
+
+    cursor.execute(SOUNDEX_QUERY, (parts,))
+    codes = cursor.fetchone()[0]
+    cursor.execute(BLOCKING_QUERY.format(table=table), {'codes': codes, 'initials': initials})
+    columns = [desc[0] for desc in cursor.description]
+
+    matches = []
+    for row in cursor.fetchall():
+        confidence = scoreCandidate(dict(zip(columns, row)), first_name, last_name, department, agencies)
+        if confidence >= min_confidence:
+            matches.append((row, round(confidence, 3)))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches
+
+def storeMatches(cursor, table, matches):
+    '''
+    Upserts (user_id, record_id, confidence) tuples into external_record_matches
+    '''
+    if len(matches) == 0:
+        return
+    extras.execute_values(
+        cursor,
+        STORE_MATCHES_QUERY,
+        [(user_id, table, record_id, confidence) for user_id, record_id, confidence in matches],
+        page_size=1000
+    )
+
+def matchNewRecords(cursor, table, record_ids, min_confidence=MIN_STORED_CONFIDENCE):
+    '''
+    Matches newly inserted records of table against every user in one pass and stores the matches.
+    Returns the number of matches stored.
+    '''
+    if table not in ID_COLUMNS:
+        raise ValueError(f"Unsupported table {table}")
+    if len(record_ids) == 0:
+        return 0
+    cursor.execute(NEW_RECORD_CANDIDATES_QUERY.format(table=table, id_column=ID_COLUMNS[table]),
+                   {'record_ids': list(record_ids)})
+    columns = [desc[0] for desc in cursor.description]
+
+    matches = []
+    for row in cursor.fetchall():
+        user_id, first_name, last_name, department = row[:4]
+        candidate = dict(zip(columns[4:], row[4:]))
+        confidence = scoreCandidate(candidate, first_name, last_name, department)
+        if confidence >= min_confidence:
+            matches.append((user_id, candidate[ID_COLUMNS[table]], round(confidence, 3)))
+    storeMatches(cursor, table, matches)
+    return len(matches)
+
+def getMatchState(cursor, table, user_id):
+    '''
+    Returns the user's (first_name, last_name, primary_department), or None when the user doesn't exist,
+    and whether their stored matches in table were computed for them
+    '''
+    cursor.execute('SELECT first_name, last_name, primary_department FROM users WHERE user_id = %s', (user_id,))
+    user = cursor.fetchone()
+    if user is None:
+        return None, False
+    cursor.execute(
+        'SELECT first_name, last_name, primary_department FROM external_match_state WHERE user_id = %s AND source = %s',
+        (user_id, table)
+    )
+    return user, cursor.fetchone() == user
+
+def refreshUserMatches(cursor, table, user_id):
+    '''
+    Matches the user against the whole table when that hasn't been done for their current name and
+    department yet, replacing their stored matches. Returns False when the user doesn't exist.
+    '''
+    user, current = getMatchState(cursor, table, user_id)
+    if user is None:
+        return False
+    if current:
+        return True
+
+    first_name, last_name, department = user
+    matches = findMatches(cursor, table, first_name, last_name, department=department,
+                          min_confidence=MIN_STORED_CONFIDENCE)
+    id_index = [desc[0] for desc in cursor.description].index(ID_COLUMNS[table]) if matches else 0
+    cursor.execute('DELETE FROM external_record_matches WHERE user_id = %s AND source = %s', (user_id, table))
+    storeMatches(cursor, table, [(user_id, row[id_index], confidence) for row, confidence in matches])
+    cursor.execute('''
+        INSERT INTO external_match_state (user_id, source, first_name, last_name, primary_department, refreshed_at)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id, source) DO UPDATE SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name,
+            primary_department = EXCLUDED.primary_department, refreshed_at = EXCLUDED.refreshed_at
+    ''', (user_id, table, first_name, last_name, department))
+    return True
+
+def markMatchesSeen(cursor, table, user_id):
+    '''
+    Brings the user's stored matches in table up to date and records the visit, so that they are no
+    longer new. Returns False when the user doesn't exist. The caller commits.
+    '''
+    if table not in ID_COLUMNS:
+        raise ValueError(f"Unsupported table {table}")
+    if not refreshUserMatches(cursor, table, user_id):
+        return False
+    cursor.execute('''
+        UPDATE external_match_state SET visited_at = CURRENT_TIMESTAMP WHERE user_id = %s AND source = %s
+    ''', (user_id, table))
+    return True
+
+def getUserMatches(cursor, table, user_id, agencies=None):
+    '''
+    Returns (row, confidence, is_new) for the user's stored matches in table, best first. Only reads, so
+    it can run on the reader endpoint. Until markMatchesSeen has stored matches for the user's current name
+    and department they are matched live instead, with is_new None.
+    Stored records are scored again with the agencies the user already has grants from, which are not
+    known to the ETL, so both paths return the same records with the same confidence.
+    '''
+    if table not in ID_COLUMNS:
+        raise ValueError(f"Unsupported table {table}")
+    user, current = getMatchState(cursor, table, user_id)
+    if user is None:
+        return []
+    first_name, last_name, department = user
+    if not current:
+        return [(row, confidence, None) for row, confidence in findMatches(
+            cursor, table, first_name, last_name, department=department, agencies=agencies
+        )]
+    cursor.execute(USER_MATCHES_QUERY.format(table=table, id_column=ID_COLUMNS[table]), (user_id, table))
+    columns = [desc[0] for desc in cursor.description][:-2]
+    matches = []
+    for result in cursor.fetchall():
+        row, is_new = result[:-2], result[-1]
+        confidence = scoreCandidate(dict(zip(columns, row)), first_name, last_name, department, agencies)
+        if confidence >= MIN_CONFIDENCE:
+            matches.append((row, round(confidence, 3), is_new))
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches
@@ -4,6 +4,7 @@ import * as lambda from "aws-cdk-lib/aws-lambda";
 import * as iam from "aws-cdk-lib/aws-iam";
 import * as ec2 from "aws-cdk-lib/aws-ec2";
 import * as wafv2 from "aws-cdk-lib/aws-wafv2";
+import * as s3 from "aws-cdk-lib/aws-s3";
 import { Duration } from "aws-cdk-lib";
 import { Construct } from "constructs";
 import { Architecture, Code, Function, LayerVersion, Runtime } from "aws-cdk-lib/aws-lambda";
@@ -99,12 +100,46 @@ export class ApiStack extends cdk.Stack {
       layerVersionName: `${resourcePrefix}-openaiLayer`,
     });
 
+    const unidecodeLayer = new LayerVersion(this, "unidecodeLambdaLayer", {
+      code: Code.fromAsset("./layers/unidecode.zip"),
+      compatibleRuntimes: [Runtime.PYTHON_3_9],
+      description: "Lambda layer containing the unidecode Python library",
+      layerVersionName: `${resourcePrefix}-unidecodeLayer`,
+    });
+
+    const strsimpyLayer = new LayerVersion(this, "strsimpyLambdaLayer", {
+      code: Code.fromAsset("./layers/strsimpy.zip"),
+      compatibleRuntimes: [Runtime.PYTHON_3_9],
+      description: "Lambda layer containing the strsimpy Python library",
+      layerVersionName: `${resourcePrefix}-strsimpyLayer`,
+    });
+
+    // Fuzzy name matching against the grants, rise_data and patents tables, needs the unidecode and strsimpy layers
+    const nameMatchingLayer = new LayerVersion(this, "nameMatchingLambdaLayer", {
+      code: Code.fromAsset("./layers/nameMatching"),
+      compatibleRuntimes: [Runtime.PYTHON_3_9],
+      description: "Lambda layer containing the name matching module",
+      layerVersionName: `${resourcePrefix}-nameMatchingLayer`,
+    });
+
+    // Server side aggregation of CV entries, shared by the department and faculty wide CV data resolvers
+    const cvDataAggregatesLayer = new LayerVersion(this, "cvDataAggregatesLambdaLayer", {
+      code: Code.fromAsset("./layers/cvDataAggregates"),
+      compatibleRuntimes: [Runtime.PYTHON_3_9],
+      description: "Lambda layer containing the CV data aggregation module",
+      layerVersionName: `${resourcePrefix}-cvDataAggregatesLayer`,
+    });
+
     this.layerList["psycopg2"] = psycopgLayer;
     this.layerList["reportlab"] = reportLabLayer;
     this.layerList["requests"] = requestsLayer;
     this.layerList["aws-jwt-verify"] = awsJwtVerifyLayer;
     this.layerList["databaseConnect"] = databaseConnectLayer;
     this.layerList["openai"] = openailayer;
+    this.layerList["unidecode"] = unidecodeLayer;
+    this.layerList["strsimpy"] = strsimpyLayer;
+    this.layerList["nameMatching"] = nameMatchingLayer;
+    this.layerList["cvDataAggregates"] = cvDataAggregatesLayer;
 
     // AppSync API with both User Pool and API Key authorization
     this.api = new appsync.GraphqlApi(this, "FacultyCVApi", {
@@ -287,6 +322,149 @@ export class ApiStack extends cdk.Stack {
 
     rule.addTarget(new targets.LambdaFunction(deleteArchivedDataLambda));
 
+    // Private bucket for the audit_view partitions dropped after the retention period. Audit records
+    // are kept when the stack is deleted.
+    const auditArchiveBucket = new s3.Bucket(this, "AuditViewArchiveBucket", {
+      removalPolicy: cdk.RemovalPolicy.RETAIN,
+      publicReadAccess: false,
+      blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+      encryption: s3.BucketEncryption.S3_MANAGED,
+      enforceSSL: true,
+      lifecycleRules: [
+        {
+          // Archived partitions are kept for 7 years after they leave the database
+          prefix: "archive/audit_view/",
+          expiration: cdk.Duration.days(7 * 365),
+        },
+      ],
+      bucketName: `${resourcePrefix}-${this.account}-audit-archive-bucket`,
+    });
+
+    // The partition maintenance Lambda gets its own role, so it can write to the archive bucket and
+    // nothing else in S3
+    const maintainAuditViewPartitionsRole = new Role(this, "MaintainAuditViewPartitionsRole", {
+      assumedBy: new ServicePrincipal("lambda.amazonaws.com"),
+      roleName: `${resourcePrefix}-maintain-audit-view-partitions-role`,
+      managedPolicies: [ManagedPolicy.fromAwsManagedPolicyName("CloudWatchLogsFullAccess")],
+      description: "IAM role for the audit_view partition maintenance function",
+    });
+    maintainAuditViewPartitionsRole.addToPolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: [
+          //Secrets Manager
+          "secretsmanager:GetSecretValue",
+        ],
+        resources: [`arn:aws:secretsmanager:${this.region}:${this.account}:secret:*`],
+      })
+    );
+    maintainAuditViewPartitionsRole.addToPolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: [
+          //Needed to put the Lambda in a VPC
+          "ec2:CreateNetworkInterface",
+          "ec2:DescribeNetworkInterfaces",
+          "ec2:DeleteNetworkInterface",
+          "ec2:AssignPrivateIpAddresses",
+          "ec2:UnassignPrivateIpAddresses",
+        ],
+        resources: ["*"], // must be *
+      })
+    );
+    maintainAuditViewPartitionsRole.addToPolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: ["rds-db:connect"],
+        resources: [databaseStack.dbCluster.clusterArn],
+      })
+    );
+    auditArchiveBucket.grantPut(maintainAuditViewPartitionsRole);
+
+    // Lambda function to create upcoming audit_view partitions and archive expired ones
+    const maintainAuditViewPartitionsLambda = new Function(this, "MaintainAuditViewPartitionsLambda", {
+      functionName: `${resourcePrefix}-maintainAuditViewPartitionsLambda`,
+      runtime: Runtime.PYTHON_3_9,
+      memorySize: 512,
+      code: Code.fromAsset("./lambda/maintainAuditViewPartitions"),
+      handler: "handler.lambda_handler",
+      architecture: Architecture.X86_64,
+      timeout: cdk.Duration.minutes(15),
+      environment: {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+        AUDIT_VIEW_PARTITIONS_AHEAD: "3",
+        AUDIT_VIEW_RETENTION_MONTHS: "24",
+        AUDIT_VIEW_ARCHIVE_BUCKET: auditArchiveBucket.bucketName,
+      },
+      role: maintainAuditViewPartitionsRole,
+      layers: [psycopgLayer, databaseConnectLayer],
+      vpc: databaseStack.dbCluster.vpc, // Same VPC as the database
+    });
+
+    const auditViewPartitionsRule = new events.Rule(this, "AuditViewPartitionsScheduleRule", {
+      schedule: events.Schedule.rate(cdk.Duration.days(1)),
+      ruleName: `${resourcePrefix}-auditViewPartitionsScheduleRule`,
+    });
+
+    auditViewPartitionsRule.addTarget(new targets.LambdaFunction(maintainAuditViewPartitionsLambda));
+
+    // Lambda function to record the CV PDFs written to and deleted from the CV bucket in generated_cvs
+    const registerGeneratedCVLambda = new Function(this, "RegisterGeneratedCVLambda", {
+      functionName: `${resourcePrefix}-registerGeneratedCVLambda`,
+      runtime: Runtime.PYTHON_3_9,
+      memorySize: 512,
+      code: Code.fromAsset("./lambda/registerGeneratedCV"),
+      handler: "handler.lambda_handler",
+      architecture: Architecture.X86_64,
+      timeout: cdk.Duration.minutes(1),
+      environment: {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+      },
+      role: this.resolverRole,
+      layers: [psycopgLayer, databaseConnectLayer],
+      vpc: databaseStack.dbCluster.vpc, // Same VPC as the database
+    });
+
+    // The CV bucket sends its events to EventBridge
+    const generatedCVsRule = new events.Rule(this, "GeneratedCVsRule", {
+      ruleName: `${resourcePrefix}-generatedCVsRule`,
+      eventPattern: {
+        source: ["aws.s3"],
+        detailType: ["Object Created", "Object Deleted"],
+        detail: {
+          bucket: { name: [cvGenStack.cvS3Bucket.bucketName] },
+          object: { key: events.Match.suffix(".pdf") },
+        },
+      },
+    });
+
+    generatedCVsRule.addTarget(new targets.LambdaFunction(registerGeneratedCVLambda));
+
+    // Lambda function to backfill generated_cvs from a full listing of the CV bucket and repair missed events
+    const reconcileGeneratedCVsLambda = new Function(this, "ReconcileGeneratedCVsLambda", {
+      functionName: `${resourcePrefix}-reconcileGeneratedCVsLambda`,
+      runtime: Runtime.PYTHON_3_9,
+      memorySize: 512,
+      code: Code.fromAsset("./lambda/reconcileGeneratedCVs"),
+      handler: "handler.lambda_handler",
+      architecture: Architecture.X86_64,
+      timeout: cdk.Duration.minutes(15),
+      environment: {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+        BUCKET_NAME: cvGenStack.cvS3Bucket.bucketName,
+      },
+      role: this.resolverRole,
+      layers: [psycopgLayer, databaseConnectLayer],
+      vpc: databaseStack.dbCluster.vpc, // Same VPC as the database
+    });
+
+    const reconcileGeneratedCVsRule = new events.Rule(this, "ReconcileGeneratedCVsScheduleRule", {
+      schedule: events.Schedule.rate(cdk.Duration.days(1)),
+      ruleName: `${resourcePrefix}-reconcileGeneratedCVsScheduleRule`,
+    });
+
+    reconcileGeneratedCVsRule.addTarget(new targets.LambdaFunction(reconcileGeneratedCVsLambda));
+
     // Waf Firewall
     const waf = new wafv2.CfnWebACL(this, "waf", {
       name: `${resourcePrefix}-waf`,
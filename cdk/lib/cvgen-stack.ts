@@ -33,10 +33,12 @@ export class CVGenStack extends Stack {
             bucketName: `${resourcePrefix}-${this.account}-cv-bucket`
         });
 
-        // DynamoDB to store a log of transactions across data sections
-        this.dynamoDBTable = new Table(this, 'cvLogTable', {
-            partitionKey: { name: 'logEntryId', type: AttributeType.STRING },
-            tableName: `${resourcePrefix}-${this.account}-CVLogTable`
+        // DynamoDB table with the time of the last change to each user's CV, read by cvIsUpToDate with keyed lookups.
+        // template_id '*' holds changes to all of a user's CVs
+        this.dynamoDBTable = new Table(this, 'cvLastModifiedTable', {
+            partitionKey: { name: 'user_id', type: AttributeType.STRING },
+            sortKey: { name: 'template_id', type: AttributeType.STRING },
+            tableName: `${resourcePrefix}-${this.account}-CVLastModifiedTable`
         });
 
         const cvGenLambda = new DockerImageFunction(this, 'cvGenFunction', {
@@ -7,6 +7,7 @@ import * as elbv2 from 'aws-cdk-lib/aws-elasticloadbalancingv2';
 import * as s3n from 'aws-cdk-lib/aws-s3-notifications';
 import * as appsync from 'aws-cdk-lib/aws-appsync';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { Construct } from 'constructs';
 import { ApiStack } from './api-stack';
 
@@ -43,6 +44,24 @@ export class GotenbergStack extends cdk.Stack {
                     exposedHeaders: ['ETag']
                 }
             ],
+            lifecycleRules: [
+                {
+                    // PDFs cached by generateGotenbergPdf under the hash of their HTML, and DOCX cached by
+                    // pdf2docx under the ETag of their PDF
+                    prefix: 'cache/',
+                    expiration: cdk.Duration.days(30),
+                },
+                {
+                    // HTML and PDFs of department batch jobs, kept as long as the job records
+                    prefix: 'batch/',
+                    expiration: cdk.Duration.days(30),
+                },
+                {
+                    // Merged CV packets built by buildCVPacket
+                    prefix: 'packets/',
+                    expiration: cdk.Duration.days(30),
+                }
+            ],
             removalPolicy: cdk.RemovalPolicy.DESTROY,
         });
 
@@ -187,6 +206,14 @@ export class GotenbergStack extends cdk.Stack {
         // Import the API key from the exported value
         const apiKey = cdk.Fn.importValue(`${resourcePrefix}-ApiKey`);
 
+        // Multipart body, PDF cache and completion notification shared by the Lambdas that call Gotenberg
+        const gotenbergCommonLayer = new lambda.LayerVersion(this, 'GotenbergCommonLayer', {
+            code: lambda.Code.fromAsset('./layers/gotenbergCommon'),
+            compatibleRuntimes: [lambda.Runtime.PYTHON_3_9],
+            description: 'Lambda layer containing the helpers shared by the Gotenberg Lambdas',
+            layerVersionName: `${resourcePrefix}-gotenbergCommonLayer`,
+        });
+
         // generateGotenbergPdf Lambda
         const generatePdfLambda = new lambda.Function(this, 'GenerateGotenbergPdf', {
             functionName: `${resourcePrefix}-generateGotenbergPdf`,
@@ -194,6 +221,7 @@ export class GotenbergStack extends cdk.Stack {
             handler: 'resolver.lambda_handler',
             code: lambda.Code.fromAsset('./lambda/generateGotenbergPdf'),
             role: lambdaRole,
+            layers: [gotenbergCommonLayer],
             environment: {
                 BUCKET_NAME: gotenbergBucket.bucketName,
                 GOTENBERG_HOST: alb.loadBalancerDnsName,
@@ -203,7 +231,83 @@ export class GotenbergStack extends cdk.Stack {
             timeout: cdk.Duration.minutes(15),
         });
 
-        // pdf2docx Lambda (Docker)
+        // Department batch jobs, progress is written by generateGotenbergBatch
+        const batchJobTable = new dynamodb.Table(this, 'CVBatchJobTable', {
+            tableName: `${resourcePrefix}-CVBatchJobTable`,
+            partitionKey: { name: 'job_id', type: dynamodb.AttributeType.STRING },
+            billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+            timeToLiveAttribute: 'expires_at',
+            removalPolicy: cdk.RemovalPolicy.DESTROY,
+        });
+        batchJobTable.grantReadWriteData(lambdaRole);
+
+        // generateGotenbergBatch Lambda, renders all CVs of a batch job with a bounded pool of keep-alive connections
+        const generateBatchLambda = new lambda.Function(this, 'GenerateGotenbergBatch', {
+            functionName: `${resourcePrefix}-generateGotenbergBatch`,
+            runtime: lambda.Runtime.PYTHON_3_9,
+            handler: 'resolver.lambda_handler',
+            code: lambda.Code.fromAsset('./lambda/generateGotenbergBatch'),
+            role: lambdaRole,
+            layers: [gotenbergCommonLayer],
+            memorySize: 1024,
+            environment: {
+                BUCKET_NAME: gotenbergBucket.bucketName,
+                TABLE_NAME: batchJobTable.tableName,
+                GOTENBERG_HOST: alb.loadBalancerDnsName,
+                APPSYNC_ENDPOINT: apiStack.getApi().graphqlUrl,
+                // Two Chromium renders per Gotenberg task
+                MAX_WORKERS: '4',
+            },
+            timeout: cdk.Duration.minutes(15),
+        });
+
+        // buildCVPacket Lambda, merges generated CVs into one PDF in chunks through Gotenberg's merge route
+        const buildPacketLambda = new lambda.Function(this, 'BuildCVPacket', {
+            functionName: `${resourcePrefix}-buildCVPacket`,
+            runtime: lambda.Runtime.PYTHON_3_9,
+            handler: 'resolver.lambda_handler',
+            code: lambda.Code.fromAsset('./lambda/buildCVPacket'),
+            role: lambdaRole,
+            layers: [gotenbergCommonLayer],
+            memorySize: 512,
+            // Merged chunks are written to /tmp before they are uploaded
+            ephemeralStorageSize: cdk.Size.gibibytes(4),
+            environment: {
+                BUCKET_NAME: gotenbergBucket.bucketName,
+                GOTENBERG_HOST: alb.loadBalancerDnsName,
+                APPSYNC_ENDPOINT: apiStack.getApi().graphqlUrl,
+                MERGE_CHUNK_SIZE: '25',
+            },
+            timeout: cdk.Duration.minutes(15),
+        });
+
+        // Starting a job and continuing it when an invocation runs out of time, and building packets and DOCX asynchronously
+        lambdaRole.addToPolicy(new iam.PolicyStatement({
+            effect: iam.Effect.ALLOW,
+            actions: ['lambda:InvokeFunction'],
+            resources: [
+                `arn:aws:lambda:${this.region}:${this.account}:function:${resourcePrefix}-generateGotenbergBatch`,
+                `arn:aws:lambda:${this.region}:${this.account}:function:${resourcePrefix}-buildCVPacket`,
+                `arn:aws:lambda:${this.region}:${this.account}:function:${resourcePrefix}-pdf2docx`,
+            ],
+        }));
+
+        // cvBatchJob Lambda, resolves createCVBatchJob, startCVBatchJob and getCVBatchJob
+        const batchJobLambda = new lambda.Function(this, 'CVBatchJob', {
+            functionName: `${resourcePrefix}-cvBatchJob`,
+            runtime: lambda.Runtime.PYTHON_3_9,
+            handler: 'resolver.lambda_handler',
+            code: lambda.Code.fromAsset('./lambda/cvBatchJob'),
+            role: lambdaRole,
+            environment: {
+                TABLE_NAME: batchJobTable.tableName,
+                BATCH_FUNCTION_NAME: generateBatchLambda.functionName,
+            },
+            timeout: cdk.Duration.seconds(30),
+        });
+
+        // pdf2docx Lambda (Docker), requestDocx starts a conversion again when it ran longer than this
+        const pdf2docxTimeout = cdk.Duration.minutes(15);
         const pdf2docxLambda = new lambda.DockerImageFunction(this, 'Pdf2DocxLambda', {
             functionName: `${resourcePrefix}-pdf2docx`,
             code: lambda.DockerImageCode.fromImageAsset('./pdf2docx', {
@@ -221,21 +325,33 @@ export class GotenbergStack extends cdk.Stack {
                 APPSYNC_API_KEY: apiKey,
                 PDF_SERVICES_CLIENT_ID: process.env.PDF_SERVICES_CLIENT_ID || '',
                 PDF_SERVICES_CLIENT_SECRET: process.env.PDF_SERVICES_CLIENT_SECRET || '',
+                // 'adobe' (default) or 'local' to convert with pdf2docx without leaving the Lambda
+                DOCX_CONVERTER: process.env.DOCX_CONVERTER || 'adobe',
             },
-            timeout: cdk.Duration.minutes(15),
+            timeout: pdf2docxTimeout,
         });
 
-        // S3 Triggers
-        gotenbergBucket.addEventNotification(
-            s3.EventType.OBJECT_CREATED,
-            new s3n.LambdaDestination(generatePdfLambda),
-            { suffix: '.html' }
-        );
+        // requestDocx Lambda, converts a generated CV to DOCX on demand through pdf2docx unless it is cached
+        const requestDocxLambda = new lambda.Function(this, 'RequestDocx', {
+            functionName: `${resourcePrefix}-requestDocx`,
+            runtime: lambda.Runtime.PYTHON_3_9,
+            handler: 'resolver.lambda_handler',
+            code: lambda.Code.fromAsset('./lambda/requestDocx'),
+            role: lambdaRole,
+            environment: {
+                BUCKET_NAME: gotenbergBucket.bucketName,
+                CONVERTER_FUNCTION_NAME: pdf2docxLambda.functionName,
+                CONVERTER_TIMEOUT_SECONDS: pdf2docxTimeout.toSeconds().toString(),
+            },
+            timeout: cdk.Duration.seconds(30),
+        });
 
+        // S3 Triggers, DOCX are only converted when requested through requestDocx
         gotenbergBucket.addEventNotification(
             s3.EventType.OBJECT_CREATED,
-            new s3n.LambdaDestination(pdf2docxLambda),
-            { suffix: '.pdf' }
+            new s3n.LambdaDestination(generatePdfLambda),
+            // Batch job HTML under batch/ is rendered by generateGotenbergBatch
+            { prefix: 'html/', suffix: '.html' }
         );
 
         // GraphQL Resolver for getPresignedGotenbergBucketUrl
@@ -331,6 +447,121 @@ def handler(event, context):
             runtime: appsync.FunctionRuntime.JS_1_0_0,
         });
 
+        // GraphQL Resolvers for the department batch jobs
+        const batchJobDataSource = new appsync.LambdaDataSource(this, 'CVBatchJobDataSource', {
+            api: apiStack.getApi(),
+            lambdaFunction: batchJobLambda,
+            name: 'cvBatchJobDataSource',
+        });
+
+        const batchJobFields: [string, string][] = [
+            ['Mutation', 'createCVBatchJob'],
+            ['Mutation', 'startCVBatchJob'],
+            ['Query', 'getCVBatchJob'],
+        ];
+        for (const [typeName, fieldName] of batchJobFields) {
+            new appsync.Resolver(this, `${fieldName}Resolver`, {
+                api: apiStack.getApi(),
+                dataSource: batchJobDataSource,
+                typeName: typeName,
+                fieldName: fieldName,
+                code: appsync.Code.fromInline(`
+        import { util } from '@aws-appsync/utils';
+
+        export function request(ctx) {
+            return {
+                operation: 'Invoke',
+                payload: {
+                    fieldName: ctx.info.fieldName,
+                    arguments: ctx.arguments,
+                },
+            };
+        }
+
+        export function response(ctx) {
+            const { result, error } = ctx;
+            if (error) {
+                util.error(error.message, error.type, result);
+            }
+            return result;
+        }
+      `),
+                runtime: appsync.FunctionRuntime.JS_1_0_0,
+            });
+        }
+
+        // GraphQL Resolver for createCVPacket
+        const buildPacketDataSource = new appsync.LambdaDataSource(this, 'BuildCVPacketDataSource', {
+            api: apiStack.getApi(),
+            lambdaFunction: buildPacketLambda,
+            name: 'buildCVPacketDataSource',
+        });
+
+        new appsync.Resolver(this, 'CreateCVPacketResolver', {
+            api: apiStack.getApi(),
+            dataSource: buildPacketDataSource,
+            typeName: 'Mutation',
+            fieldName: 'createCVPacket',
+            code: appsync.Code.fromInline(`
+        import { util } from '@aws-appsync/utils';
+
+        export function request(ctx) {
+            return {
+                operation: 'Invoke',
+                payload: {
+                    fieldName: ctx.info.fieldName,
+                    arguments: ctx.arguments,
+                },
+            };
+        }
+
+        export function response(ctx) {
+            const { result, error } = ctx;
+            if (error) {
+                util.error(error.message, error.type, result);
+            }
+            return result;
+        }
+      `),
+            runtime: appsync.FunctionRuntime.JS_1_0_0,
+        });
+
+        // GraphQL Resolver for requestDocx
+        const requestDocxDataSource = new appsync.LambdaDataSource(this, 'RequestDocxDataSource', {
+            api: apiStack.getApi(),
+            lambdaFunction: requestDocxLambda,
+            name: 'requestDocxDataSource',
+        });
+
+        new appsync.Resolver(this, 'RequestDocxResolver', {
+            api: apiStack.getApi(),
+            dataSource: requestDocxDataSource,
+            typeName: 'Mutation',
+            fieldName: 'requestDocx',
+            code: appsync.Code.fromInline(`
+        import { util } from '@aws-appsync/utils';
+
+        export function request(ctx) {
+            return {
+                operation: 'Invoke',
+                payload: {
+                    fieldName: ctx.info.fieldName,
+                    arguments: ctx.arguments,
+                },
+            };
+        }
+
+        export function response(ctx) {
+            const { result, error } = ctx;
+            if (error) {
+                util.error(error.message, error.type, result);
+            }
+            return result;
+        }
+      `),
+            runtime: appsync.FunctionRuntime.JS_1_0_0,
+        });
+
         // Outputs
         new cdk.CfnOutput(this, 'GotenbergBucketNameProd', {
             value: gotenbergBucket.bucketName,
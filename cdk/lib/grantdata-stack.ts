@@ -347,7 +347,7 @@ export class GrantDataStack extends Stack {
         "library-set": "analytics",
         "--SECRET_NAME": databaseStack.secretPath,
         "--BUCKET_NAME": grantDataS3Bucket.bucketName,
-        "--additional-python-modules": "psycopg2-binary"
+        "--additional-python-modules": "psycopg2-binary,unidecode"
     };
     
     // Glue Job: clean cihr data
@@ -500,7 +500,12 @@ export class GrantDataStack extends Stack {
     maxCapacity: MAX_CAPACITY,
     timeout: TIMEOUT, // 120 min timeout duration
     glueVersion: GLUE_VER,
-    defaultArguments: defaultArguments,
+    defaultArguments: {
+        ...defaultArguments,
+        // matches the inserted rows against the users with the module shared with the match resolvers
+        "--additional-python-modules": "psycopg2-binary,unidecode,strsimpy",
+        "--extra-py-files": "s3://" + this.glueS3Bucket.bucketName + "/scripts/shared/nameMatching.py",
+    },
     });
 
     // Deploy glue job to glue S3 bucket
@@ -510,6 +515,13 @@ export class GrantDataStack extends Stack {
     destinationKeyPrefix: "scripts/grants-etl",
     });
 
+    // Deploy the name matching module, also used by the storeEpoPatents job of the patent stack
+    new s3deploy.BucketDeployment(this, "DeployGlueSharedFiles", {
+    sources: [s3deploy.Source.asset("./layers/nameMatching/python")],
+    destinationBucket: this.glueS3Bucket,
+    destinationKeyPrefix: "scripts/shared",
+    });
+
     // Grant S3 read/write role to Glue
     this.glueS3Bucket.grantReadWrite(glueRole);
     grantDataS3Bucket.grantReadWrite(glueRole);
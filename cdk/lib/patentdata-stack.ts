@@ -97,7 +97,7 @@ export class PatentDataStack extends Stack {
       "--EPO_INSTITUTION_NAME": epoInstitutionName.valueAsString,
       "--FILE_PATH": "",
       "--EQUIVALENT": "false",
-      "--additional-python-modules": "psycopg2-binary",
+      "--additional-python-modules": "psycopg2-binary,unidecode",
       "--RESOURCE_PREFIX": resourcePrefix
     };
 
@@ -176,7 +176,12 @@ export class PatentDataStack extends Stack {
       maxCapacity: MAX_CAPACITY,
       timeout: TIMEOUT, // 120 min timeout duration
       glueVersion: GLUE_VER,
-      defaultArguments: defaultArguments,
+      defaultArguments: {
+        ...defaultArguments,
+        // matches the inserted rows against the users, the module is deployed by the grant data stack
+        "--additional-python-modules": "psycopg2-binary,unidecode,strsimpy",
+        "--extra-py-files": "s3://" + glueS3Bucket.bucketName + "/scripts/shared/nameMatching.py",
+      },
     });
 
     // Deploy glue job to glue S3 bucket
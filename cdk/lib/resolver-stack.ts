@@ -341,6 +341,7 @@ export class ResolverStack extends cdk.Stack {
       ["addBatchedUserCVData"],
       "Mutation",
       {
+        TABLE_NAME: cvGenStack.dynamoDBTable.tableName,
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
       },
       resolverRole,
@@ -4,6 +4,8 @@ import { Construct } from "constructs";
 import { Architecture, Code, Function, LayerVersion, Runtime } from "aws-cdk-lib/aws-lambda";
 import { Role } from "aws-cdk-lib/aws-iam";
 import * as iam from "aws-cdk-lib/aws-iam";
+import * as sqs from "aws-cdk-lib/aws-sqs";
+import { SqsEventSource } from "aws-cdk-lib/aws-lambda-event-sources";
 import { DatabaseStack } from "./database-stack";
 import { CVGenStack } from "./cvgen-stack";
 import { ApiStack } from "./api-stack";
@@ -26,6 +28,7 @@ export class Resolver2Stack extends cdk.Stack {
 
     const psycopgLayer = apiStack.getLayers()["psycopg2"];
     const databaseConnectLayer = apiStack.getLayers()["databaseConnect"];
+    const cvDataAggregatesLayer = apiStack.getLayers()["cvDataAggregates"];
     const openaiLayer = apiStack.getLayers()["openai"];
     const reportLabLayer = apiStack.getLayers()["reportlab"];
     const requestsLayer = apiStack.getLayers()["requests"];
@@ -101,6 +104,31 @@ export class Resolver2Stack extends cdk.Stack {
       [psycopgLayer, databaseConnectLayer]
     );
 
+    createResolver(
+      apiStack.getApi(),
+      "getUserCVBundle",
+      ["getUserCVBundle"],
+      "Query",
+      {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
+      },
+      resolverRole,
+      [psycopgLayer, databaseConnectLayer]
+    );
+
+    // Uses the writer endpoint: the watermark depends on transactions that are still open on the writer
+    createResolver(
+      apiStack.getApi(),
+      "getUserCVDataChanges",
+      ["getUserCVDataChanges"],
+      "Query",
+      {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+      },
+      resolverRole,
+      [psycopgLayer, databaseConnectLayer]
+    );
+
     createResolver(
       apiStack.getApi(),
       "getAllSectionCVData",
@@ -122,7 +150,7 @@ export class Resolver2Stack extends cdk.Stack {
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
       },
       resolverRole,
-      [psycopgLayer, databaseConnectLayer]
+      [psycopgLayer, databaseConnectLayer, cvDataAggregatesLayer]
     );
 
     createResolver(
@@ -134,7 +162,7 @@ export class Resolver2Stack extends cdk.Stack {
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
       },
       resolverRole,
-      [psycopgLayer, databaseConnectLayer]
+      [psycopgLayer, databaseConnectLayer, cvDataAggregatesLayer]
     );
 
     createResolver(
@@ -376,7 +404,6 @@ export class Resolver2Stack extends cdk.Stack {
       ["getNumberOfGeneratedCVs"],
       "Query",
       {
-        BUCKET_NAME: cvGenStack.cvS3Bucket.bucketName,
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
       },
       resolverRole,
@@ -471,6 +498,30 @@ export class Resolver2Stack extends cdk.Stack {
       [psycopgLayer, databaseConnectLayer]
     );
 
+    // Audit events are queued by addAuditView and written in batches by flushAuditView, so page views
+    // do not hold a database connection on the user's critical path
+    const auditViewDeadLetterQueue = new sqs.Queue(this, "AuditViewDeadLetterQueue", {
+      queueName: `${resourcePrefix}-audit-view-dlq`,
+      retentionPeriod: cdk.Duration.days(14),
+    });
+
+    const auditViewQueue = new sqs.Queue(this, "AuditViewQueue", {
+      queueName: `${resourcePrefix}-audit-view-queue`,
+      visibilityTimeout: cdk.Duration.minutes(6),
+      deadLetterQueue: { queue: auditViewDeadLetterQueue, maxReceiveCount: 5 },
+    });
+
+    new iam.Policy(this, "AuditViewQueueSendPolicy", {
+      roles: [resolverRole],
+      statements: [
+        new iam.PolicyStatement({
+          effect: iam.Effect.ALLOW,
+          actions: ["sqs:SendMessage"],
+          resources: [auditViewQueue.queueArn],
+        }),
+      ],
+    });
+
     createResolver(
       apiStack.getApi(),
       "addAuditView",
@@ -478,9 +529,64 @@ export class Resolver2Stack extends cdk.Stack {
       "Mutation",
       {
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+        AUDIT_INGESTION_MODE: "queue",
+        AUDIT_QUEUE_URL: auditViewQueue.queueUrl,
       },
       resolverRole,
       [psycopgLayer, databaseConnectLayer]
     );
+
+    const flushAuditViewRole = new iam.Role(this, "FlushAuditViewRole", {
+      roleName: `${resourcePrefix}-flush-audit-view-role`,
+      assumedBy: new iam.ServicePrincipal("lambda.amazonaws.com"),
+      managedPolicies: [iam.ManagedPolicy.fromAwsManagedPolicyName("CloudWatchLogsFullAccess")],
+    });
+    flushAuditViewRole.addToPolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: [
+          //Needed to put the Lambda in a VPC
+          "ec2:DescribeNetworkInterfaces",
+          "ec2:CreateNetworkInterface",
+          "ec2:DeleteNetworkInterface",
+          "ec2:AssignPrivateIpAddresses",
+          "ec2:UnassignPrivateIpAddresses",
+        ],
+        resources: ["*"], // must be *
+      })
+    );
+    flushAuditViewRole.addToPolicy(
+      new iam.PolicyStatement({
+        effect: iam.Effect.ALLOW,
+        actions: ["secretsmanager:GetSecretValue"],
+        resources: [`arn:aws:secretsmanager:${this.region}:${this.account}:secret:*`],
+      })
+    );
+
+    const flushAuditViewLambda = new Function(this, "facultycv-flushAuditView", {
+      functionName: `${resourcePrefix}-flushAuditView`,
+      runtime: Runtime.PYTHON_3_9,
+      memorySize: 512,
+      code: Code.fromAsset("./lambda/flushAuditView"),
+      handler: "handler.lambda_handler",
+      architecture: Architecture.X86_64,
+      timeout: cdk.Duration.minutes(1),
+      environment: {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+      },
+      role: flushAuditViewRole,
+      layers: [psycopgLayer, databaseConnectLayer],
+      vpc: databaseStack.dbCluster.vpc, // Same VPC as the database
+    });
+
+    // Up to 500 events or 30 seconds per batch, and at most two concurrent flushes holding a connection
+    flushAuditViewLambda.addEventSource(
+      new SqsEventSource(auditViewQueue, {
+        batchSize: 500,
+        maxBatchingWindow: cdk.Duration.seconds(30),
+        maxConcurrency: 2,
+        reportBatchItemFailures: true,
+      })
+    );
   }
 }
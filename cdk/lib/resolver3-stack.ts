@@ -32,6 +32,9 @@ export class Resolver3Stack extends cdk.Stack {
     const reportLabLayer = apiStack.getLayers()["reportlab"];
     const requestsLayer = apiStack.getLayers()["requests"];
     const awsJwtVerifyLayer = apiStack.getLayers()["aws-jwt-verify"];
+    const unidecodeLayer = apiStack.getLayers()["unidecode"];
+    const strsimpyLayer = apiStack.getLayers()["strsimpy"];
+    const nameMatchingLayer = apiStack.getLayers()["nameMatching"];
     const resolverRole = apiStack.getResolverRole();
 
     // GraphQL Resolvers
@@ -143,6 +146,7 @@ export class Resolver3Stack extends cdk.Stack {
       ["deleteUserCVSectionData"],
       "Mutation",
       {
+        TABLE_NAME: cvGenStack.dynamoDBTable.tableName,
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
       },
       resolverRole,
@@ -215,7 +219,6 @@ export class Resolver3Stack extends cdk.Stack {
       ["updateTemplate"],
       "Mutation",
       {
-        TABLE_NAME: cvGenStack.dynamoDBTable.tableName,
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
       },
       resolverRole,
@@ -265,7 +268,7 @@ export class Resolver3Stack extends cdk.Stack {
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
       },
       resolverRole,
-      [psycopgLayer, databaseConnectLayer]
+      [psycopgLayer, databaseConnectLayer, unidecodeLayer, strsimpyLayer, nameMatchingLayer]
     );
 
     createResolver(
@@ -277,7 +280,7 @@ export class Resolver3Stack extends cdk.Stack {
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
       },
       resolverRole,
-      [psycopgLayer, databaseConnectLayer]
+      [psycopgLayer, databaseConnectLayer, unidecodeLayer, strsimpyLayer, nameMatchingLayer]
     );
 
     createResolver(
@@ -289,7 +292,32 @@ export class Resolver3Stack extends cdk.Stack {
         DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
       },
       resolverRole,
-      [psycopgLayer, databaseConnectLayer]
+      [psycopgLayer, databaseConnectLayer, unidecodeLayer, strsimpyLayer, nameMatchingLayer]
+    );
+
+    createResolver(
+      apiStack.getApi(),
+      "getNewExternalMatchCounts",
+      ["getNewExternalMatchCounts"],
+      "Query",
+      {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpointReader,
+      },
+      resolverRole,
+      [psycopgLayer, databaseConnectLayer, unidecodeLayer, strsimpyLayer, nameMatchingLayer]
+    );
+
+    // Stores the user's matches and records the visit, the match queries above only read
+    createResolver(
+      apiStack.getApi(),
+      "markExternalMatchesSeen",
+      ["markExternalMatchesSeen"],
+      "Mutation",
+      {
+        DB_PROXY_ENDPOINT: databaseStack.rdsProxyEndpoint,
+      },
+      resolverRole,
+      [psycopgLayer, databaseConnectLayer, unidecodeLayer, strsimpyLayer, nameMatchingLayer]
     );
   }
 }
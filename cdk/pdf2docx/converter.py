@@ -5,8 +5,10 @@ import json
 import logging
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
-from urllib.parse import unquote_plus
 import multiprocessing
+import time
+import fitz
+from pdf2docx import Converter
 from adobe.pdfservices.operation.auth.service_principal_credentials import ServicePrincipalCredentials
 from adobe.pdfservices.operation.exception.exceptions import ServiceApiException, ServiceUsageException, SdkException
 from adobe.pdfservices.operation.io.cloud_asset import CloudAsset
@@ -25,8 +27,13 @@ s3_client = boto3.client("s3")
 
 # Environment variables for AppSync
 APPSYNC_ENDPOINT = os.environ.get('APPSYNC_ENDPOINT')
+BUCKET_NAME = os.environ.get('BUCKET_NAME')
 PDF_SERVICES_CLIENT_ID = os.environ.get('PDF_SERVICES_CLIENT_ID')
 PDF_SERVICES_CLIENT_SECRET = os.environ.get('PDF_SERVICES_CLIENT_SECRET')
+# 'adobe' converts with Adobe PDF Services, 'local' with the pdf2docx library inside the Lambda
+DOCX_CONVERTER = os.environ.get('DOCX_CONVERTER', 'adobe')
+# Converted DOCX keyed by the ETag of their PDF, shared with the requestDocx resolver
+DOCX_CACHE_PREFIX = "cache/docx/"
 
 def notify_docx_complete(docx_key):
     """Call the GraphQL mutation to notify that DOCX conversion is complete"""
@@ -80,9 +87,11 @@ def notify_docx_complete(docx_key):
         print(f"Failed to send DOCX notification: {str(e)}")
         # Don't fail the entire function if notification fails
 
-def download_file_from_s3(bucket_name, s3_file_key, local_file_path):
+def download_file_from_s3(bucket_name, s3_file_key, local_file_path, etag=None):
     try:
-        s3_client.download_file(bucket_name, s3_file_key, local_file_path)
+        # With an ETag the download fails if the file was replaced since
+        extra_args = {'IfMatch': etag} if etag else None
+        s3_client.download_file(bucket_name, s3_file_key, local_file_path, ExtraArgs=extra_args)
         print(f"Downloaded {s3_file_key} from {bucket_name} to {local_file_path}")
     except botocore.exceptions.ClientError as e:
         print(f"Error downloading file: {e}")
@@ -141,6 +150,78 @@ def convert_pdf_to_docx(input_pdf, output_docx):
         logger.error(f"Error converting PDF to DOCX: {e}")
         raise e
 
+def parse_pages_process(input_pdf, page_indexes, json_path):
+    """Parse some pages of the PDF with pdf2docx and store the parsed layout in json_path"""
+    cv = Converter(input_pdf)
+    try:
+        settings = cv.default_settings
+        cv.load_pages(pages=page_indexes).parse_document(**settings).parse_pages(**settings).serialize(json_path)
+    finally:
+        cv.close()
+
+def convert_pdf_to_docx_locally(input_pdf, output_docx, workers=None):
+    """
+    Convert PDF to DOCX with pdf2docx, parsing the pages in one process per vCPU.
+    pdf2docx's own multi_processing option uses multiprocessing.Pool, which needs /dev/shm and does not
+    work in Lambda, so the pages are split over plain processes that write their results to JSON files.
+    """
+    with fitz.open(input_pdf) as pdf:
+        page_count = len(pdf)
+    if page_count == 0:
+        raise Exception("PDF has no pages")
+    workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+
+    if workers == 1:
+        cv = Converter(input_pdf)
+        try:
+            cv.convert(output_docx)
+        finally:
+            cv.close()
+        logger.info(f"Converted {input_pdf} to {output_docx} locally, {page_count} pages")
+        return
+
+    # Every worker takes every n-th page so long and short pages are spread evenly
+    json_paths = [f"pages-{i}.json" for i in range(workers)]
+    processes = [
+        multiprocessing.Process(
+            target=parse_pages_process,
+            args=(input_pdf, list(range(i, page_count, workers)), json_paths[i])
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    try:
+        failed = [i for i, process in enumerate(processes) if process.exitcode != 0]
+        if failed:
+            raise Exception(f"Parsing pages failed in {len(failed)} of {workers} processes")
+
+        cv = Converter(input_pdf)
+        try:
+            for json_path in json_paths:
+                cv.deserialize(json_path)
+            cv.make_docx(output_docx, **cv.default_settings)
+        finally:
+            cv.close()
+    finally:
+        for json_path in json_paths:
+            if os.path.exists(json_path):
+                os.remove(json_path)
+    logger.info(f"Converted {input_pdf} to {output_docx} locally, {page_count} pages in {workers} processes")
+
+def is_docx_cached(bucket_name, cache_key):
+    """Check whether a DOCX was already converted from an identical PDF"""
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=cache_key)
+        return True
+    except botocore.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
 def upload_file_to_s3(file_name, bucket_name, s3_file_key):
     try:
         s3_client.upload_file(file_name, bucket_name, s3_file_key)
@@ -235,13 +316,10 @@ def handler(event, context):
                 os.remove(file)
                 print(f"Removed existing {file}")
 
-        # Get bucket and key from S3 event
-        record = event['Records'][0]['s3']
-        bucket_name = record['bucket']['name']
-        pdf_key = unquote_plus(record['object']['key'])
-
-        # Construct DOCX key: replace 'pdf/' with 'docx/' and .pdf → .docx
-        docx_key = pdf_key.replace("pdf/", "docx/").rsplit(".", 1)[0] + ".docx"
+        # Invoked asynchronously by requestDocx when a DOCX is requested that is not in the cache
+        bucket_name = BUCKET_NAME
+        pdf_key = event['pdf_key']
+        docx_key = event['docx_key']
 
         # Start alarm process that will send timeout notification
         alarm_proc = multiprocessing.Process(
@@ -256,7 +334,9 @@ def handler(event, context):
                 Key=pdf_key,
                 Tagging={
                     'TagSet': [
-                        {'Key': 'isDocxComplete', 'Value': 'false'}
+                        {'Key': 'isDocxComplete', 'Value': 'false'},
+                        # requestDocx starts the conversion again once this is older than the Lambda timeout
+                        {'Key': 'docxRequestedAt', 'Value': str(int(time.time()))}
                     ]
                 }
             )
@@ -274,26 +354,48 @@ def handler(event, context):
         local_pdf_path = "input.pdf"
         local_docx_path = "output.docx"
 
-        # Download PDF
-        download_file_from_s3(bucket_name, pdf_key, local_pdf_path)
+        # The cache is keyed by the ETag of the PDF, the download is pinned to it so the key matches the content
+        etag = s3_client.head_object(Bucket=bucket_name, Key=pdf_key)['ETag']
+        cache_key = DOCX_CACHE_PREFIX + etag.strip('"') + ".docx"
 
-        # Verify PDF
-        if not os.path.exists(local_pdf_path) or os.path.getsize(local_pdf_path) == 0:
-            raise Exception("Downloaded PDF file is empty or missing")
+        if is_docx_cached(bucket_name, cache_key):
+            # An earlier request for the same PDF finished converting in the meantime
+            print(f"Cache hit, copying s3://{bucket_name}/{cache_key} to {docx_key}")
+            alarm_proc.terminate()
+            alarm_proc.join()
+        else:
+            # Download PDF
+            download_file_from_s3(bucket_name, pdf_key, local_pdf_path, etag)
 
-        # Convert PDF -> DOCX
-        convert_pdf_to_docx(local_pdf_path, local_docx_path)
+            # Verify PDF
+            if not os.path.exists(local_pdf_path) or os.path.getsize(local_pdf_path) == 0:
+                raise Exception("Downloaded PDF file is empty or missing")
 
-        # If we got here, conversion succeeded - kill the alarm
-        alarm_proc.terminate()
-        alarm_proc.join()
+            # Convert PDF -> DOCX
+            start = time.time()
+            if DOCX_CONVERTER == 'local':
+                convert_pdf_to_docx_locally(local_pdf_path, local_docx_path)
+            else:
+                convert_pdf_to_docx(local_pdf_path, local_docx_path)
+            print(f"Converted with {DOCX_CONVERTER} in {time.time() - start:.1f}s")
+
+            # If we got here, conversion succeeded - kill the alarm
+            alarm_proc.terminate()
+            alarm_proc.join()
+
+            # Verify DOCX
+            if not os.path.exists(local_docx_path) or os.path.getsize(local_docx_path) == 0:
+                raise Exception("DOCX conversion failed")
 
-        # Verify DOCX
-        if not os.path.exists(local_docx_path) or os.path.getsize(local_docx_path) == 0:
-            raise Exception("DOCX conversion failed")
+            # Upload DOCX to the cache for later requests of the same PDF
+            upload_file_to_s3(local_docx_path, bucket_name, cache_key)
 
-        # Upload DOCX to S3
-        upload_file_to_s3(local_docx_path, bucket_name, docx_key)
+        # Copy the DOCX to the key the frontend downloads
+        s3_client.copy_object(
+            Bucket=bucket_name,
+            Key=docx_key,
+            CopySource={"Bucket": bucket_name, "Key": cache_key}
+        )
 
         try:
             s3_client.put_object_tagging(
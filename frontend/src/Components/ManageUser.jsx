@@ -32,14 +32,15 @@ const ManageUser = ({ user, onBack, fetchAllUsers, department }) => {
     async function fetchLastVisitAuth() {
       if (!currentUser?.user_id) return;
       setLoadingLastVisit(true);
-      let pageNumber = 1;
+      let cursor = undefined;
       let found = null;
       try {
         while (!found) {
           const response = await getAuditViewData({
             logged_user_id: currentUser.user_id,
-            page_number: pageNumber,
+            cursor,
             page_size: 50,
+            count_mode: "none",
           });
           const records = response?.records || [];
           if (!records.length) break;
@@ -48,7 +49,8 @@ const ManageUser = ({ user, onBack, fetchAllUsers, department }) => {
             found = match.ts;
             break;
           }
-          pageNumber++;
+          if (!response.next_cursor) break;
+          cursor = response.next_cursor;
         }
         setLastVisit(found);
       } catch (err) {
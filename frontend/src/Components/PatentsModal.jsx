@@ -2,7 +2,7 @@ import React, { useState, useEffect } from "react";
 import "../CustomStyles/scrollbar.css";
 import "../CustomStyles/modal.css";
 import PatentsEntry from "./PatentsEntry";
-import { getPatentMatches, addUserCVData, getAllSections } from "../graphql/graphqlHelpers";
+import { getPatentMatches, addUserCVData, getAllSections, markExternalMatchesSeen } from "../graphql/graphqlHelpers";
 import { fetchAuthSession } from "aws-amplify/auth";
 
 const PatentsModal = ({ user, section, onClose, setRetrievingData, fetchData }) => {
@@ -17,8 +17,12 @@ const PatentsModal = ({ user, section, onClose, setRetrievingData, fetchData })
     setFetchingData(true);
     setInitialRender(false);
     try {
-      const retrievedData = await getPatentMatches(user.first_name, user.last_name);
+      const retrievedData = await getPatentMatches(user.first_name, user.last_name, user.user_id);
       console.log("Retrieved patents data, Total: ", retrievedData.length);
+      // The matches were shown, store them and stop counting them as new
+      markExternalMatchesSeen(user.user_id, ["patents"]).catch((error) =>
+        console.error("Error marking matches as seen:", error)
+      );
 
       const allDataDetails = [];
       const uniqueDataDetails = new Set();
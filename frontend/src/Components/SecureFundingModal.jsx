@@ -9,6 +9,7 @@ import {
   getAllSections,
   getUserCVData,
   getSecureFundingMatches,
+  markExternalMatchesSeen,
 } from "../graphql/graphqlHelpers";
 import {
   normalizeAmount,
@@ -249,7 +250,16 @@ const SecureFundingModal = ({ user, section, onClose, setRetrievingData, fetchDa
         }
 
         // Fetch both external and RISE data in parallel
-        const [externalResults, riseResults] = await Promise.all([getSecureFundingMatches(user.first_name, user.last_name), getRiseDataMatches(user.first_name, user.last_name)]);
+        // Agencies of grants already on the CV make matching records from them more likely to be the user's
+        const existingAgencies = [...new Set(existingGrants.map((grant) => grant.data_details?.agency).filter(Boolean))];
+        const [externalResults, riseResults] = await Promise.all([
+          getSecureFundingMatches(user.first_name, user.last_name, user.primary_department, existingAgencies, user.user_id),
+          getRiseDataMatches(user.first_name, user.last_name, user.primary_department, existingAgencies, user.user_id),
+        ]);
+        // The matches were shown, store them and stop counting them as new
+        markExternalMatchesSeen(user.user_id, ["secure_funding", "rise_data"]).catch((error) =>
+          console.error("Error marking matches as seen:", error)
+        );
 
         console.log("Raw external results:", externalResults);
         console.log("Raw RISE results:", riseResults?.length || 0);
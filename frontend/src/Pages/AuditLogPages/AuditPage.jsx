@@ -21,7 +21,9 @@ const AuditPage = ({ getCognitoUser, userInfo, currentViewRole }) => {
         loading,
         auditViewData,
         totalCount,
+        totalCountEstimated,
         page_number,
+        hasNextPage,
         PAGE_SIZE,
         emailFilter,
         setEmailFilter,
@@ -125,7 +127,9 @@ const AuditPage = ({ getCognitoUser, userInfo, currentViewRole }) => {
         document.body.removeChild(link);
     };
 
-    const totalPages = Math.ceil(totalCount / PAGE_SIZE);
+    // The estimated total can be below the pages already reached
+    const totalPages = Math.max(Math.ceil(totalCount / PAGE_SIZE), page_number);
+    const approximately = totalCountEstimated ? '~' : '';
 
     return (
         <PageContainer>
@@ -185,12 +189,12 @@ const AuditPage = ({ getCognitoUser, userInfo, currentViewRole }) => {
                         >
                             Previous
                         </button>
-                        <span>Page {page_number} of {totalPages}</span>
-                        <span>Total Records: {totalCount}</span>
+                        <span>Page {page_number} of {approximately}{totalPages}</span>
+                        <span>Total Records: {approximately}{totalCount}</span>
                         <button
                             className="px-2 py-1 bg-gray-200 rounded disabled:opacity-50"
                             onClick={() => setPageNumber(page_number + 1)}
-                            disabled={page_number === totalPages}
+                            disabled={!hasNextPage}
                         >
                             Next
                         </button>
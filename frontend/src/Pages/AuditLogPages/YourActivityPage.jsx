@@ -14,7 +14,9 @@ const YourActivityPage = ({ userInfo, getCognitoUser, currentViewRole }) => {
         loading,
         auditViewData,
         totalCount,
+        totalCountEstimated,
         page_number,
+        hasNextPage,
         PAGE_SIZE,
         startDate,
         setStartDate,
@@ -69,7 +71,9 @@ const YourActivityPage = ({ userInfo, getCognitoUser, currentViewRole }) => {
         }
     };
 
-    const totalPages = totalCount ? Math.ceil(totalCount / PAGE_SIZE) : Math.ceil(auditViewData.length / PAGE_SIZE);
+    // The estimated total can be below the pages already reached
+    const totalPages = Math.max(totalCount ? Math.ceil(totalCount / PAGE_SIZE) : Math.ceil(auditViewData.length / PAGE_SIZE), page_number);
+    const approximately = totalCountEstimated ? '~' : '';
 
     return (
         <PageContainer>
@@ -99,11 +103,11 @@ const YourActivityPage = ({ userInfo, getCognitoUser, currentViewRole }) => {
                         >
                             Previous
                         </button>
-                        <span>Page {page_number} of {totalPages || 1}</span>
+                        <span>Page {page_number} of {approximately}{totalPages || 1}</span>
                         <button
                             className="px-2 py-1 bg-gray-200 rounded disabled:opacity-50 hover:bg-gray-300"
                             onClick={() => setPageNumber(page_number + 1)}
-                            disabled={page_number === totalPages || auditViewData.length === 0}
+                            disabled={!hasNextPage}
                         >
                             Next
                         </button>
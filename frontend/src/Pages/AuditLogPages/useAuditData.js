@@ -5,7 +5,11 @@ export const useAuditData = (userInfo, isPersonalView = false) => {
     const [loading, setLoading] = useState(false);
     const [auditViewData, setAuditViewData] = useState([]);
     const [totalCount, setTotalCount] = useState(0);
+    const [totalCountEstimated, setTotalCountEstimated] = useState(false);
     const [page_number, setPageNumber] = useState(1);
+    // Keyset cursors: pageCursors[n - 1] fetches page n, null for the first page
+    const [pageCursors, setPageCursors] = useState([null]);
+    const [hasNextPage, setHasNextPage] = useState(false);
 
     // Filters
     const [emailFilter, setEmailFilter] = useState('');
@@ -47,9 +51,10 @@ export const useAuditData = (userInfo, isPersonalView = false) => {
         }
     };
 
-    // Reset page when filters change
+    // Reset page when filters change, the cursors of the previous filters no longer apply
     useEffect(() => {
         setPageNumber(1);
+        setPageCursors([null]);
     }, [emailFilter, firstNameFilter, lastNameFilter, startDate, endDate, actionFilter, impersonationFilter]);
 
     // Fetch data when filters or page changes
@@ -75,9 +80,12 @@ export const useAuditData = (userInfo, isPersonalView = false) => {
                 formattedEndDate = endDateObj.toISOString().split('.')[0];
             }
 
+            // Pages are fetched by cursor so that later pages cost the same as the first one,
+            // the total is only shown approximately so the planner's estimate is used
             const requestParams = {
-                page_number: impersonationFilter ? 1 : page_number, // Reset to page 1 when filtering
+                cursor: impersonationFilter ? undefined : pageCursors[page_number - 1] || undefined, // First page when filtering
                 page_size: impersonationFilter ? 1000 : PAGE_SIZE, // Get more records when filtering
+                count_mode: impersonationFilter ? 'none' : 'estimated',
                 action: actionFilter || undefined,
                 start_date: formattedStartDate,
                 end_date: formattedEndDate
@@ -135,15 +143,22 @@ export const useAuditData = (userInfo, isPersonalView = false) => {
 
                 setAuditViewData(paginatedData);
                 setTotalCount(filteredData.length);
+                setTotalCountEstimated(false);
+                setHasNextPage(endIndex < filteredData.length);
             } else {
                 setAuditViewData(filteredData);
                 setTotalCount(response.total_count ?? filteredData.length);
+                setTotalCountEstimated(!!response.total_count_estimated);
+                setHasNextPage(!!response.next_cursor);
+                // Remember where the next page starts
+                setPageCursors(prev => [...prev.slice(0, page_number), response.next_cursor]);
             }
 
         } catch (error) {
             console.error("Error fetching audit view data:", error);
             setAuditViewData([]);
             setTotalCount(0);
+            setHasNextPage(false);
         }
         setLoading(false);
     };
@@ -164,7 +179,9 @@ export const useAuditData = (userInfo, isPersonalView = false) => {
         loading,
         auditViewData,
         totalCount,
+        totalCountEstimated,
         page_number,
+        hasNextPage,
         PAGE_SIZE,
 
         // Filters
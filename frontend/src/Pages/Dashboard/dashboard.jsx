@@ -65,15 +65,16 @@ const Dashboard = ({ userInfo, getCognitoUser, toggleViewMode }) => {
       if (!userInfo?.user_id) return;
 
       setLoadingLastVisit(true);
-      let pageNumber = 1;
+      let cursor = undefined;
       let found = null;
 
       try {
         while (!found) {
           const response = await getAuditViewData({
             logged_user_id: userInfo.user_id,
-            page_number: pageNumber,
+            cursor,
             page_size: 50, // fetch in batches
+            count_mode: "none", // the total is not needed
           });
 
           const records = response?.records || [];
@@ -86,7 +87,8 @@ const Dashboard = ({ userInfo, getCognitoUser, toggleViewMode }) => {
             break;
           }
 
-          pageNumber++;
+          if (!response.next_cursor) break; // last page
+          cursor = response.next_cursor;
         }
 
         setLastVisit(found);
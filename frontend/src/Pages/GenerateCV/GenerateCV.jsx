@@ -14,6 +14,11 @@ import CVGenerationComponent from "../ReportsPage/CVGenerationComponent/CVGenera
 import ReportPreview from "../ReportsPage/CVGenerationComponent/ReportPreview.jsx";
 import { buildUserCvs } from "Pages/ReportsPage/HtmlFunctions/UserCvTableBuilder/UserCvTableBuilder.js";
 import { formatUserTables } from "Pages/ReportsPage/HtmlFunctions/FormatTemplateToTable/FormatTemplateToTable.js";
+import {
+  generateBatchCVs,
+  buildCVPacket,
+  getBatchPdfKey,
+} from "Pages/ReportsPage/gotenbergGenerateUtils/gotenbergService.js";
 
 const GenerateCV = ({ getCognitoUser, toggleViewMode }) => {
   const { userInfo, currentViewRole } = useApp();
@@ -35,6 +40,9 @@ const GenerateCV = ({ getCognitoUser, toggleViewMode }) => {
   const [selectedFaculty, setSelectedFaculty] = useState("");
   const [userSearchTerm, setUserSearchTerm] = useState("");
   const [pdfUrl, setPdfUrl] = useState(null);
+  const [batchProgress, setBatchProgress] = useState(null);
+  const [completedBatch, setCompletedBatch] = useState(null);
+  const [buildingPacket, setBuildingPacket] = useState(false);
   const notificationShownRef = useRef(false);
 
   // Hooks
@@ -231,6 +239,78 @@ const GenerateCV = ({ getCognitoUser, toggleViewMode }) => {
     .filter((template) => template.title.toLowerCase().includes(searchTerm.toLowerCase()))
     .sort((a, b) => a.title.localeCompare(b.title));
 
+  // Generates a separate CV for every listed member of the department in one server side batch job
+  const handleGenerateDepartmentCVs = async () => {
+    const templateWithDates = {
+      ...selectedTemplate,
+      start_year: startYear,
+      end_year: endYear,
+    };
+    const department = selectedDepartment;
+
+    setBatchProgress({ stage: "UPLOADING", uploaded: 0, total: departmentUsers.length });
+    try {
+      await logAction(AUDIT_ACTIONS.GENERATE_CV, {
+        userIds: departmentUsers.map((u) => u.user_id),
+        userNames: departmentUsers.map((u) => `${u.first_name} ${u.last_name}`),
+        reportName: selectedTemplate.title,
+        action: "BATCH_CV_GENERATION",
+        userCount: departmentUsers.length,
+      });
+
+      await generateBatchCVs(
+        department,
+        selectedTemplate,
+        departmentUsers,
+        async (user) => buildUserCvs(await formatUserTables([user], templateWithDates)),
+        setBatchProgress,
+        (job) => {
+          setBatchProgress(null);
+          setCompletedBatch({ job, users: departmentUsers, department, templateTitle: selectedTemplate.title });
+          setNotification({
+            message: `Generated ${job.completed} of ${job.total} CVs for ${department}` +
+              (job.failed > 0 ? `, ${job.failed} failed` : ""),
+            type: job.failed > 0 ? "warning" : "success",
+          });
+        }
+      );
+    } catch (error) {
+      console.error("Error generating department CVs:", error);
+      setBatchProgress(null);
+      setNotification({
+        message: "An error occurred while generating the department CVs. Please try again.",
+        type: "error",
+      });
+    }
+  };
+
+  // Merges the CVs of the last department batch into one PDF, in the order they are listed
+  const handleBuildPacket = async () => {
+    const { job, users, department, templateTitle } = completedBatch;
+    const generatedUsers = users.filter((user) => !(job.failed_user_ids || []).includes(user.user_id));
+
+    setBuildingPacket(true);
+    try {
+      await buildCVPacket(
+        generatedUsers.map((user) => getBatchPdfKey(job.job_id, user.user_id)),
+        generatedUsers.map((user) => `${user.last_name}, ${user.first_name}`),
+        `${templateTitle} - ${department}`,
+        (url) => {
+          setBuildingPacket(false);
+          window.open(url, "_blank");
+        },
+        () => {
+          setBuildingPacket(false);
+          setNotification({ message: "An error occurred while merging the CVs. Please try again.", type: "error" });
+        }
+      );
+    } catch (error) {
+      console.error("Error building CV packet:", error);
+      setBuildingPacket(false);
+      setNotification({ message: "An error occurred while merging the CVs. Please try again.", type: "error" });
+    }
+  };
+
   // HTML Generation Function
   const getHtml = async () => {
     if (selectedUsers.length === 0 || !selectedTemplate) {
@@ -507,6 +587,33 @@ const GenerateCV = ({ getCognitoUser, toggleViewMode }) => {
                   }" finished generating!`}
                 />
               </div>
+
+              {/* One CV per department member, rendered on the server */}
+              {isBulkMode && selectedTemplate && selectedDepartment && selectedDepartment !== "All" && (
+                <button
+                  className={`w-full btn ${batchProgress ? "btn-secondary cursor-not-allowed opacity-75" : "btn-outline btn-primary"}`}
+                  onClick={handleGenerateDepartmentCVs}
+                  disabled={batchProgress !== null}
+                >
+                  {batchProgress === null
+                    ? `Generate separate CVs for all ${departmentUsers.length} members of ${selectedDepartment}`
+                    : batchProgress.stage === "UPLOADING"
+                    ? `Preparing CVs (${batchProgress.uploaded}/${batchProgress.total})...`
+                    : "Generating CVs..."}
+                </button>
+              )}
+
+              {completedBatch && completedBatch.job.completed > 0 && (
+                <button
+                  className={`w-full btn ${buildingPacket ? "btn-secondary cursor-not-allowed opacity-75" : "btn-outline btn-primary"}`}
+                  onClick={handleBuildPacket}
+                  disabled={buildingPacket}
+                >
+                  {buildingPacket
+                    ? "Merging CVs..."
+                    : `Download all ${completedBatch.job.completed} CVs of ${completedBatch.department} as one PDF`}
+                </button>
+              )}
             </div>
 
             {/* Right Section - Report Preview */}
@@ -15,7 +15,7 @@ import DownloadDocxButton from "./DownloadDocxButton";
 import DownloadPdfButton from "./DownloadPdfButton";
 import { useNotification } from "Contexts/NotificationContext";
 import { useRef } from "react";
-import { getUserDeclarations } from "graphql/graphqlHelpers";
+import { getUserDeclarations, requestDocx } from "graphql/graphqlHelpers";
 import { useMemo } from "react";
 
 // onGenerate must return the html content
@@ -45,6 +45,8 @@ const CVGenerationComponent = ({
     const [docxUrl, setDocxUrl] = useState(null);
 
     const [generating, setGenerating] = useState(false);
+    // The DOCX is only converted when the user asks for it
+    const [docxGenerating, setDocxGenerating] = useState(false);
 
     const currentTemplateRef = useRef();
 
@@ -97,6 +99,7 @@ const CVGenerationComponent = ({
         }
 
         if (backendKey === getDocxKey(currentKey)) {
+            setDocxGenerating(false);
 
             if (docxHaveError) {
                 setDocxExists(false);
@@ -114,6 +117,29 @@ const CVGenerationComponent = ({
 
     }
 
+    const onRequestDocx = async () => {
+        const key = getGenericKey(userInfo, currentTemplateRef.current, optionalKey);
+
+        setDocxGenerating(true);
+        setDocxHasError(false);
+
+        // Subscribe before requesting so a quick conversion is not missed
+        addSubscription(getDocxKey(key), onDocxComplete, onGenerationError);
+
+        try {
+            // A DOCX converted earlier from the same PDF is returned right away
+            const result = await requestDocx(getPdfKey(key));
+            if (result.status === "COMPLETE") {
+                await onDocxComplete(result.docx_key);
+            }
+        } catch (error) {
+            console.error("Error requesting DOCX:", error);
+            setNotification({ message: "Error generating DOCX", type: "error" });
+            setDocxGenerating(false);
+            setDocxHasError(true);
+        }
+    }
+
     const onGenerate = async () => {
         setGenerating(true);
 
@@ -139,9 +165,14 @@ const CVGenerationComponent = ({
 
         setPdfPreviewUrl?.(null);
         setPdfComplete(false);
-        setDocxComplete(false);
         setPdfHasError(false);
+
+        // A new PDF needs its own DOCX
+        setDocxExists(false);
+        setDocxComplete(false);
         setDocxHasError(false);
+        setDocxUrl(null);
+        setDocxGenerating(false);
 
         const html = await getHtml();
 
@@ -167,13 +198,14 @@ const CVGenerationComponent = ({
         setPdfPreviewUrl?.(null);
 
         setGenerating(true);
+        setDocxGenerating(false);
     }
 
     useEffect(() => {
-        if (pdfComplete && docxComplete) {
+        if (pdfComplete) {
             setGenerating(false);
         }
-    }, [pdfComplete, docxComplete])
+    }, [pdfComplete])
 
     useEffect(() => {
         const setDocumentStates = async () => {
@@ -231,14 +263,12 @@ const CVGenerationComponent = ({
     }, [generating, pdfExists, pdfComplete])
 
     useEffect(() => {
-        if (((generating && !docxExists && !docxComplete) ||
-            (docxExists && !docxComplete)) &&
-            !docxHasError
-        ) {
-            setGenerating(true);
+        // A DOCX requested earlier that is still converting
+        if (docxExists && !docxComplete && !docxHasError) {
+            setDocxGenerating(true);
             addSubscription(getDocxKey(getGenericKey(userInfo, currentTemplateRef.current, optionalKey)), onDocxComplete, onGenerationError);
         }
-    }, [generating, docxExists, docxComplete])
+    }, [docxExists, docxComplete])
 
     const downloadName = useMemo(() => {
         const templateName = selectedTemplate?.title?.replaceAll(" ", "") || '';
@@ -272,9 +302,7 @@ const CVGenerationComponent = ({
             <GenerateButton
                 generating={generating}
                 pdfComplete={pdfComplete}
-                docxComplete={docxComplete}
                 pdfHasError={pdfHasError}
-                docxHasError={docxHasError}
                 onGenerate={onGenerate}
             />
 
@@ -291,7 +319,9 @@ const CVGenerationComponent = ({
                 <DownloadDocxButton
                     docxUrl={docxUrl}
                     docxComplete={docxComplete}
-                    generating={generating}
+                    docxGenerating={docxGenerating}
+                    pdfReady={Boolean(pdfUrl) && pdfComplete && !pdfHasError}
+                    onRequestDocx={onRequestDocx}
                     docxHasError={docxHasError}
                     downloadName={`${downloadName}.docx`}
                 />
@@ -3,7 +3,9 @@ import React from 'react';
 const DownloadDocxButton = ({
     docxUrl,
     docxComplete,
-    generating,
+    docxGenerating,
+    pdfReady,
+    onRequestDocx,
     downloadName,
     docxHasError
 }) => {
@@ -32,19 +34,14 @@ const handleDownloadDocx = async () => {
 };
 
     const getDocxButtonState = () => {
-        if (docxHasError) {
-            return {
-                text: "Error generating DOCX please try again",
-                style: "btn-secondary opacity-50 cursor-not-allowed",
-                disabled: true
-            };
-        } else if (docxUrl && docxComplete) {
+        if (docxUrl && docxComplete && !docxHasError) {
             return {
                 text: "Download DOCX",
                 style: "btn-success",
-                disabled: false
+                disabled: false,
+                onClick: handleDownloadDocx
             };
-        } else if (generating && !docxComplete) {
+        } else if (docxGenerating) {
             return {
                 text: (
                     <span className="flex items-center justify-center">
@@ -55,6 +52,20 @@ const handleDownloadDocx = async () => {
                 style: "btn-secondary opacity-50 cursor-not-allowed",
                 disabled: true
             };
+        } else if (pdfReady) {
+            // The DOCX is converted from the PDF when first requested
+            return {
+                text: docxHasError ? "Error generating DOCX please try again" : "Convert to DOCX",
+                style: "btn-primary",
+                disabled: false,
+                onClick: onRequestDocx
+            };
+        } else if (docxHasError) {
+            return {
+                text: "Error generating DOCX please try again",
+                style: "btn-secondary opacity-50 cursor-not-allowed",
+                disabled: true
+            };
         } else {
             return {
                 text: "No DOCX available - Please generate first",
@@ -68,7 +79,7 @@ const handleDownloadDocx = async () => {
 
     return (
         <button
-            onClick={handleDownloadDocx}
+            onClick={buttonState.onClick}
             className={`btn w-full ${buttonState.style}`}
             disabled={buttonState.disabled}
         >
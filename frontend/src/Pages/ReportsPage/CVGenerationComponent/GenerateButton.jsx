@@ -3,13 +3,12 @@ import React from 'react';
 const GenerateButton = ({
     generating,
     pdfComplete,
-    docxComplete,
     pdfHasError,
-    docxHasError,
     onGenerate
 }) => {
 
-    const customGenerating = (generating || (!pdfComplete ^ !docxComplete)) && !(pdfHasError || docxHasError);
+    // The DOCX is converted separately, when it is requested from the download button
+    const customGenerating = generating && !pdfComplete && !pdfHasError;
 
     const handleGenerate = () => {
         if (onGenerate && !customGenerating) {
@@ -19,18 +18,9 @@ const GenerateButton = ({
 
     const getGenerateButtonText = () => {
         if (customGenerating) {
-            
-            if (!pdfComplete && !docxComplete) {
-                return "Generating PDF & DOCX...";
-            } else if (pdfComplete && !docxComplete) {
-                return "PDF Done, Generating DOCX...";
-            } else if (!pdfComplete && docxComplete) {
-                return "DOCX Done, Generating PDF...";
-            } else {
-                return "Processing...";
-            }
+            return "Generating PDF...";
         }
-        return "Generate PDF & DOCX";
+        return "Generate PDF";
     };
 
     return (
@@ -35,7 +35,7 @@ const ReportPreview = ({
     return (
       <div className="flex-1 flex items-center justify-center w-full h-full">
         <span className="text-zinc-400 text-xl font-medium">
-          Click Generate PDF & DOCX to review your resume.
+          Click Generate PDF to review your resume.
         </span>
       </div>
     );
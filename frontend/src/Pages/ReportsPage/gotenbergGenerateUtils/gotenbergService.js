@@ -1,5 +1,6 @@
 import { getPresignedGotenbergBucketUrl } from "../../../graphql/graphqlHelpers";
 import { subscribeToGotenbergStatus } from "../../../graphql/graphqlHelpers";
+import { createCVBatchJob, startCVBatchJob, getCVBatchJob, createCVPacket } from "../../../graphql/graphqlHelpers";
 
 export const getGenericKey = (userInfo, selectedTemplate, optionalKey = "") => {
   return `${userInfo.user_id}${selectedTemplate.template_id}${optionalKey}`;
@@ -17,6 +18,19 @@ export const getDocxKey = (key) => {
   return `docx/${key}.docx`;
 }
 
+export const getBatchHtmlKey = (jobId, userId) => {
+  return `batch/${jobId}/html/${userId}.html`;
+}
+
+export const getBatchPdfKey = (jobId, userId) => {
+  return `batch/${jobId}/pdf/${userId}.pdf`;
+}
+
+// Key the batch completion notification is sent on
+export const getBatchKey = (jobId) => {
+  return `batch/${jobId}`;
+}
+
 // Check if PDF is complete by checking tags on the HTML file
 export const checkPdfComplete = async (key) => {
   try {
@@ -346,6 +360,81 @@ export const convertHtmlToPdf = async (htmlContent, options = {}, key, onUploadS
   }
 };
 
+// Number of HTML uploads in flight while a batch job is prepared
+const BATCH_UPLOAD_CONCURRENCY = 4;
+
+const uploadHtml = async (key, htmlContent) => {
+  const uploadUrl = await getPresignedGotenbergBucketUrl(key, 'PUT');
+  if (!uploadUrl) {
+    throw new Error('Failed to get presigned URL for HTML upload');
+  }
+  const response = await fetch(uploadUrl, {
+    method: 'PUT',
+    body: htmlContent,
+    headers: {
+      'Content-Type': 'text/html',
+    },
+  });
+  if (!response.ok) {
+    throw new Error(`Failed to upload HTML to S3: ${response.statusText}`);
+  }
+};
+
+// Generates one CV per user as a single batch job rendered on the server.
+// getUserHtml(user) builds the HTML of one user's CV, users whose HTML fails to build or upload
+// are reported as failed by the job. onComplete(job) is called once when the whole job is done.
+export const generateBatchCVs = async (department, template, users, getUserHtml, onProgress, onComplete) => {
+  const job = await createCVBatchJob(department, template.template_id, users.map((user) => user.user_id));
+  console.log('Created batch job:', job.job_id);
+
+  let uploaded = 0;
+  let next = 0;
+  const uploadNext = async () => {
+    while (next < users.length) {
+      const user = users[next++];
+      try {
+        await uploadHtml(getBatchHtmlKey(job.job_id, user.user_id), await getUserHtml(user));
+      } catch (error) {
+        console.error('Error preparing CV for user:', user.user_id, error);
+      }
+      uploaded++;
+      onProgress?.({ stage: 'UPLOADING', uploaded, total: users.length });
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(BATCH_UPLOAD_CONCURRENCY, users.length) }, uploadNext));
+
+  const batchKey = getBatchKey(job.job_id);
+  addSubscription(
+    batchKey,
+    async () => onComplete?.(await getCVBatchJob(job.job_id)),
+    async () => onComplete?.(await getCVBatchJob(job.job_id))
+  );
+  const startedJob = await startCVBatchJob(job.job_id);
+  onProgress?.({ stage: 'RENDERING', job: startedJob });
+  return startedJob;
+};
+
+// Merges generated CVs into one PDF with an index page. onReady(url) is called with a download URL
+// for the packet once it is built, onError() if it could not be built.
+export const buildCVPacket = async (pdfKeys, titles, title, onReady, onError) => {
+  const packet = await createCVPacket(pdfKeys, titles, title);
+  console.log('Building CV packet:', packet.key);
+
+  addSubscription(
+    packet.key,
+    async () => {
+      const tags = await getPresignedGotenbergBucketUrl(packet.key, 'GET_TAGS');
+      if (tags && tags.includes('isPacketComplete') && tags.includes('Value=true')) {
+        onReady?.(await getPresignedGotenbergBucketUrl(packet.key, 'GET'));
+      } else {
+        onError?.();
+      }
+    },
+    () => onError?.()
+  );
+  return packet;
+};
+
 export const defaultPdfOptions = {
   marginTop: '0.5in',
   marginBottom: '0.5in',
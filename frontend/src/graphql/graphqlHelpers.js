@@ -3,6 +3,8 @@ import {
   getAllSectionsQuery,
   getArchivedSectionsQuery,
   getUserCVDataQuery,
+  getUserCVBundleQuery,
+  getUserCVDataChangesQuery,
   getAllSectionCVDataQuery,
   getDepartmentCVDataQuery,
   getFacultyWideCVDataQuery,
@@ -25,6 +27,7 @@ import {
   getSecureFundingMatchesQuery,
   getRiseDataMatchesQuery,
   getPatentMatchesQuery,
+  getNewExternalMatchCountsQuery,
   getPresignedUrlQuery,
   getUserInstitutionIdQuery,
   getNumberOfGeneratedCVsQuery,
@@ -38,6 +41,7 @@ import {
   getAuditViewQuery,
   getUserAffiliationsQuery,
   GET_PRESIGNED_GOTENBERG_BUCKET_URL,
+  GET_CV_BATCH_JOB,
   GET_STAGING_SCOPUS_PUBLICATIONS,
   getDepartmentAffiliationsQuery,
 } from "./queries";
@@ -53,6 +57,7 @@ import {
   addUserConnectionMutation,
   updateUserConnectionMutation,
   deleteUserConnectionMutation,
+  markExternalMatchesSeenMutation,
   updateUserCVDataArchiveMutation,
   linkOrcidMutation,
   updateTemplateMutation,
@@ -79,7 +84,11 @@ import {
   EDIT_SECTION_DETAILS,
   UPDATE_USER_AFFILIATIONS,
   CHANGE_USERNAME,
-  CREATE_GOTENBERG_PDF
+  CREATE_GOTENBERG_PDF,
+  CREATE_CV_BATCH_JOB,
+  START_CV_BATCH_JOB,
+  CREATE_CV_PACKET,
+  REQUEST_DOCX
 } from "./mutations";
 import { getUserId } from "../getAuthToken";
 import { GOTENBERG_GENERATION_STATUS_UPDATE } from "./subscriptions";
@@ -296,19 +305,66 @@ export const getUserCVData = async (user_id, data_section_ids) => {
   return results["data"]["getUserCVData"];
 };
 
+/**
+ * Function to get all of a user's CV entries grouped by section in a single request
+ * Arguments:
+ * user_id
+ * template_id - optional, only return the sections used by this template
+ * fields - optional, only return these data_details keys
+ * etag - optional, etag of a previously fetched bundle
+ * Return value:
+ * { etag, not_modified, sections } - sections is null when not_modified is true
+ */
+export const getUserCVBundle = async (user_id, template_id = null, fields = null, etag = null) => {
+  const results = await executeGraphql(getUserCVBundleQuery, { user_id, template_id, fields, etag });
+  return results["data"]["getUserCVBundle"];
+};
+
+/**
+ * Function to get the changes to a user's CV entries since a previous call
+ * Arguments:
+ * user_id
+ * since - optional, watermark returned by the previous call
+ * Return value:
+ * { watermark, full_resync_required, upserts, tombstones } - when full_resync_required is true,
+ * upserts contains every entry and the local copy should be replaced
+ */
+export const getUserCVDataChanges = async (user_id, since = null) => {
+  const results = await executeGraphql(getUserCVDataChangesQuery, { user_id, since });
+  return results["data"]["getUserCVDataChanges"];
+};
+
 export const getAllSectionCVData = async (data_section_id, data_section_ids) => {
   const results = await runGraphql(getAllSectionCVDataQuery(data_section_id, data_section_ids));
   return results["data"]["getAllSectionCVData"];
 };
 
+/**
+ * Follows next_cursor until every page of a department/faculty CV data query has been fetched
+ */
+const fetchAllCVDataPages = async (fetchPage) => {
+  const firstPage = await fetchPage(null);
+  const data = [...firstPage.data];
+  let page = firstPage;
+  while (page.next_cursor) {
+    page = await fetchPage(page.next_cursor);
+    data.push(...page.data);
+  }
+  return { ...firstPage, data, returned_count: data.length, next_cursor: null };
+};
+
 export const getDepartmentCVData = async (data_section_id, dept, title, user_ids) => {
-  const results = await runGraphql(getDepartmentCVDataQuery(data_section_id, dept, title, user_ids));
-  return results["data"]["getDepartmentCVData"];
+  return fetchAllCVDataPages(async (after) => {
+    const results = await runGraphql(getDepartmentCVDataQuery(data_section_id, dept, title, user_ids, after));
+    return results["data"]["getDepartmentCVData"];
+  });
 };
 
 export const getFacultyWideCVData = async (data_section_id, faculty, title) => {
-  const results = await runGraphql(getFacultyWideCVDataQuery(data_section_id, faculty, title));
-  return results["data"]["getFacultyWideCVData"];
+  return fetchAllCVDataPages(async (after) => {
+    const results = await runGraphql(getFacultyWideCVDataQuery(data_section_id, faculty, title, after));
+    return results["data"]["getFacultyWideCVData"];
+  });
 };
 
 export const getUserAffiliations = async (user_id, first_name, last_name) => {
@@ -542,7 +598,10 @@ export const getPublicationMatches = async (scopus_id, page_number, results_per_
  * Function to get secure funding matches from grants data
  * Arguments:
  * first_name,
- * last_name
+ * last_name,
+ * department (optional) - user's department, raises the confidence of records from it
+ * agencies (optional) - agencies the user already has grants from, same
+ * user_id (optional) - returns the matches stored for the user instead
  * Return value:
  * [
  *  {
@@ -550,11 +609,13 @@ export const getPublicationMatches = async (scopus_id, page_number, results_per_
  *      first_name,
  *      last_name
  *      data_details: JSON string
+ *      confidence: match confidence between 0.9 and 1, best matches first
+ *      is_new: whether the match was found after the user last viewed them, only with user_id
  *  }, ...
  * ]
  */
-export const getSecureFundingMatches = async (first_name, last_name) => {
-  const results = await runGraphql(getSecureFundingMatchesQuery(first_name, last_name));
+export const getSecureFundingMatches = async (first_name, last_name, department, agencies, user_id) => {
+  const results = await runGraphql(getSecureFundingMatchesQuery(first_name, last_name, department, agencies, user_id));
   return results["data"]["getSecureFundingMatches"];
 };
 
@@ -562,7 +623,10 @@ export const getSecureFundingMatches = async (first_name, last_name) => {
  * Function to get rise data matches from rise data
  * Arguments:
  * first_name,
- * last_name
+ * last_name,
+ * department (optional) - user's department, raises the confidence of records from it
+ * agencies (optional) - agencies the user already has grants from, same
+ * user_id (optional) - returns the matches stored for the user instead
  * Return value:
  * [
  *  {
@@ -570,11 +634,13 @@ export const getSecureFundingMatches = async (first_name, last_name) => {
  *      first_name,
  *      last_name
  *      data_details: JSON string
+ *      confidence: match confidence between 0.9 and 1, best matches first
+ *      is_new: whether the match was found after the user last viewed them, only with user_id
  *  }, ...
  * ]
  */
-export const getRiseDataMatches = async (first_name, last_name) => {
-  const results = await runGraphql(getRiseDataMatchesQuery(first_name, last_name));
+export const getRiseDataMatches = async (first_name, last_name, department, agencies, user_id) => {
+  const results = await runGraphql(getRiseDataMatchesQuery(first_name, last_name, department, agencies, user_id));
   return results["data"]["getRiseDataMatches"];
 };
 
@@ -582,22 +648,41 @@ export const getRiseDataMatches = async (first_name, last_name) => {
  * Function to get patent matches from patents data
  * Arguments:
  * first_name,
- * last_name
+ * last_name,
+ * user_id (optional) - returns the matches stored for the user instead
  * Return value:
  * [
  *  {
- *      secure_funding_id
+ *      patent_id
  *      first_name,
  *      last_name
  *      data_details: JSON string
+ *      confidence: match confidence between 0.9 and 1, best matches first
+ *      is_new: whether the match was found after the user last viewed them, only with user_id
  *  }, ...
  * ]
  */
-export const getPatentMatches = async (first_name, last_name) => {
-  const results = await runGraphql(getPatentMatchesQuery(first_name, last_name));
+export const getPatentMatches = async (first_name, last_name, user_id) => {
+  const results = await runGraphql(getPatentMatchesQuery(first_name, last_name, user_id));
   return results["data"]["getPatentMatches"];
 };
 
+/**
+ * Function to get the number of grant, RISE and patent matches found since the user last viewed them
+ * Arguments:
+ * user_id
+ * Return value:
+ * {
+ *  secure_funding: Int,
+ *  rise_data: Int,
+ *  patents: Int
+ * }
+ */
+export const getNewExternalMatchCounts = async (user_id) => {
+  const results = await runGraphql(getNewExternalMatchCountsQuery(user_id));
+  return results["data"]["getNewExternalMatchCounts"];
+};
+
 /**
  * Function to get a presigned URL authorized to PUT or GET an object to/from a dedicated partition
  * in the CV S3 bucket for the tenant whose JWT token is passed
@@ -1198,6 +1283,20 @@ export const updateLatexConfiguration = async (vspace, margin, font) => {
   return results["data"]["updateTemplate"];
 };
 
+/**
+ * Function to record that the user viewed their matches, so they are no longer new, and to store
+ * their matches if that wasn't done for their current name and department yet
+ * Arguments:
+ * user_id - ID of the user
+ * sources - any of "secure_funding", "rise_data", "patents"
+ * Return value:
+ * String saying SUCCESS if call succeeded, anything else means call failed
+ */
+export const markExternalMatchesSeen = async (user_id, sources) => {
+  const results = await runGraphql(markExternalMatchesSeenMutation(user_id, sources));
+  return results["data"]["markExternalMatchesSeen"];
+};
+
 // --- DELETE ---
 
 /**
@@ -1297,6 +1396,71 @@ export const getPresignedGotenbergBucketUrl = async (key, method) => {
   return results["data"]["getPresignedGotenbergBucketUrl"];
 };
 
+/**
+ * Function to create a batch job generating one CV per user
+ * Arguments:
+ * department - Department the CVs are generated for
+ * template_id - Template of the CVs
+ * user_ids - Users to generate a CV for, their HTML goes to batch/<job_id>/html/<user_id>.html
+ * Return value:
+ * The PENDING job
+ */
+export const createCVBatchJob = async (department, template_id, user_ids) => {
+  const results = await executeGraphql(CREATE_CV_BATCH_JOB, { department, template_id, user_ids });
+  return results["data"]["createCVBatchJob"];
+};
+
+/**
+ * Function to start rendering a batch job once its HTML is uploaded
+ * Arguments:
+ * job_id - ID of the job
+ * Return value:
+ * The RUNNING job, completion is notified on the key batch/<job_id>
+ */
+export const startCVBatchJob = async (job_id) => {
+  const results = await executeGraphql(START_CV_BATCH_JOB, { job_id });
+  return results["data"]["startCVBatchJob"];
+};
+
+/**
+ * Function to get the progress of a batch job
+ * Arguments:
+ * job_id - ID of the job
+ * Return value:
+ * The job with its status and completed / failed counts
+ */
+export const getCVBatchJob = async (job_id) => {
+  const results = await executeGraphql(GET_CV_BATCH_JOB, { job_id });
+  return results["data"]["getCVBatchJob"];
+};
+
+/**
+ * Function to merge generated CVs into one PDF packet, built asynchronously
+ * Arguments:
+ * pdf_keys - Keys of the generated CV PDFs, in packet order
+ * titles - Name listed for each CV in the packet's index
+ * title - Title of the packet
+ * Return value:
+ * The packet_id and the key of the packet, completion is notified on that key
+ */
+export const createCVPacket = async (pdf_keys, titles, title) => {
+  const results = await executeGraphql(CREATE_CV_PACKET, { pdf_keys, titles, title });
+  return results["data"]["createCVPacket"];
+};
+
+/**
+ * Function to request the DOCX of a generated CV, converted only on request and cached per PDF
+ * Arguments:
+ * pdf_key - Key of the generated CV PDF (e.g. "pdf/username_templateid.pdf")
+ * Return value:
+ * The pdf_key, docx_key and status: COMPLETE when the DOCX is ready, PENDING when completion will be
+ * notified on the docx_key
+ */
+export const requestDocx = async (pdf_key) => {
+  const results = await executeGraphql(REQUEST_DOCX, { pdf_key });
+  return results["data"]["requestDocx"];
+};
+
 /**
  * Subscribe to Gotenberg generation status updates
  * Arguments:
@@ -111,7 +111,19 @@ export const ADD_BATCHED_USER_CV_DATA = `
             data_section_title: $data_section_title!,
             data_details_list: $data_details_list,
             editable: $editable,
-        )
+        ) {
+            message
+            inserted_count
+            existing_count
+            unarchived_count
+            updated_count
+            archived_count
+            entries {
+                index
+                status
+                user_cv_data_id
+            }
+        }
     }
 `;
 
@@ -412,6 +424,15 @@ export const deleteUserConnectionMutation = (user_connection_id) => `
     }
 `;
 
+export const markExternalMatchesSeenMutation = (user_id, sources) => `
+    mutation MarkExternalMatchesSeen {
+        markExternalMatchesSeen(
+            user_id: "${user_id}",
+            sources: ${JSON.stringify(sources)}
+        )
+    }
+`;
+
 export const deleteTemplateMutation = (template_id) => `
     mutation DeleteTemplate {
         deleteTemplate(
@@ -449,4 +470,57 @@ export const addAuditViewMutation = `
         logged_user_action
         }
     }
-`;
\ No newline at end of file
+`;
+
+export const CREATE_CV_BATCH_JOB = `
+  mutation CreateCVBatchJob($department: String!, $template_id: String!, $user_ids: [String]!) {
+    createCVBatchJob(department: $department, template_id: $template_id, user_ids: $user_ids) {
+      job_id
+      department
+      template_id
+      status
+      total
+      completed
+      failed
+      failed_user_ids
+      created_at
+      updated_at
+    }
+  }
+`;
+
+export const START_CV_BATCH_JOB = `
+  mutation StartCVBatchJob($job_id: String!) {
+    startCVBatchJob(job_id: $job_id) {
+      job_id
+      department
+      template_id
+      status
+      total
+      completed
+      failed
+      failed_user_ids
+      created_at
+      updated_at
+    }
+  }
+`;
+
+export const CREATE_CV_PACKET = `
+  mutation CreateCVPacket($pdf_keys: [String]!, $titles: [String], $title: String) {
+    createCVPacket(pdf_keys: $pdf_keys, titles: $titles, title: $title) {
+      packet_id
+      key
+    }
+  }
+`;
+
+export const REQUEST_DOCX = `
+  mutation RequestDocx($pdf_key: String!) {
+    requestDocx(pdf_key: $pdf_key) {
+      pdf_key
+      docx_key
+      status
+    }
+  }
+`;
@@ -232,6 +232,58 @@ export const getUserCVDataQuery = (user_id, data_section_ids) => {
     }`;
 };
 
+export const getUserCVBundleQuery = `
+    query GetUserCVBundle($user_id: String!, $template_id: String, $fields: [String], $etag: String) {
+        getUserCVBundle(
+            user_id: $user_id,
+            template_id: $template_id,
+            fields: $fields,
+            etag: $etag
+        ) {
+            etag
+            not_modified
+            sections {
+                data_section_id
+                title
+                description
+                data_type
+                attributes
+                attributes_type
+                info
+                entries {
+                    user_cv_data_id
+                    user_id
+                    data_section_id
+                    data_details
+                    editable
+                }
+            }
+        }
+    }
+`;
+
+export const getUserCVDataChangesQuery = `
+    query GetUserCVDataChanges($user_id: String!, $since: String) {
+        getUserCVDataChanges(user_id: $user_id, since: $since) {
+            watermark
+            full_resync_required
+            upserts {
+                user_cv_data_id
+                user_id
+                data_section_id
+                data_details
+                editable
+            }
+            tombstones {
+                user_cv_data_id
+                data_section_id
+                deleted_at
+                archived
+            }
+        }
+    }
+`;
+
 export const getAllSectionCVDataQuery = (data_section_id, data_section_ids) => {
   if (data_section_id)
     return `query GetAllSectionCVData {
@@ -264,14 +316,15 @@ export const getAllSectionCVDataQuery = (data_section_id, data_section_ids) => {
     }`;
 };
 
-export const getDepartmentCVDataQuery = (data_section_id, dept, title, user_ids) => {
+export const getDepartmentCVDataQuery = (data_section_id, dept, title, user_ids, after = null) => {
   if (user_ids) {
     return `query GetDepartmentCVData {
         getDepartmentCVData (
             data_section_id: "${data_section_id}",
             dept: "${dept}",
             title: "${title}",
-            user_ids: [${user_ids.map((id) => `"${id}"`).join(", ")}]
+            user_ids: [${user_ids.map((id) => `"${id}"`).join(", ")}]${after ? `,
+            after: "${after}"` : ""}
         ) {
             data {
                 data_section_id
@@ -279,6 +332,7 @@ export const getDepartmentCVDataQuery = (data_section_id, dept, title, user_ids)
             }
             total_count
             returned_count
+            next_cursor
         }
     }`;
   } else if (title) {
@@ -286,7 +340,8 @@ export const getDepartmentCVDataQuery = (data_section_id, dept, title, user_ids)
         getDepartmentCVData (
             data_section_id: "${data_section_id}",
             dept: "${dept}",
-            title: "${title}"
+            title: "${title}"${after ? `,
+            after: "${after}"` : ""}
         ) {
             data {
                 data_section_id
@@ -294,13 +349,15 @@ export const getDepartmentCVDataQuery = (data_section_id, dept, title, user_ids)
             }
             total_count
             returned_count
+            next_cursor
         }
     }`;
   } else {
     return `query GetDepartmentCVData {
           getDepartmentCVData (
               data_section_id: "${data_section_id}",
-              dept: "${dept}"
+              dept: "${dept}"${after ? `,
+              after: "${after}"` : ""}
           ) {
               data {
                   data_section_id
@@ -308,17 +365,19 @@ export const getDepartmentCVDataQuery = (data_section_id, dept, title, user_ids)
               }
               total_count
               returned_count
+              next_cursor
           }
       }`;
   }
 };
 
-export const getFacultyWideCVDataQuery = (data_section_id, faculty, title = "") => `
+export const getFacultyWideCVDataQuery = (data_section_id, faculty, title = "", after = null) => `
     query GetFacultyWideCVData {
         getFacultyWideCVData (
             data_section_id: "${data_section_id}",
             faculty: "${faculty}",
-            title: "${title}"
+            title: "${title}"${after ? `,
+            after: "${after}"` : ""}
         ) {
             data {
                 data_section_id
@@ -326,6 +385,7 @@ export const getFacultyWideCVDataQuery = (data_section_id, faculty, title = "")
             }
             total_count
             returned_count
+            next_cursor
         }
     }`;
 
@@ -442,6 +502,8 @@ export const getAuditViewQuery = (args = {}) => {
   if (args.action) argList.push(`action: "${args.action}"`);
   if (args.start_date) argList.push(`start_date: "${args.start_date}"`);
   if (args.end_date) argList.push(`end_date: "${args.end_date}"`);
+  if (args.cursor) argList.push(`cursor: "${args.cursor}"`);
+  if (args.count_mode) argList.push(`count_mode: "${args.count_mode}"`);
 
   return `query getAuditView {
         getAuditView(${argList.join(", ")}) {
@@ -462,6 +524,8 @@ export const getAuditViewQuery = (args = {}) => {
                 logged_user_action
             }
             total_count
+            total_count_estimated
+            next_cursor
     }
 }`;
 };
@@ -593,6 +657,7 @@ export const getAllTemplatesQuery = () => `
             template_structure
             start_year
             end_year
+            version
         }
     }
 `;
@@ -635,44 +700,69 @@ export const getPublicationMatchesQuery = (scopus_id, page_number, results_per_p
     }
 `;
 
-export const getSecureFundingMatchesQuery = (first_name, last_name) => `
+export const getSecureFundingMatchesQuery = (first_name, last_name, department, agencies, user_id) => `
     query GetSecureFundingMatches {
         getSecureFundingMatches (
             first_name: "${first_name}",
-            last_name: "${last_name}"
+            last_name: "${last_name}",
+            department: ${JSON.stringify(department ?? null)},
+            agencies: ${JSON.stringify(agencies ?? [])},
+            user_id: ${JSON.stringify(user_id ?? null)}
         ) {
             secure_funding_id
             first_name
             last_name
             data_details
+            confidence
+            is_new
         }
     }
 `;
 
-export const getRiseDataMatchesQuery = (first_name, last_name) => `
+export const getRiseDataMatchesQuery = (first_name, last_name, department, agencies, user_id) => `
     query GetRiseDataMatches {
         getRiseDataMatches (
             first_name: "${first_name}",
-            last_name: "${last_name}"
+            last_name: "${last_name}",
+            department: ${JSON.stringify(department ?? null)},
+            agencies: ${JSON.stringify(agencies ?? [])},
+            user_id: ${JSON.stringify(user_id ?? null)}
         ) {
             rise_data_id
             first_name
             last_name
             data_details
+            confidence
+            is_new
         }
     }
 `;
 
-export const getPatentMatchesQuery = (first_name, last_name) => `
+export const getPatentMatchesQuery = (first_name, last_name, user_id) => `
     query GetPatentMatches {
         getPatentMatches (
             first_name: "${first_name}",
-            last_name: "${last_name}"
+            last_name: "${last_name}",
+            user_id: ${JSON.stringify(user_id ?? null)}
         ) {
             patent_id
             first_name
             last_name
             data_details
+            confidence
+            is_new
+        }
+    }
+`;
+
+export const getNewExternalMatchCountsQuery = (user_id) => `
+    query GetNewExternalMatchCounts {
+        getNewExternalMatchCounts (
+            user_id: "${user_id}"
+        ) {
+            secure_funding
+            rise_data
+            patents
         }
     }
 `;
@@ -727,6 +817,23 @@ export const GET_PRESIGNED_GOTENBERG_BUCKET_URL = `
     }
 `;
 
+export const GET_CV_BATCH_JOB = `
+  query GetCVBatchJob($job_id: String!) {
+    getCVBatchJob(job_id: $job_id) {
+      job_id
+      department
+      template_id
+      status
+      total
+      completed
+      failed
+      failed_user_ids
+      created_at
+      updated_at
+    }
+  }
+`;
+
 export const GET_STAGING_SCOPUS_PUBLICATIONS = `
     query GetStagingScopusPublications(
         $user_id: String,
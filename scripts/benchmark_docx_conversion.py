@@ -0,0 +1,123 @@
+'''
+Compares the DOCX conversion engines of cdk/pdf2docx/converter.py on sample CVs: the local pdf2docx
+backend with one process and with one process per CPU, and Adobe PDF Services when PDF_SERVICES_CLIENT_ID
+and PDF_SERVICES_CLIENT_SECRET are set. For every PDF and engine it reports the wall time and how faithful
+the DOCX is: the share of the PDF's words found in the same order in the DOCX, and the tables and images in it.
+
+    python benchmark_docx_conversion.py cv1.pdf cv2.pdf
+    python benchmark_docx_conversion.py --sample-pages 2 8 20
+
+Without PDFs, sample CVs of --sample-pages pages are generated. Requires the packages installed by
+cdk/pdf2docx/Dockerfile (boto3, pdf2docx, pdfservices-sdk).
+'''
+import argparse
+import difflib
+import os
+import sys
+import tempfile
+import time
+
+import docx
+import fitz
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'pdf2docx'))
+from converter import convert_pdf_to_docx, convert_pdf_to_docx_locally
+
+SECTION = '''
+<h2>{title}</h2>
+<table border="1" cellpadding="4">
+<tr><th>Year</th><th>Title</th><th>Venue</th><th>Role</th></tr>
+{rows}
+</table>
+<p>{text}</p>
+'''
+ROW = '<tr><td>{year}</td><td>Study of example number {number} in applied research</td><td>Journal of Examples</td><td>Author</td></tr>'
+TEXT = 'Supervised graduate students and taught undergraduate courses in the department. ' * 6
+
+def sample_cv(path, pages):
+    """Writes a CV like PDF of about the given number of pages with headings, tables and paragraphs"""
+    sections = ''.join(
+        SECTION.format(
+            title=f'Section {section + 1}',
+            rows=''.join(ROW.format(year=2000 + row % 25, number=section * 100 + row) for row in range(12)),
+            text=TEXT
+        )
+        for section in range(pages * 2)
+    )
+    story = fitz.Story(f'<h1>Curriculum Vitae</h1>{sections}')
+    writer = fitz.DocumentWriter(path)
+    more = True
+    while more:
+        device = writer.begin_page(fitz.paper_rect('letter'))
+        more, _ = story.place(fitz.paper_rect('letter') + (54, 54, -54, -54))
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+
+def pdf_words(path):
+    with fitz.open(path) as pdf:
+        return [word[4] for page in pdf for word in page.get_text('words')], len(pdf)
+
+def docx_words(document):
+    words = []
+    for block in document.element.body.iter():
+        if block.tag.endswith('}t') and block.text:
+            words += block.text.split()
+    return words
+
+def fidelity(pdf_path, docx_path):
+    source, _ = pdf_words(pdf_path)
+    document = docx.Document(docx_path)
+    converted = docx_words(document)
+    matcher = difflib.SequenceMatcher(None, source, converted, autojunk=False)
+    matched = sum(block.size for block in matcher.get_matching_blocks())
+    return {
+        'words': 100.0 * matched / max(1, len(source)),
+        'tables': len(document.tables),
+        'images': len(document.inline_shapes),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('pdfs', nargs='*')
+    parser.add_argument('--sample-pages', type=int, nargs='+', default=[2, 8, 20])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    engines = [('local x1', lambda pdf, output: convert_pdf_to_docx_locally(pdf, output, workers=1))]
+    if args.workers > 1:
+        engines.append((f'local x{args.workers}', lambda pdf, output: convert_pdf_to_docx_locally(pdf, output, workers=args.workers)))
+    if os.environ.get('PDF_SERVICES_CLIENT_ID') and os.environ.get('PDF_SERVICES_CLIENT_SECRET'):
+        engines.append(('adobe', convert_pdf_to_docx))
+    else:
+        print('PDF_SERVICES_CLIENT_ID/SECRET not set, skipping Adobe PDF Services')
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The local backend writes its per process results to the working directory, like /tmp in Lambda
+        os.chdir(directory)
+        pdfs = [os.path.abspath(pdf) for pdf in args.pdfs]
+        if not pdfs:
+            for pages in args.sample_pages:
+                path = os.path.join(directory, f'sample-{pages}.pdf')
+                sample_cv(path, pages)
+                pdfs.append(path)
+
+        print(f"{'pdf':<24} {'pages':>5} {'engine':<10} {'seconds':>8} {'words %':>8} {'tables':>7} {'images':>7}")
+        for pdf in pdfs:
+            _, page_count = pdf_words(pdf)
+            for name, convert in engines:
+                output = os.path.join(directory, 'output.docx')
+                start = time.perf_counter()
+                try:
+                    convert(pdf, output)
+                except Exception as e:
+                    print(f"{os.path.basename(pdf):<24} {page_count:>5} {name:<10} failed: {e}")
+                    continue
+                elapsed = time.perf_counter() - start
+                result = fidelity(pdf, output)
+                print(f"{os.path.basename(pdf):<24} {page_count:>5} {name:<10} {elapsed:>8.2f} "
+                      f"{result['words']:>8.1f} {result['tables']:>7} {result['images']:>7}")
+                os.remove(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+'''
+Measures the per-user latency of the fuzzy grant, RISE and patent matching in cdk/layers/nameMatching
+against the full grants, rise_data and patents tables of a database that has migrations 7 to 9 applied.
+
+Users are taken from the users table (falling back to names sampled from grants and patents), and each
+lookup runs the three matches a profile visit triggers. Only SELECTs are issued:
+
+    BENCHMARK_DSN="host=localhost dbname=postgres user=postgres password=..." python benchmark_name_matching.py
+
+The scoring regression cases below are checked first, without BENCHMARK_DSN only they run.
+Requires psycopg2, unidecode and strsimpy. Exits non-zero when a regression case fails or the p95 latency
+is above --target-ms.
+'''
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'layers', 'nameMatching', 'python'))
+from nameMatching import (BLOCKING_QUERY, MIN_CONFIDENCE, SOUNDEX_QUERY, findMatches, firstNameVariants,
+                          scoreCandidate, surnameParts)
+
+# (first name, last name, department of the profile, candidate record, whether it should match)
+REGRESSION_CASES = [
+    # Same surname and department, different first name: the department must not lift it over the threshold
+    ('Jane', 'Smith', 'Physics', {'first_name': 'John', 'last_name': 'Smith', 'department': 'Physics'}, False),
+    ('Daniel', 'Smith', 'Physics', {'first_name': 'David', 'last_name': 'Smith', 'department': 'Department of Physics'}, False),
+    ('Sean', 'Smith', 'Physics', {'first_name': 'Steven', 'last_name': 'Smith', 'department': 'Physics'}, False),
+    ('Sam', 'Smith', 'Physics', {'first_name': 'Simon', 'last_name': 'Smith', 'department': 'Physics'}, False),
+    # Jaro-Winkler is high for short names that differ by a letter or two, alone they must not match
+    ('Mark', 'Smith', None, {'first_name': 'Mary', 'last_name': 'Smith'}, False),
+    ('John', 'Smith', None, {'first_name': 'Joan', 'last_name': 'Smith'}, False),
+    ('Paul', 'Smith', None, {'first_name': 'Paula', 'last_name': 'Smith'}, False),
+    ('Eric', 'Smith', None, {'first_name': 'Erica', 'last_name': 'Smith'}, False),
+    ('Carl', 'Smith', None, {'first_name': 'Carla', 'last_name': 'Smith'}, False),
+    ('Mark', 'Jones', None, {'first_name': 'Mark', 'last_name': 'Jonas'}, False),
+    # The same person written differently
+    ('Jane', 'Smith', 'Physics', {'first_name': 'Jane', 'last_name': 'Smith', 'department': 'Chemistry'}, True),
+    ('Jane', 'Smith', 'Physics', {'first_name': 'J.', 'last_name': 'Smith', 'department': 'Physics'}, True),
+    ('James', 'Smith', 'Physics', {'first_name': 'Jim', 'last_name': 'Smith', 'department': 'Physics'}, True),
+    ('Jon', 'Smith', None, {'first_name': 'John', 'last_name': 'Smith'}, True),
+    ('Catherine', 'Smith', 'Physics', {'first_name': 'Katherine', 'last_name': 'Smith', 'department': 'Physics'}, True),
+    ('Maria', 'Garcia-Lopez', None, {'first_name': 'Maria', 'last_name': 'Garcia'}, True),
+    ('José', 'Núñez', None, {'first_name': 'Jose', 'last_name': 'Nunez'}, True),
+]
+
+def check_regressions():
+    failures = 0
+    for first_name, last_name, department, candidate, expected in REGRESSION_CASES:
+        confidence = scoreCandidate(candidate, first_name, last_name, department=department)
+        ok = (confidence >= MIN_CONFIDENCE) == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {first_name} {last_name} ({department}) vs "
+              f"{candidate['first_name']} {candidate['last_name']} ({candidate.get('department')}): "
+              f"{confidence:.3f}, expected {'a match' if expected else 'no match'}")
+    return failures
+
+def sample_users(cursor, count):
+    cursor.execute('''
+        SELECT first_name, last_name, primary_department FROM users
+        WHERE coalesce(first_name, '') <> '' AND coalesce(last_name, '') <> ''
+        ORDER BY random() LIMIT %s
+    ''', (count,))
+    users = cursor.fetchall()
+    if len(users) < count:
+        cursor.execute('''
+            SELECT first_name, last_name, department FROM (
+                SELECT first_name, last_name, department FROM grants TABLESAMPLE SYSTEM (5)
+                UNION ALL
+                SELECT first_name, last_name, NULL FROM patents TABLESAMPLE SYSTEM (5)
+            ) names
+            WHERE coalesce(first_name, '') <> '' AND coalesce(last_name, '') <> ''
+            ORDER BY random() LIMIT %s
+        ''', (count - len(users),))
+        users += cursor.fetchall()
+    return users
+
+def explain_blocking(cursor, table, first_name, last_name):
+    cursor.execute(SOUNDEX_QUERY, (surnameParts(last_name),))
+    codes = cursor.fetchone()[0]
+    initials = sorted(set(variant[0] for variant in firstNameVariants(first_name)))
+    cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + BLOCKING_QUERY.format(table=table),
+                   {'codes': codes, 'initials': initials})
+    print(f'\n--- {table} blocking plan for {first_name} {last_name} ---')
+    print('\n'.join(row[0] for row in cursor.fetchall()))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--target-ms', type=float, default=100)
+    args = parser.parse_args()
+
+    failures = check_regressions()
+    if failures:
+        print(f'{failures} scoring regression case(s) failed')
+        sys.exit(1)
+    if 'BENCHMARK_DSN' not in os.environ:
+        print('BENCHMARK_DSN not set, skipping the latency benchmark')
+        return
+
+    connection = psycopg2.connect(os.environ['BENCHMARK_DSN'])
+    connection.set_session(readonly=True, autocommit=True)
+    cursor = connection.cursor()
+
+    for table in ('grants', 'rise_data', 'patents'):
+        cursor.execute(f'SELECT count(*) FROM {table}')
+        print(f'{table}: {cursor.fetchone()[0]} rows')
+
+    users = sample_users(cursor, args.users)
+    if len(users) == 0:
+        print('No names to look up')
+        return
+    explain_blocking(cursor, 'grants', users[0][0], users[0][1])
+
+    timings = []
+    candidates = 0
+    for first_name, last_name, department in users:
+        start = time.perf_counter()
+        for table in ('grants', 'rise_data', 'patents'):
+            candidates += len(findMatches(cursor, table, first_name, last_name, department=department))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(f'\n{len(timings)} users, {candidates} matches returned')
+    print(f'mean {statistics.mean(timings):.1f} ms, p50 {statistics.median(timings):.1f} ms, '
+          f'p95 {p95:.1f} ms, max {timings[-1]:.1f} ms (grants + rise_data + patents per user)')
+
+    cursor.close()
+    connection.close()
+    if p95 > args.target_ms:
+        print(f'p95 is above the {args.target_ms:.0f} ms target')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
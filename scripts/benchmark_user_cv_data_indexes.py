@@ -0,0 +1,111 @@
+'''
+Compares query plans for the hot user_cv_data reads before and after the indexes from
+cdk/lambda/createTables/migrations.py are created.
+
+Builds a synthetic user_cv_data table (1M rows by default) in a scratch schema, so it is safe to
+point at a development database:
+
+    BENCHMARK_DSN="host=localhost dbname=postgres user=postgres password=..." python benchmark_user_cv_data_indexes.py
+
+Requires psycopg2. The scratch schema is dropped at the end unless --keep is passed.
+'''
+import argparse
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'lambda', 'createTables'))
+from migrations import MIGRATIONS
+
+SCHEMA = 'bench_user_cv_data'
+
+QUERIES = {
+    'getUserCVData': (
+        'SELECT user_cv_data_id, user_id, data_section_id, data_details, editable FROM user_cv_data '
+        'WHERE user_id = %s AND data_section_id = %s AND archive != true',
+        ('user-42', 'section-7'),
+    ),
+    'getArchivedUserCVData': (
+        'SELECT user_cv_data_id, user_id, data_section_id, data_details, archive, archive_timestamp, editable '
+        'FROM user_cv_data WHERE user_id = %s AND archive = true',
+        ('user-42',),
+    ),
+    'getAllSectionCVData': (
+        'SELECT user_cv_data_id, user_id, data_section_id, data_details FROM user_cv_data '
+        'WHERE data_section_id = %s AND archive != true LIMIT 1000',
+        ('section-7',),
+    ),
+    'deleteArchivedData': (
+        'SELECT count(*) FROM user_cv_data WHERE archive = true AND archive_timestamp < now() - interval \'30 days\'',
+        None,
+    ),
+}
+
+def create_table(cursor, rows, users, sections):
+    cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+    cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+    cursor.execute(f'SET search_path TO {SCHEMA}')
+    cursor.execute('''
+        CREATE TABLE user_cv_data (
+            user_cv_data_id varchar DEFAULT md5(random()::text) PRIMARY KEY,
+            user_id varchar,
+            data_section_id varchar,
+            data_details JSON,
+            archive boolean DEFAULT false,
+            archive_timestamp timestamp,
+            editable boolean
+        )
+    ''')
+    # Roughly 5% of rows are archived, spread over the last 90 days
+    cursor.execute('''
+        INSERT INTO user_cv_data (user_id, data_section_id, data_details, archive, archive_timestamp, editable)
+        SELECT 'user-' || (g %% %s),
+               'section-' || ((g / %s) %% %s),
+               json_build_object('title', 'Entry ' || g, 'year', 1990 + g %% 35),
+               g %% 20 = 0,
+               CASE WHEN g %% 20 = 0 THEN now() - (g %% 90) * interval '1 day' END,
+               true
+        FROM generate_series(1, %s) AS g
+    ''', (users, users, sections, rows))
+    cursor.execute('ANALYZE user_cv_data')
+
+def explain_all(cursor, label):
+    print(f'\n===== {label} =====')
+    for name, (query, params) in QUERIES.items():
+        cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + query, params)
+        plan = [row[0] for row in cursor.fetchall()]
+        print(f'\n--- {name} ---')
+        print('\n'.join(plan))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=2500)
+    parser.add_argument('--sections', type=int, default=40)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch schema afterwards')
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(os.environ['BENCHMARK_DSN'])
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    connection.autocommit = True
+    cursor = connection.cursor()
+
+    print(f'Creating {args.rows} synthetic rows in {SCHEMA}.user_cv_data')
+    create_table(cursor, args.rows, args.users, args.sections)
+    explain_all(cursor, 'Before indexes')
+
+    for migration in MIGRATIONS:
+        for statement in migration['statements']:
+            if 'CREATE INDEX' in statement and 'ON user_cv_data ' in statement:
+                cursor.execute(statement)
+    cursor.execute('ANALYZE user_cv_data')
+    explain_all(cursor, 'After indexes')
+
+    if not args.keep:
+        cursor.execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+    cursor.close()
+    connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+'''
+Checks the SQL that reads template_structure and data_details inside the database, the getUserCVBundle
+query and the cvDataAggregates layer, against rows stored the way the resolvers store them. addTemplate,
+updateTemplate, addUserCVData and the other writers json.dumps the AWSJSON argument, which AppSync passes
+as a string, so the columns hold a JSON string containing the object. The ETLs write plain objects, both
+forms are checked.
+
+Builds a few rows in a scratch schema, so it is safe to point at a development database:
+
+    CHECK_DSN="host=localhost dbname=postgres user=postgres password=..." python check_cv_json_queries.py
+
+Requires psycopg2 and boto3. Exits non-zero when a check fails. The scratch schema is dropped at the end.
+'''
+import json
+import os
+import sys
+
+import psycopg2
+
+# The resolvers create their AWS clients on import, no request is made
+os.environ.setdefault('AWS_DEFAULT_REGION', 'ca-central-1')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'layers', 'databaseConnect.zip', 'python'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'layers', 'cvDataAggregates', 'python'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'lambda', 'getUserCVBundle'))
+from cvDataAggregates import getCVDataAggregates
+from resolver import BUNDLE_QUERY, PROJECTED_DATA_DETAILS
+
+SCHEMA = 'check_cv_json'
+
+def appsync_json(value):
+    """What addTemplate and addUserCVData write for an AWSJSON argument"""
+    return json.dumps(json.dumps(value))
+
+def create_tables(cursor):
+    cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+    cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+    cursor.execute(f'SET search_path TO {SCHEMA}')
+    cursor.execute('''
+        CREATE TABLE users (
+            user_id varchar PRIMARY KEY, first_name varchar, last_name varchar,
+            primary_department varchar, primary_faculty varchar
+        )
+    ''')
+    cursor.execute("INSERT INTO users VALUES ('user-1', 'Jane', 'Smith', 'Physics', 'Science')")
+    cursor.execute('''
+        CREATE TABLE data_sections (
+            data_section_id varchar PRIMARY KEY, title varchar, description varchar, data_type varchar,
+            attributes JSON, archive boolean DEFAULT false, attributes_type JSON, info TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE templates (
+            template_id varchar PRIMARY KEY, title varchar, template_structure varchar,
+            start_year varchar, end_year varchar, version integer NOT NULL DEFAULT 1
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE user_cv_data (
+            user_cv_data_id varchar PRIMARY KEY, user_id varchar, data_section_id varchar, data_details JSON,
+            archive boolean DEFAULT false, archive_timestamp timestamp, editable boolean, content_hash varchar
+        )
+    ''')
+    for section_id, title in [('s-pub', 'Publications'), ('s-grant', 'Grants'), ('s-other', 'Other')]:
+        cursor.execute('INSERT INTO data_sections (data_section_id, title) VALUES (%s, %s)', (section_id, title))
+    # Sections are referenced by id in one template and by title in the other
+    cursor.execute('INSERT INTO templates (template_id, title, template_structure) VALUES (%s, %s, %s)', (
+        't-appsync', 'Written by addTemplate',
+        json.dumps(json.dumps({'groups': [{'title': 'Research', 'sections': [{'data_section_id': 's-pub'}]}]}))
+    ))
+    cursor.execute('INSERT INTO templates (template_id, title, template_structure) VALUES (%s, %s, %s)', (
+        't-object', 'Plain object', json.dumps({'sections': ['Grants']})
+    ))
+    cursor.execute('INSERT INTO user_cv_data (user_cv_data_id, user_id, data_section_id, data_details) VALUES (%s, %s, %s, %s)', (
+        'e-appsync', 'user-1', 's-pub', appsync_json({'title': 'A paper', 'end_date': '2020', 'publication_type': 'Journal'})
+    ))
+    cursor.execute('INSERT INTO user_cv_data (user_cv_data_id, user_id, data_section_id, data_details) VALUES (%s, %s, %s, %s)', (
+        'e-object', 'user-1', 's-grant', json.dumps({'title': 'A grant', 'dates': '2021', 'amount': '1000'})
+    ))
+    cursor.execute('INSERT INTO user_cv_data (user_cv_data_id, user_id, data_section_id, data_details) VALUES (%s, %s, %s, %s)', (
+        'e-appsync-grant', 'user-1', 's-grant',
+        appsync_json({'title': 'Another grant', 'dates': '2019 - 2021', 'amount': '$2,500', 'type': 'Operating', 'agency': 'NSERC'})
+    ))
+
+def bundle(cursor, template_id=None, fields=None):
+    query = BUNDLE_QUERY.format(data_details=PROJECTED_DATA_DETAILS if fields else 'e.data_details')
+    cursor.execute(query, {
+        'user_id': 'user-1',
+        'template_id': template_id,
+        'etag': '',
+        'fields': sorted(fields) if fields else None,
+        'fields_key': ','.join(sorted(fields)) if fields else '*',
+    })
+    return cursor.fetchone()[1]
+
+def check_bundle(cursor):
+    failures = []
+    sections = bundle(cursor, template_id='t-appsync')
+    if [section['data_section_id'] for section in sections] != ['s-pub']:
+        failures.append(f"template written by addTemplate selected {[section['data_section_id'] for section in sections]}")
+    sections = bundle(cursor, template_id='t-object')
+    if [section['data_section_id'] for section in sections] != ['s-grant']:
+        failures.append(f"plain object template selected {[section['data_section_id'] for section in sections]}")
+    details = {
+        entry['user_cv_data_id']: entry['data_details']
+        for section in bundle(cursor, fields=['title']) for entry in section['entries']
+    }
+    expected = {'e-appsync': {'title': 'A paper'}, 'e-object': {'title': 'A grant'}, 'e-appsync-grant': {'title': 'Another grant'}}
+    if details != expected:
+        failures.append(f"projected data_details {details}")
+    return failures
+
+def check_aggregates(cursor):
+    failures = []
+    aggregates = getCVDataAggregates(cursor, 's-pub', 'Publications', 'department', '', {})
+    rows = [(row['group_key'], row['year'], row['type'], row['count']) for row in aggregates]
+    if rows != [('Physics', 2020, 'Journal', 1)]:
+        failures.append(f"publications written by addUserCVData aggregated to {rows}")
+    aggregates = getCVDataAggregates(cursor, 's-grant', 'Grants', 'none', '', {})
+    rows = [(row['year'], row['type'], row['agency'], row['count'], row['amount_sum']) for row in aggregates]
+    if rows != [(2021, 'Operating', 'NSERC', 1, 2500.0), (2021, None, None, 1, 1000.0)]:
+        failures.append(f"grants aggregated to {rows}")
+    return failures
+
+def main():
+    dsn = os.environ.get('CHECK_DSN')
+    if not dsn:
+        print('CHECK_DSN is not set')
+        sys.exit(2)
+    connection = psycopg2.connect(dsn)
+    cursor = connection.cursor()
+    failures = []
+    try:
+        create_tables(cursor)
+        failures += [f'getUserCVBundle: {failure}' for failure in check_bundle(cursor)]
+        failures += [f'getCVDataAggregates: {failure}' for failure in check_aggregates(cursor)]
+    finally:
+        connection.rollback()
+        cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        connection.commit()
+        connection.close()
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print('All checks passed')
+
+if __name__ == '__main__':
+    main()
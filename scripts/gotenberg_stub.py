@@ -0,0 +1,134 @@
+'''
+Local stand-in for Gotenberg's /forms/chromium/convert/html route, for load testing the batch CV generation
+without Chromium or AWS. Each request is answered with a small valid PDF after a simulated render time, with
+at most --max-concurrency renders running at once like a Gotenberg task's Chromium pool. HTTP/1.1 keep-alive
+is supported, and GET /stats reports how many connections and renders the stub has seen.
+
+    python gotenberg_stub.py --port 3000 --render-ms 800 --jitter-ms 400 --max-concurrency 2
+'''
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GOTENBERG_PATH = "/forms/chromium/convert/html"
+
+def minimal_pdf(text):
+    """One page PDF with a line of text, with a correct xref table"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.renders = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+def make_handler(args, stats, renders):
+    class GotenbergStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with stats.lock:
+                stats.connections += 1
+
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def send_body(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self.send_body(200, "application/json", b'{"status":"up"}')
+            elif self.path == "/stats":
+                with stats.lock:
+                    body = json.dumps({key: value for key, value in vars(stats).items() if key != "lock"})
+                self.send_body(200, "application/json", body.encode())
+            else:
+                self.send_body(404, "text/plain", b"Not found")
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path != GOTENBERG_PATH:
+                self.send_body(404, "text/plain", b"Not found")
+                return
+            if b'filename="index.html"' not in body:
+                self.send_body(400, "text/plain", b"index.html is required")
+                return
+            if random.random() < args.error_rate:
+                with stats.lock:
+                    stats.rejected += 1
+                self.send_body(503, "text/plain", b"Simulated Chromium failure")
+                return
+            with renders:
+                with stats.lock:
+                    stats.in_flight += 1
+                    stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+                time.sleep(max(0, args.render_ms + random.uniform(-args.jitter_ms, args.jitter_ms)) / 1000.0)
+                with stats.lock:
+                    stats.in_flight -= 1
+                    stats.renders += 1
+            self.send_body(200, "application/pdf", minimal_pdf(f"Rendered {len(body)} bytes"))
+
+    return GotenbergStubHandler
+
+def start_server(args):
+    """Starts the stub on a background thread and returns the server, port 0 picks a free port"""
+    stats = Stats()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, stats, threading.Semaphore(args.max_concurrency)))
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--render-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=300)
+    parser.add_argument("--max-concurrency", type=int, default=2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    server = start_server(args)
+    print(f"Gotenberg stand-in listening on http://{args.host}:{server.server_address[1]}{GOTENBERG_PATH}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+'''
+Load tests the worker pool of cdk/lambda/generateGotenbergBatch against the local Gotenberg stand-in in
+gotenberg_stub.py, without AWS. Renders --documents HTML documents once per worker count and reports the
+throughput, the number of connections opened and the peak number of renders running in the stub.
+
+    python load_test_batch_generation.py --documents 200 --workers 1 2 4 8 --render-ms 300 --max-concurrency 4
+
+Pass --host/--port to run against a real Gotenberg (e.g. docker run -p 3000:3000 gotenberg/gotenberg:8) instead.
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'layers', 'gotenbergCommon', 'python'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'cdk', 'lambda', 'generateGotenbergBatch'))
+from gotenbergPool import render_all
+
+import gotenberg_stub
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--documents', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--html-kb', type=int, default=200)
+    parser.add_argument('--host', help='Use a running Gotenberg instead of the stand-in')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--render-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--max-concurrency', type=int, default=4)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    host, port = args.host, args.port
+    if host is None:
+        server = gotenberg_stub.start_server(gotenberg_stub.parse_args([
+            '--port', '0', '--render-ms', str(args.render_ms), '--jitter-ms', str(args.jitter_ms),
+            '--max-concurrency', str(args.max_concurrency), '--error-rate', str(args.error_rate),
+        ]))
+        host, port = '127.0.0.1', server.server_address[1]
+        print(f"Stand-in on port {port}: {args.render_ms:.0f} ms renders, {args.max_concurrency} at once")
+
+    row = '<tr><td>Publication</td><td>Journal of Examples</td><td>2024</td></tr>'
+    html = ('<html><body><table>' + row * (args.html_kb * 1024 // len(row)) + '</table></body></html>').encode()
+    documents = list(range(args.documents))
+
+    print(f"{'workers':>8} {'seconds':>8} {'docs/s':>8} {'failed':>7} {'conns':>6} {'peak':>5}")
+    for workers in args.workers:
+        if server is not None:
+            server.stats.max_in_flight = 0
+        start = time.perf_counter()
+        succeeded, failed, remaining, connections = render_all(
+            documents, lambda client, document: client.convert(html), host, workers, port=port
+        )
+        elapsed = time.perf_counter() - start
+        peak = server.stats.max_in_flight if server is not None else '-'
+        print(f"{workers:>8} {elapsed:>8.2f} {len(succeeded) / elapsed:>8.1f} {len(failed):>7} {connections:>6} {peak:>5}")
+
+    if server is not None:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -101,4 +101,37 @@ CREATE TABLE course_catalog (
 ALTER TABLE rise_data
 ADD COLUMN IF NOT EXISTS record_id VARCHAR NOT NULL DEFAULT '';
 
--- END
\ No newline at end of file
+-- END
+-- October 18th: applied automatically
+-- From here on schema changes are versioned migrations in cdk/lambda/createTables/migrations.py,
+-- applied by the createTables trigger on deployment and tracked in the schema_migrations table.
+-- Migration 1: partial indexes on user_cv_data (user_id, data_section_id), (data_section_id),
+-- (user_id) WHERE archive = true and (archive_timestamp) WHERE archive = true.
+-- Migration 2: user_cv_data.content_hash (SHA-256 of data_details::jsonb::text, set by trigger),
+-- existing duplicates removed and a unique index on (user_id, data_section_id, content_hash).
+-- Migration 3: user_cv_data.created_at / updated_at, user_cv_data_tombstones filled by an AFTER DELETE
+-- trigger, for getUserCVDataChanges.
+-- Migration 4: indexes on users (primary_department), users (primary_faculty) and
+-- user_cv_data (data_section_id, user_cv_data_id) WHERE archive = false.
+-- Migration 5: audit_view indexes on (ts, log_view_id), (logged_user_id, ts, log_view_id) and
+-- (logged_user_action, ts, log_view_id), pg_trgm extension and trigram indexes on the email and name columns.
+-- Migration 6: audit_view recreated as a table partitioned by month on ts (audit_view_yYYYYmMM plus
+-- audit_view_default), primary key (log_view_id, ts), create_audit_view_partition(month) function.
+-- Partitions are created ahead and expired ones archived by the maintainAuditViewPartitions Lambda.
+-- Migration 7: first_name_key / last_name_key on grants, rise_data and patents (first name token,
+-- accent-folded and lowercased), backfilled with the unaccent extension and filled by the ETL jobs afterwards.
+-- Migration 8: removed, it indexed (last_name_key, first_name_key) for grants, rise_data and patents.
+-- Migration 9: fuzzystrmatch extension and soundex expression indexes on the first and last hyphenated
+-- part of last_name_key for grants, rise_data and patents, used by the nameMatching layer.
+-- Migration 10: external_record_matches (user_id, source, record_id, confidence, matched_at), filled by the
+-- storeData / storeEpoPatents Glue jobs and the match resolvers, and external_match_state per user and source.
+-- Migration 11: templates.version (integer, default 1), incremented by updateTemplate.
+-- Migration 12: generated_cvs (user_id, template_id, cognito_user_id, generated_at), one row per CV PDF in the
+-- CV bucket, kept by the registerGeneratedCV and reconcileGeneratedCVs Lambdas.
+-- Migration 13: index on users (secondary_department).
+-- Migration 14: user_cv_data.updated_xid and user_cv_data_tombstones.deleted_xid (xid8 of the writing
+-- transaction, set by triggers). getUserCVDataChanges uses the xmin of its snapshot as watermark.
+-- Migration 15: templates.updated_at (timestamptz), set by updateTemplate. cvIsUpToDate compares it with the
+-- time the PDF was generated.
+-- Migration 16: drops the migration 8 name key indexes where they were created.
+-- END